@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:27:14 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Alphabet import Alphabet
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+from .Rna_structure import Rna_structure
+from .Rna_parser import Rna_parser
+from .Nussinov_kernels import Nussinov_kernels
+import time
+
+class Alignment_fold:
+    """
+    Classe prédisant la structure consensus d'un alignement multiple d'ARN.
+
+    Chaque couple de colonnes (a,b) reçoit un score calculé sur toutes les
+    séquences à la fois: la moyenne des scores d'appariement (Scores) des
+    bases des colonnes, un gap comptant pour 0, plus un bonus de covariation
+    égal au nombre moyen de bases différentes entre les paires autorisées de
+    deux séquences (une mutation compensatoire compte pour 2). Un couple dont
+    moins de min_pairing des séquences forment une paire autorisée ne peut pas
+    s'apparier.
+
+    Les nombres de chaque type de paire sont obtenus par des produits de
+    matrices des colonnes codées en one-hot, en O(N·L²) pour N séquences de
+    longueur alignée L. Comme pour Cofold_structure, chaque colonne a son
+    propre code et la table des scores par colonne (multipliée par precision
+    et arrondie) est donnée aux moteurs de Nussinov_kernels: un seul
+    remplissage de taille L remplace les N repliements.
+
+    Attributs:
+        __ids (list): Identifiants des séquences.
+        __alignment (list): Séquences alignées (gaps '-', '.' ou '~').
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __bases_scores (Scores): Scores des bases de l'ARN.
+        __covariation (float): Poids du bonus de covariation.
+        __min_pairing (float): Part minimale des séquences formant une paire autorisée.
+        __precision (int): Facteur appliqué aux scores avant arrondi.
+        __backend (str): Moteur de Nussinov_kernels.
+        __pair_scores (numpy.ndarray): Scores des couples de colonnes.
+        __matrix (numpy.ndarray): Matrice des scores (multipliés par precision).
+        __structure (Rna_structure): Structure consensus.
+        __fold_time (float): Temps du calcul.
+    """
+    GAPS="-.~"
+
+    def __init__(self,alignment,minloop=3,bases_scores=None,covariation=1.0,min_pairing=0.5,precision=100,backend="auto"):
+        """
+        Initialise une instance de Alignment_fold et prédit la structure consensus.
+
+        Args:
+            alignment (dict ou list): Séquences alignées, {identifiant: séquence} ou liste de couples (identifiant, séquence).
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            covariation (float, optionnel): Poids du bonus de covariation. Par défaut à 1.0.
+            min_pairing (float, optionnel): Part minimale des séquences formant une paire autorisée. Par défaut à 0.5.
+            precision (int, optionnel): Facteur appliqué aux scores avant arrondi. Par défaut à 100.
+            backend (str, optionnel): 'auto', 'numpy', 'numba', 'wavefront' ou 'tiled'. Par défaut à 'auto'.
+
+        Raises:
+            Exception: Si l'alignement est vide, si les séquences n'ont pas la même longueur ou contiennent
+                un caractère autre qu'une base ou un gap, ou si bases_scores n'est pas un objet Scores.
+        """
+        if bases_scores is None:
+            self.__bases_scores=Scores()
+        elif isinstance(bases_scores,Scores):
+            self.__bases_scores=bases_scores
+        else:
+            raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
+
+        records=list(alignment.items()) if isinstance(alignment,dict) else list(alignment)
+        if not records:
+            raise Exception("l'alignement ne contient aucune séquence")
+        self.__ids=[seqid for seqid,_ in records]
+        self.__alignment=[seq.upper().replace("T","U") for _,seq in records]
+        length=len(self.__alignment[0])
+        for seqid,seq in zip(self.__ids,self.__alignment):
+            if len(seq)!=length:
+                raise Exception("la séquence alignée '{}' n'a pas la longueur de l'alignement ({})".format(seqid,length))
+            bad=[c for c in seq if c not in Alignment_fold.GAPS+Alphabet.rna()]
+            if bad:
+                raise Exception("caractère '{}' inattendu dans la séquence alignée '{}'".format(bad[0],seqid))
+        if backend=="auto":
+            backend="numba" if "numba" in Nussinov_kernels.available_backends() else "numpy"
+        self.__minimal_loop_length=int(minloop)
+        self.__covariation=float(covariation)
+        self.__min_pairing=float(min_pairing)
+        self.__precision=int(precision)
+        self.__backend=backend
+        self.__pair_scores=None
+        self.__matrix=None
+        self.__structure=None
+        self.__fold_time=0
+
+        self.structure_prediction()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def ids(self):
+        """
+        Retourne les identifiants des séquences.
+
+        Returns:
+            list: Identifiants, dans l'ordre de l'alignement.
+        """
+        return self.__ids
+
+    @property
+    def alignment(self):
+        """
+        Retourne les séquences alignées.
+
+        Returns:
+            list: Séquences alignées, en majuscules.
+        """
+        return self.__alignment
+
+    @property
+    def pair_scores(self):
+        """
+        Retourne les scores des couples de colonnes (moyenne des paires et bonus de covariation).
+
+        Returns:
+            numpy.ndarray: Matrice (L, L) symétrique, nulle pour les couples qui ne peuvent pas s'apparier.
+        """
+        return self.__pair_scores
+
+    @property
+    def matrix(self):
+        """
+        Retourne la matrice de Nussinov de l'alignement.
+
+        Returns:
+            numpy.ndarray: Matrice des scores, multipliés par precision.
+        """
+        return self.__matrix
+
+    @property
+    def structure(self):
+        """
+        Retourne la structure consensus.
+
+        La séquence consensus porte sur chaque paire le type de paire le plus
+        fréquent du couple de colonnes, ailleurs la base la plus fréquente de
+        la colonne (A pour une colonne sans base).
+
+        Returns:
+            Rna_structure: Structure consensus, en colonnes de l'alignement.
+        """
+        return self.__structure
+
+    @property
+    def score(self):
+        """
+        Retourne le score de la structure consensus.
+
+        Returns:
+            float: Somme des scores des couples de colonnes appariés.
+        """
+        return float(self.__matrix[0,-1])/self.__precision if len(self.__matrix) else 0.0
+
+    @property
+    def fold_time(self):
+        """
+        Retourne le temps du calcul.
+
+        Returns:
+            float: Temps en secondes.
+        """
+        return self.__fold_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    @staticmethod
+    def from_fasta(filename: str,**kwargs):
+        """
+        Prédit la structure consensus d'un alignement au format FASTA.
+
+        Args:
+            filename (str): Chemin du fichier FASTA aligné.
+            **kwargs: Options de Alignment_fold.
+
+        Returns:
+            Alignment_fold: Repliement de l'alignement.
+        """
+        return Alignment_fold([(seqid,record["seq"]) for seqid,record in Rna_parser.parse_fasta(filename).items()],**kwargs)
+
+    def structure_prediction(self):
+        """
+        Calcule les scores des couples de colonnes puis replie l'alignement.
+        """
+        start_time=time.time()
+        rna=Alphabet.rna()
+        codes=np.array([Alphabet.encode_rna(seq) for seq in self.__alignment])
+        table=self.__bases_scores.pair_table
+        scores,types,counts=Alignment_fold.column_pair_scores(codes,table,self.__covariation,self.__min_pairing)
+        self.__pair_scores=scores
+        length=codes.shape[1]
+        positions=np.arange(length)
+        column_table=np.rint(scores*self.__precision).astype(np.int64)
+        m=self.__minimal_loop_length
+        self.__matrix=Nussinov_kernels.fill(positions,column_table,m,self.__backend)
+        fold=Nussinov_kernels.traceback(self.__matrix,positions,column_table,m,self.__backend)
+
+        #séquence consensus: type de paire le plus fréquent sur les paires, base la plus fréquente ailleurs
+        consensus=[rna[b] for b in np.argmax([(codes==b).sum(axis=0) for b in range(len(rna))],axis=0)]
+        for i,j in fold:
+            x,y=types[int(np.argmax(counts[:,i,j]))]
+            consensus[i]=rna[x]
+            consensus[j]=rna[y]
+        self.__structure=Rna_structure(Rna_seq("consensus","".join(consensus)),fold=fold,scores=self.__bases_scores)
+        self.__fold_time=time.time()-start_time
+
+    def member_structure(self,index: int):
+        """
+        Projette la structure consensus sur une séquence de l'alignement.
+
+        Les paires dont une colonne est un gap dans la séquence, ou dont les
+        bases ne forment pas une paire autorisée, sont retirées.
+
+        Args:
+            index (int): Indice de la séquence dans l'alignement.
+
+        Returns:
+            Rna_structure: Structure de la séquence sans gaps.
+        """
+        seq=self.__alignment[index]
+        allowed=self.__bases_scores.allowed_bp
+        position=[]
+        ungapped=0
+        for c in seq:
+            position.append(ungapped)
+            if c not in Alignment_fold.GAPS:
+                ungapped+=1
+        fold=[(position[i],position[j]) for i,j in self.__structure.fold if seq[i]+seq[j] in allowed]
+        bases="".join(c for c in seq if c not in Alignment_fold.GAPS)
+        return Rna_structure(Rna_seq(self.__ids[index],bases),fold=fold,scores=self.__bases_scores)
+
+    @staticmethod
+    def column_pair_scores(codes,table,covariation=1.0,min_pairing=0.5):
+        """
+        Calcule les scores de tous les couples de colonnes d'un alignement codé.
+
+        Args:
+            codes (numpy.ndarray): Codes des séquences alignées (Alphabet.encode_rna), de taille (N, L).
+            table (numpy.ndarray): Table des scores d'appariement (Scores.pair_table).
+            covariation (float, optionnel): Poids du bonus de covariation. Par défaut à 1.0.
+            min_pairing (float, optionnel): Part minimale des séquences formant une paire autorisée. Par défaut à 0.5.
+
+        Returns:
+            tuple: Scores (numpy.ndarray (L, L)), types de paires autorisées (liste de couples de codes)
+                et nombres de séquences de chaque type par couple de colonnes (numpy.ndarray (types, L, L)).
+        """
+        codes=np.asarray(codes)
+        table=np.asarray(table)
+        count,length=codes.shape
+        bases=table.shape[0]-1
+        types=[(x,y) for x in range(bases) for y in range(bases) if table[x,y]>0]
+        onehot=[(codes==b).astype(np.float32) for b in range(bases)]
+        counts=np.array([onehot[x].T@onehot[y] for x,y in types],dtype=np.float64).reshape(len(types),length,length)
+        values=np.array([table[x,y] for x,y in types],dtype=np.float64)
+        scores=np.tensordot(values,counts,axes=1)/count
+        if count>1 and covariation:
+            #somme, sur les couples de séquences, des bases différentes entre leurs paires
+            differences=np.zeros((length,length))
+            for k,(x1,y1) in enumerate(types):
+                for l in range(k+1,len(types)):
+                    x2,y2=types[l]
+                    differences+=((x1!=x2)+(y1!=y2))*counts[k]*counts[l]
+            scores+=covariation*differences/(count*(count-1)/2)
+        scores[counts.sum(axis=0)<min_pairing*count]=0
+        return scores,types,counts
@@ -40,3 +40,64 @@ class Alphabet:
             str: Une chaîne de caractères représentant la notation en parenthèses (., ).
         """
         return "(.)"
+
+    @staticmethod
+    def brackets():
+        """
+        Retourne les couples de crochets de la notation étendue aux pseudonoeuds.
+
+        Le premier couple note les paires imbriquées; chaque couple suivant note
+        les paires qui croisent celles des niveaux précédents.
+
+        Returns:
+            str: Crochets ouvrant et fermant de chaque niveau, ()[]{}<>.
+        """
+        return "()[]{}<>"
+
+
+    @staticmethod
+    def encode_rna(seq: str):
+        """
+        Encode une séquence d'ARN en entiers.
+
+        Chaque base reçoit son indice dans Alphabet.rna(), tout autre caractère
+        (lien, gap, base inconnue) reçoit le code len(Alphabet.rna()).
+
+        Args:
+            seq (str): Séquence d'ARN.
+
+        Returns:
+            numpy.ndarray: Tableau uint8 des codes des bases.
+        """
+        import numpy as np
+        return np.frombuffer(Alphabet.encode_rna_bytes(seq),dtype=np.uint8)
+
+    @staticmethod
+    def encode_rna_bytes(seq: str):
+        """
+        Encode une séquence d'ARN en octets, sans passer par numpy.
+
+        Même codage que Alphabet.encode_rna(), calculé en une passe par bytes.translate.
+
+        Args:
+            seq (str): Séquence d'ARN.
+
+        Returns:
+            bytes: Un octet par base, contenant son code.
+        """
+        return seq.encode("ascii","replace").translate(_RNA_CODES)
+
+def _rna_codes():
+    """
+    Construit la table de traduction des octets vers les codes des bases.
+
+    Returns:
+        bytes: Table de 256 octets pour bytes.translate.
+    """
+    rna=Alphabet.rna()
+    table=bytearray([len(rna)])*256
+    for code,b in enumerate(rna):
+        table[ord(b)]=code
+    return bytes(table)
+
+_RNA_CODES=_rna_codes()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:31:54 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Alphabet import Alphabet
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+from .Rna_structure import Rna_structure
+from .Nussinov_kernels import Nussinov_kernels
+import time
+
+class Batch_predict:
+    """
+    Classe pour prédire en une fois les structures de nombreuses séquences courtes.
+
+    Les séquences sont regroupées par tranches de longueur, complétées à droite
+    par des positions non appariables et empilées dans un tableau 3-D sur lequel
+    la matrice de Nussinov est remplie pour tout le lot à la fois.
+
+    Attributs:
+        __rnas (list): Liste des objets Rna_seq.
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __bases_scores (Scores): Scores des bases de l'ARN.
+        __bucket_width (int): Largeur des tranches de longueur.
+        __batch_size (int): Nombre maximal de séquences par lot.
+        __max_batch_bytes (int): Taille mémoire maximale des matrices d'un lot.
+        __metrics_hook (callable): Fonction appelée avec les métriques de chaque lot.
+        __structures (list): Structures prédites, dans l'ordre des séquences.
+        __predict_time (float): Temps de prédiction.
+    """
+    def __init__(self,rna_list: list,minloop=3,bases_scores=None,bucket_width=8,batch_size=256,max_batch_bytes=2**28,metrics_hook=None):
+        """
+        Initialise une instance de Batch_predict et prédit les structures.
+
+        Args:
+            rna_list (list): Liste d'objets Rna_seq.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            bucket_width (int, optionnel): Largeur des tranches de longueur regroupées dans un même lot. Par défaut à 8.
+            batch_size (int, optionnel): Nombre maximal de séquences par lot. Par défaut à 256.
+            max_batch_bytes (int, optionnel): Taille mémoire maximale des matrices d'un lot (lot·n²·8 octets).
+                Une séquence est toujours traitée, même seule, si sa matrice dépasse cette taille. Par défaut à 256 Mio.
+            metrics_hook (callable, optionnel): Fonction appelée après chaque lot avec ses métriques, au format
+                de Predict_structure.metrics et avec le nombre de séquences dans 'predictions'. Par défaut à None.
+
+        Raises:
+            Exception: Si un élément de rna_list n'est pas un objet Rna_seq ou si bases_scores n'est pas un objet Scores.
+        """
+        for rna in rna_list:
+            if not isinstance(rna,Rna_seq):
+                raise Exception("'{}' n'est pas un objet Rna_seq".format(rna))
+
+        if bases_scores is None:
+            self.__bases_scores=Scores()
+        elif isinstance(bases_scores,Scores):
+            self.__bases_scores=bases_scores
+        else:
+            raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
+
+        self.__rnas=list(rna_list)
+        self.__minimal_loop_length=int(minloop)
+        self.__bucket_width=max(int(bucket_width),1)
+        self.__batch_size=max(int(batch_size),1)
+        self.__max_batch_bytes=int(max_batch_bytes)
+        self.__metrics_hook=metrics_hook
+        self.__structures=[]
+        self.__predict_time=0
+
+        self.structures_prediction()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def rnas(self):
+        """
+        Retourne la liste des séquences.
+
+        Returns:
+            list: Liste des objets Rna_seq.
+        """
+        return self.__rnas
+
+    @property
+    def structures(self):
+        """
+        Retourne les structures prédites, dans l'ordre des séquences.
+
+        Returns:
+            list: Liste des objets Rna_structure.
+        """
+        return self.__structures
+
+    @property
+    def scores(self):
+        """
+        Retourne les scores des bases de l'ARN.
+
+        Returns:
+            Scores: Scores des bases de l'ARN.
+        """
+        return self.__bases_scores
+
+    @property
+    def predict_time(self):
+        """
+        Retourne le temps de prédiction.
+
+        Returns:
+            float: Temps de prédiction en secondes.
+        """
+        return self.__predict_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def structures_prediction(self):
+        """
+        Prédit les structures de toutes les séquences, lot par lot.
+        """
+        start_time=time.time()
+        table=self.__bases_scores.pair_table
+        pad_code=len(Alphabet.rna())
+        structures=[None]*len(self.__rnas)
+        for batch in self.__batches():
+            phases={"encoding":0.0,"fill":0.0,"traceback":0.0,"enumeration":0.0,"structure":0.0}
+            tic=time.perf_counter()
+            width=max(len(self.__rnas[idx].seq) for idx in batch)
+            codes=np.full((len(batch),width),pad_code,dtype=np.uint8)
+            for b,idx in enumerate(batch):
+                rna_codes=self.__rnas[idx].codes
+                codes[b,:len(rna_codes)]=rna_codes
+            phases["encoding"]=time.perf_counter()-tic
+            tic=time.perf_counter()
+            M=Nussinov_kernels.fill_batch(codes,table,self.__minimal_loop_length)
+            phases["fill"]=time.perf_counter()-tic
+            #cases des séquences elles-mêmes, sans le remplissage des lots
+            counters={"cells":0,"split_points":0,"traceback_steps":0,"branches":0,"matrix_bytes":int(M.nbytes)}
+            for idx in batch:
+                for key,value in Nussinov_kernels.fill_counters(len(self.__rnas[idx].seq),self.__minimal_loop_length).items():
+                    counters[key]+=value
+            for b,idx in enumerate(batch):
+                size=len(self.__rnas[idx].seq)
+                tic=time.perf_counter()
+                fold=Nussinov_kernels.traceback_stack(M[b,:size,:size],codes[b,:size],table,self.__minimal_loop_length,counters=counters)
+                phases["traceback"]+=time.perf_counter()-tic
+                tic=time.perf_counter()
+                structures[idx]=Rna_structure(self.__rnas[idx],fold=fold,scores=self.__bases_scores)
+                phases["structure"]+=time.perf_counter()-tic
+            if self.__metrics_hook is not None:
+                self.__metrics_hook({"backend":"batch","length":width,"predictions":len(batch),"phases":phases,"counters":counters})
+        self.__structures=structures
+        self.__predict_time=time.time()-start_time
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    def __batches(self):
+        """
+        Regroupe les indices des séquences par tranche de longueur puis par lot.
+
+        Le nombre de séquences d'un lot est limité par batch_size et par la taille
+        mémoire lot·n²·8 octets de ses matrices.
+
+        Returns:
+            list: Liste de listes d'indices de séquences.
+        """
+        buckets={}
+        for idx,rna in enumerate(self.__rnas):
+            buckets.setdefault(-(-len(rna.seq)//self.__bucket_width),[]).append(idx)
+        batches=[]
+        for key in sorted(buckets):
+            idx_list=buckets[key]
+            width=key*self.__bucket_width
+            size=min(self.__batch_size,max(self.__max_batch_bytes//max(width*width*8,1),1))
+            for start in range(0,len(idx_list),size):
+                batches.append(idx_list[start:start+size])
+        return batches
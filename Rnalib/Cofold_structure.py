@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:41 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Alphabet import Alphabet
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+from .Rna_structure import Rna_structure
+from .Nussinov_kernels import Nussinov_kernels
+import time
+
+class Cofold_structure:
+    """
+    Classe pour prédire la structure d'un dimère formé par deux brins d'ARN.
+
+    Les deux brins sont reliés par un lien de positions qui ne peuvent pas
+    s'apparier, puis la récursion de Nussinov est appliquée sur la séquence
+    obtenue avec les moteurs de Nussinov_kernels. Les codes des bases
+    indiquent leur brin, pour que la pénalité intermoléculaire entre dans une
+    petite table des scores (voir __linked_table). En mode duplex seules les paires intermoléculaires sont
+    recherchées, en O(n·m).
+
+    Attributs:
+        __rna1 (Rna_seq): Premier brin.
+        __rna2 (Rna_seq): Second brin.
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __linker_length (int): Longueur du lien entre les deux brins.
+        __inter_penalty (int): Pénalité retirée au score de chaque paire intermoléculaire.
+        __duplex (bool): Indicateur du mode duplex (paires intermoléculaires uniquement).
+        __bases_scores (Scores): Scores des bases de l'ARN.
+        __matrix (numpy.ndarray): Matrice des scores.
+        __structure (Rna_structure): Structure prédite du dimère.
+        __predict_time (float): Temps de prédiction.
+    """
+    def __init__(self,rnaSeq1: Rna_seq,rnaSeq2: Rna_seq,minloop=3,linker_length=None,inter_penalty=0,duplex=False,bases_scores=None):
+        """
+        Initialise une instance de Cofold_structure et prédit la structure du dimère.
+
+        Args:
+            rnaSeq1 (Rna_seq): Premier brin.
+            rnaSeq2 (Rna_seq): Second brin.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            linker_length (int, optionnel): Longueur du lien entre les brins. Par défaut égale à minloop.
+            inter_penalty (int, optionnel): Pénalité retirée au score de chaque paire intermoléculaire. Par défaut à 0.
+            duplex (bool, optionnel): Ne recherche que les paires intermoléculaires. Par défaut à False.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+
+        Raises:
+            Exception: Si rnaSeq1 ou rnaSeq2 n'est pas un objet Rna_seq ou si bases_scores n'est pas un objet Scores.
+        """
+        for rna in (rnaSeq1,rnaSeq2):
+            if not isinstance(rna,Rna_seq):
+                raise Exception("'{}' n'est pas un objet Rna_seq".format(rna))
+
+        if bases_scores is None:
+            self.__bases_scores=Scores()
+        elif isinstance(bases_scores,Scores):
+            self.__bases_scores=bases_scores
+        else:
+            raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
+
+        self.__rna1=rnaSeq1
+        self.__rna2=rnaSeq2
+        self.__minimal_loop_length=int(minloop)
+        if linker_length is None:
+            linker_length=max(self.__minimal_loop_length,0)
+        self.__linker_length=int(linker_length)
+        self.__inter_penalty=int(inter_penalty)
+        self.__duplex=duplex
+        self.__matrix=None
+        self.__structure=None
+        self.__predict_time=0
+
+        self.structure_prediction()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def rna1(self):
+        """
+        Retourne le premier brin.
+
+        Returns:
+            Rna_seq: Premier brin.
+        """
+        return self.__rna1
+
+    @property
+    def rna2(self):
+        """
+        Retourne le second brin.
+
+        Returns:
+            Rna_seq: Second brin.
+        """
+        return self.__rna2
+
+    @property
+    def matrix(self):
+        """
+        Retourne la matrice des scores.
+
+        En mode complet c'est la matrice de Nussinov de la séquence liée; en mode
+        duplex, D[a,c] est le meilleur score entre les a premières bases du premier
+        brin et les c dernières bases du second.
+
+        Returns:
+            numpy.ndarray: Matrice des scores.
+        """
+        return self.__matrix
+
+    @property
+    def structure(self):
+        """
+        Retourne la structure prédite du dimère.
+
+        Returns:
+            Rna_structure: Structure du dimère, les brins étant séparés par '&'.
+        """
+        return self.__structure
+
+    @property
+    def inter_pairs(self):
+        """
+        Retourne les paires de bases intermoléculaires de la structure.
+
+        Returns:
+            list: Paires (i,j) avec i dans le premier brin et j dans le second, en coordonnées du dimère.
+        """
+        cut=len(self.__rna1.seq)
+        return [(i,j) for i,j in self.__structure.fold if i<cut<=j]
+
+    @property
+    def score(self):
+        """
+        Retourne le score optimal du dimère, pénalité intermoléculaire comprise.
+
+        structure.score donne le score de la même structure sans la pénalité.
+
+        Returns:
+            int: Score pénalisé de la structure.
+        """
+        pairs=self.__bases_scores.pairs
+        seq=self.__structure.rna.seq
+        inter=set(self.inter_pairs)
+        score=0
+        for i,j in self.__structure.fold:
+            value=pairs.get((seq[i],seq[j]),0)
+            if (i,j) in inter:
+                value=max(value-self.__inter_penalty,0)
+            score+=value
+        return score
+
+    @property
+    def scores(self):
+        """
+        Retourne les scores des bases de l'ARN.
+
+        Returns:
+            Scores: Scores des bases de l'ARN.
+        """
+        return self.__bases_scores
+
+    @property
+    def predict_time(self):
+        """
+        Retourne le temps de prédiction.
+
+        Returns:
+            float: Temps de prédiction en secondes.
+        """
+        return self.__predict_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def structure_prediction(self):
+        """
+        Prédit la structure du dimère, en mode complet ou en mode duplex.
+        """
+        start_time=time.time()
+        if self.__duplex:
+            table=np.maximum(self.__bases_scores.pair_table-self.__inter_penalty,0)
+            structures,D=Cofold_structure.__duplex_batch(self.__rna1,[self.__rna2],table,self.__bases_scores)
+            self.__structure=structures[0]
+            self.__matrix=D[0]
+        else:
+            size1=len(self.__rna1.seq)
+            codes,table=self.__linked_table()
+            self.__matrix=Nussinov_kernels.fill(codes,table,self.__minimal_loop_length)
+            fold=Nussinov_kernels.traceback_stack(self.__matrix,codes,table,self.__minimal_loop_length)
+            #Replace les positions du second brin dans les coordonnées du dimère
+            fold=[(i if i<size1 else i-self.__linker_length,j if j<size1 else j-self.__linker_length) for i,j in fold]
+            self.__structure=Rna_structure(Cofold_structure.__dimer_seq(self.__rna1,self.__rna2),fold=fold,scores=self.__bases_scores,cut=size1)
+        self.__predict_time=time.time()-start_time
+
+    @staticmethod
+    def duplex_scan(query: Rna_seq,targets: list,bases_scores=None,inter_penalty=0,batch_size=256):
+        """
+        Prédit le duplex (paires intermoléculaires uniquement) d'un ARN court avec chaque cible.
+
+        Les cibles sont regroupées par lots et la programmation dynamique en O(n·m)
+        est vectorisée sur l'ensemble du lot.
+
+        Args:
+            query (Rna_seq): ARN court (miARN, sARN).
+            targets (list): Liste d'objets Rna_seq cibles.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            inter_penalty (int, optionnel): Pénalité retirée au score de chaque paire. Par défaut à 0.
+            batch_size (int, optionnel): Nombre de cibles traitées simultanément. Par défaut à 256.
+
+        Returns:
+            list: Une Rna_structure par cible, les brins étant séparés par '&'.
+        """
+        if bases_scores is None:
+            bases_scores=Scores()
+        table=np.maximum(bases_scores.pair_table-int(inter_penalty),0)
+        structures=[]
+        for start in range(0,len(targets),batch_size):
+            structures+=Cofold_structure.__duplex_batch(query,targets[start:start+batch_size],table,bases_scores)[0]
+        return structures
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    @staticmethod
+    def __dimer_seq(rnaSeq1: Rna_seq,rnaSeq2: Rna_seq):
+        """
+        Construit la séquence concaténée du dimère.
+
+        Args:
+            rnaSeq1 (Rna_seq): Premier brin.
+            rnaSeq2 (Rna_seq): Second brin.
+
+        Returns:
+            Rna_seq: Séquence des deux brins, d'identifiant 'id1&id2'.
+        """
+        return Rna_seq("{}&{}".format(rnaSeq1.id,rnaSeq2.id),rnaSeq1.seq+rnaSeq2.seq)
+
+    @staticmethod
+    def __duplex_batch(query: Rna_seq,batch: list,table,bases_scores):
+        """
+        Prédit les duplex d'un lot de cibles.
+
+        Args:
+            query (Rna_seq): ARN court.
+            batch (list): Liste d'objets Rna_seq cibles.
+            table (numpy.ndarray): Table des scores d'appariement, pénalité déduite.
+            bases_scores (Scores): Scores des bases de l'ARN.
+
+        Returns:
+            tuple: Liste des Rna_structure du lot et matrices duplex de taille (lot, n+1, m+1).
+        """
+        qcodes=query.codes
+        nq=len(qcodes)
+        lengths=[len(t.seq) for t in batch]
+        #Les cibles sont lues de 3' en 5' et complétées par des positions non appariables
+        tcodes=np.full((len(batch),max(lengths)),len(Alphabet.rna()),dtype=np.uint8)
+        for b,t in enumerate(batch):
+            tcodes[b,:lengths[b]]=t.codes[::-1]
+        D=Cofold_structure.__fill_duplex(qcodes,tcodes,table)
+        structures=[]
+        for b,t in enumerate(batch):
+            fold=Cofold_structure.__traceback_duplex(D[b],nq,lengths[b])
+            rna=Cofold_structure.__dimer_seq(query,t)
+            structures.append(Rna_structure(rna,fold=fold,scores=bases_scores,cut=nq))
+        return structures,D
+
+    @staticmethod
+    def __fill_duplex(qcodes,tcodes,table):
+        """
+        Remplit les matrices duplex d'un lot de cibles.
+
+        D[b,a,c] est le meilleur score d'appariement entre les a premières bases
+        de la requête et les c dernières bases de la cible b.
+
+        Args:
+            qcodes (numpy.ndarray): Codes de la requête.
+            tcodes (numpy.ndarray): Codes des cibles retournées, de taille (lot, m).
+            table (numpy.ndarray): Table des scores d'appariement.
+
+        Returns:
+            numpy.ndarray: Matrices duplex de taille (lot, n+1, m+1).
+        """
+        batch,m=tcodes.shape
+        D=np.zeros((batch,len(qcodes)+1,m+1),dtype=np.int64)
+        for a in range(1,len(qcodes)+1):
+            pairs=table[qcodes[a-1],tcodes]
+            X=np.maximum(D[:,a-1,1:],D[:,a-1,:-1]+pairs)
+            D[:,a,1:]=np.maximum.accumulate(X,axis=1)
+        return D
+
+    @staticmethod
+    def __traceback_duplex(D,nq,nt):
+        """
+        Effectue le traceback d'une matrice duplex.
+
+        Args:
+            D (numpy.ndarray): Matrice duplex d'une cible.
+            nq (int): Longueur de la requête.
+            nt (int): Longueur de la cible.
+
+        Returns:
+            list: Paires intermoléculaires en coordonnées du dimère.
+        """
+        fold=[]
+        a,c=nq,nt
+        while a>0 and c>0:
+            if D[a,c]==D[a,c-1]:
+                c-=1
+            elif D[a,c]==D[a-1,c]:
+                a-=1
+            else:
+                fold.append((a-1,nq+nt-c))
+                a-=1
+                c-=1
+        return fold
+
+    def __linked_table(self):
+        """
+        Construit les codes et la table d'appariement de la séquence liée.
+
+        Les codes indiquent le brin: les bases du premier brin gardent leurs
+        codes (0 à 4), celles du second sont décalées de 5 (5 à 9) et le lien
+        reçoit le code 10, qui ne s'apparie pas. La table 11x11 reprend les
+        scores d'appariement à l'intérieur de chaque brin et les diminue de la
+        pénalité entre les deux brins.
+
+        Returns:
+            tuple: Codes (numpy.ndarray) et table (numpy.ndarray) de la séquence liée.
+        """
+        pair_table=self.__bases_scores.pair_table
+        width=len(pair_table)
+        linker=np.full(self.__linker_length,2*width,dtype=np.int64)
+        codes=np.concatenate((self.__rna1.codes.astype(np.int64),linker,self.__rna2.codes.astype(np.int64)+width))
+        table=np.zeros((2*width+1,2*width+1),dtype=pair_table.dtype)
+        inter=np.maximum(pair_table-self.__inter_penalty,0)
+        table[:width,:width]=pair_table
+        table[width:2*width,width:2*width]=pair_table
+        table[:width,width:2*width]=inter
+        table[width:2*width,:width]=inter
+        return codes,table
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:41:15 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Nussinov_kernels import Nussinov_kernels
+import hashlib
+import json
+import os
+import time
+
+class Disk_matrix:
+    """
+    Classe représentant une matrice de Nussinov stockée sur disque.
+
+    Seul le triangle supérieur est conservé, compacté colonne par colonne dans
+    un np.memmap: la case (i,j), i<=j, est rangée à l'indice j*(j+1)/2+i. Le
+    remplissage se fait en place, colonne par colonne, et un point de reprise
+    (fichier '<matrice>.ckpt.json') enregistre régulièrement la dernière
+    colonne terminée. Une nouvelle instance ouverte sur le même fichier, pour
+    la même séquence et les mêmes paramètres, reprend après cette colonne.
+
+    Attributs:
+        __filename (str): Chemin du fichier de la matrice.
+        __codes (numpy.ndarray): Codes de la séquence.
+        __table (numpy.ndarray): Table des scores d'appariement.
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __checkpoint_every (float): Intervalle en secondes entre deux points de reprise.
+        __digest (str): Empreinte de la séquence et des paramètres.
+        __last_column (int): Dernière colonne entièrement remplie.
+        __data (numpy.memmap): Matrice compactée.
+    """
+    def __init__(self,filename: str,codes,table,minimal_loop_length=3,checkpoint_every=30.0):
+        """
+        Ouvre ou crée la matrice sur disque.
+
+        Args:
+            filename (str): Chemin du fichier de la matrice.
+            codes (numpy.ndarray): Codes de la séquence (Alphabet.encode_rna).
+            table (numpy.ndarray): Table des scores d'appariement (Scores.pair_table).
+            minimal_loop_length (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            checkpoint_every (float, optionnel): Intervalle en secondes entre deux points de reprise. Par défaut à 30.
+        """
+        self.__filename=filename
+        self.__codes=np.ascontiguousarray(codes)
+        self.__table=np.asarray(table)
+        self.__minimal_loop_length=int(minimal_loop_length)
+        self.__checkpoint_every=checkpoint_every
+        size=len(self.__codes)
+        dtype=np.int32 if size//2*max(int(self.__table.max()),0)<np.iinfo(np.int32).max else np.int64
+        digest=hashlib.sha1()
+        digest.update(self.__codes.astype(np.uint8).tobytes())
+        digest.update(self.__table.astype(np.int64).tobytes())
+        digest.update(str(self.__minimal_loop_length).encode())
+        self.__digest=digest.hexdigest()
+
+        checkpoint=self.__read_checkpoint()
+        cells=max(size*(size+1)//2,1)
+        if checkpoint is not None and checkpoint.get("digest")==self.__digest and os.path.exists(filename):
+            self.__data=np.memmap(filename,dtype=checkpoint["dtype"],mode="r+",shape=(cells,))
+            self.__last_column=int(checkpoint["last_column"])
+        else:
+            self.__data=np.memmap(filename,dtype=dtype,mode="w+",shape=(cells,))
+            self.__last_column=0
+            self.checkpoint()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def filename(self):
+        """
+        Retourne le chemin du fichier de la matrice.
+
+        Returns:
+            str: Chemin du fichier.
+        """
+        return self.__filename
+
+    @property
+    def checkpoint_file(self):
+        """
+        Retourne le chemin du point de reprise.
+
+        Returns:
+            str: Chemin du fichier JSON du point de reprise.
+        """
+        return self.__filename+".ckpt.json"
+
+    @property
+    def size(self):
+        """
+        Retourne la longueur de la séquence.
+
+        Returns:
+            int: Nombre de lignes et de colonnes de la matrice.
+        """
+        return len(self.__codes)
+
+    @property
+    def last_column(self):
+        """
+        Retourne la dernière colonne entièrement remplie.
+
+        Returns:
+            int: Indice de la colonne.
+        """
+        return self.__last_column
+
+    @property
+    def complete(self):
+        """
+        Indique si la matrice est entièrement remplie.
+
+        Returns:
+            bool: True si toutes les colonnes sont remplies.
+        """
+        return self.__last_column>=self.size-1
+
+    @property
+    def data(self):
+        """
+        Retourne la matrice compactée.
+
+        Returns:
+            numpy.memmap: Triangle supérieur compacté par colonnes.
+        """
+        return self.__data
+
+    @property
+    def nbytes(self):
+        """
+        Retourne la taille du fichier de la matrice.
+
+        Returns:
+            int: Taille en octets.
+        """
+        return int(self.__data.nbytes)
+
+    #===================
+    #Méthodes magiques
+    #===================
+
+    def __len__(self):
+        """
+        Retourne la longueur de la séquence.
+
+        Returns:
+            int: Nombre de lignes de la matrice.
+        """
+        return self.size
+
+    def __array__(self,dtype=None,copy=None):
+        """
+        Retourne la matrice complète en mémoire (np.asarray).
+
+        Returns:
+            numpy.ndarray: Matrice carrée (0 sous la diagonale).
+        """
+        M=self.to_array()
+        return M if dtype is None else M.astype(dtype)
+
+    def __getitem__(self,index):
+        """
+        Retourne une case (M[i,j]) ou une ligne (M[i]) de la matrice.
+
+        Args:
+            index (int ou tuple): Indice de ligne, ou couple (i,j).
+
+        Returns:
+            int ou numpy.ndarray: Score de la case, ou ligne complète (0 sous la diagonale).
+        """
+        if isinstance(index,tuple):
+            i,j=index
+            return int(self.__data[j*(j+1)//2+i]) if i<=j else 0
+        js=np.arange(index,self.size)
+        row=np.zeros(self.size,dtype=self.__data.dtype)
+        row[index:]=self.__data[js*(js+1)//2+index]
+        return row
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def fill(self,progress=None):
+        """
+        Remplit les colonnes restantes, en enregistrant régulièrement un point de reprise.
+
+        Si le remplissage est interrompu (par exemple par une exception levée par
+        progress), les colonnes terminées sont écrites sur disque avec leur point de reprise.
+
+        Args:
+            progress (callable, optionnel): Rappel progress(fraction) appelé après chaque colonne. Par défaut à None.
+        """
+        if self.complete:
+            return
+        last_save=[time.perf_counter()]
+        def column_done(j):
+            self.__last_column=j
+            if time.perf_counter()-last_save[0]>=self.__checkpoint_every:
+                self.checkpoint()
+                last_save[0]=time.perf_counter()
+            if progress is not None:
+                progress((j+1)/self.size)
+        try:
+            Nussinov_kernels.fill_packed(self.__data,self.__codes,self.__table,self.__minimal_loop_length,
+                                         self.__last_column+1,self.size,progress=column_done)
+            self.__last_column=max(self.size-1,0)
+        finally:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Écrit la matrice sur disque puis le point de reprise (remplacé de façon atomique).
+        """
+        self.__data.flush()
+        infos={"digest":self.__digest,"size":self.size,"minloop":self.__minimal_loop_length,
+               "dtype":np.dtype(self.__data.dtype).name,"last_column":self.__last_column}
+        tmp=self.checkpoint_file+".tmp"
+        with open(tmp,"w") as out:
+            json.dump(infos,out)
+        os.replace(tmp,self.checkpoint_file)
+
+    def traceback(self,counters=None):
+        """
+        Effectue le traceback directement sur le fichier de la matrice.
+
+        Args:
+            counters (dict, optionnel): Compteurs où ajouter le nombre de cases visitées. Par défaut à None.
+
+        Returns:
+            list: Liste des appariements optimaux.
+
+        Raises:
+            Exception: Si la matrice n'est pas entièrement remplie.
+        """
+        if not self.complete:
+            raise Exception("la matrice '{}' n'est remplie que jusqu'à la colonne {}".format(self.__filename,self.__last_column))
+        return Nussinov_kernels.traceback_packed(self.__data,self.__codes,self.__table,self.__minimal_loop_length,counters=counters)
+
+    def rows(self):
+        """
+        Retourne un accès case par case à la matrice, sous la forme M[i][j].
+
+        M[i] ne lit rien: seule la case demandée par M[i][j] est lue dans le
+        fichier, contrairement à M[i] qui construit une ligne complète. C'est
+        l'accès des tracebacks écrits pour une liste de listes (récursif,
+        énumération des structures optimales).
+
+        Returns:
+            _Packed_rows: Lignes de la matrice.
+        """
+        return _Packed_rows(self.__data)
+
+    def to_array(self):
+        """
+        Retourne la matrice complète en mémoire.
+
+        Returns:
+            numpy.ndarray: Matrice carrée (0 sous la diagonale).
+        """
+        size=self.size
+        M=np.zeros((size,size),dtype=self.__data.dtype)
+        for j in range(size):
+            M[:j+1,j]=self.__data[j*(j+1)//2:j*(j+1)//2+j+1]
+        return M
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    def __read_checkpoint(self):
+        """
+        Lit le point de reprise s'il existe.
+
+        Returns:
+            dict: Contenu du point de reprise, ou None.
+        """
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file) as infile:
+                return json.load(infile)
+        except ValueError:
+            return None
+
+
+class _Packed_rows:
+    """
+    Lignes d'un triangle supérieur compacté par colonnes, lues case par case.
+
+    Attributs:
+        __data (numpy.ndarray): Triangle supérieur compacté (case (i,j) à l'indice j*(j+1)/2+i).
+    """
+    __slots__=("__data",)
+
+    def __init__(self,data):
+        """
+        Initialise l'accès aux lignes.
+
+        Args:
+            data (numpy.ndarray): Triangle supérieur compacté par colonnes.
+        """
+        #vue ndarray: l'indexation d'un np.memmap est nettement plus lente
+        self.__data=data.view(np.ndarray)
+
+    def __getitem__(self,i):
+        """
+        Retourne la ligne i.
+
+        Args:
+            i (int): Indice de ligne.
+
+        Returns:
+            _Packed_row: Ligne i.
+        """
+        return _Packed_row(self.__data,i)
+
+class _Packed_row:
+    """
+    Ligne d'un triangle supérieur compacté par colonnes.
+
+    Attributs:
+        __data (numpy.ndarray): Triangle supérieur compacté.
+        __i (int): Indice de la ligne.
+    """
+    __slots__=("__data","__i")
+
+    def __init__(self,data,i):
+        """
+        Initialise la ligne.
+
+        Args:
+            data (numpy.ndarray): Triangle supérieur compacté.
+            i (int): Indice de la ligne.
+        """
+        self.__data=data
+        self.__i=i
+
+    def __getitem__(self,j):
+        """
+        Retourne la case (i,j).
+
+        Args:
+            j (int): Indice de colonne.
+
+        Returns:
+            int: Score de la case (0 sous la diagonale).
+        """
+        i=self.__i
+        return int(self.__data[j*(j+1)//2+i]) if i<=j else 0
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:12:37 2026
+
+@author: Mathieu Genete
+"""
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+import asyncio
+import collections
+import json
+import os
+import signal
+import socket
+import threading
+import time
+
+class Fold_service:
+    """
+    Service local de prédiction de structures (asyncio, socket Unix ou TCP).
+
+    Les requêtes sont des lignes JSON, une par requête, et reçoivent chacune une
+    ligne JSON en réponse (dans l'ordre d'achèvement, avec le 'tag' de la requête):
+
+        {"op": "fold", "tag": 1, "id": "a", "seq": "GGGAAAUCCC", "minloop": 3,
+         "scores": {"GC": 3, "AU": 2, "GU": 1}, "timeout": 2.0}
+        {"op": "metrics"}
+        {"op": "ping"}
+
+    Les prédictions sont faites par des processus gardés chauds (modules importés
+    et fonctions numba compilées au démarrage). Les séquences courtes reçues dans
+    la même fenêtre de batch_window secondes, avec les mêmes paramètres, sont
+    regroupées et prédites ensemble par Batch_predict; les séquences longues le
+    sont seules par Predict_structure.
+
+    Attributs:
+        __socket_path (str): Chemin du socket Unix, ou None pour TCP.
+        __host (str): Adresse d'écoute TCP.
+        __port (int): Port d'écoute TCP (0 pour un port libre).
+        __workers (int): Nombre de processus de prédiction.
+        __batch_max_length (int): Longueur maximale des séquences regroupées.
+        __batch_window (float): Durée d'attente avant l'envoi d'un lot, en secondes.
+        __max_batch (int): Nombre maximal de séquences par lot.
+        __timeout (float): Durée maximale d'une requête par défaut, en secondes.
+        __pool (concurrent.futures.ProcessPoolExecutor): Processus de prédiction.
+        __server (asyncio.AbstractServer): Serveur asyncio.
+        __loop (asyncio.AbstractEventLoop): Boucle du service.
+        __thread (threading.Thread): Fil d'exécution du service lancé par start().
+        __pending (dict): Requêtes courtes en attente, par paramètres.
+        __timers (dict): Envois de lots programmés, par paramètres.
+        __counts (dict): Compteurs du service.
+        __latencies (collections.deque): Durées des dernières requêtes.
+    """
+    def __init__(self,socket_path=None,host="127.0.0.1",port=0,workers=None,batch_max_length=1000,batch_window=0.005,max_batch=256,timeout=None,latency_window=1000):
+        """
+        Initialise le service sans le démarrer.
+
+        Args:
+            socket_path (str, optionnel): Chemin du socket Unix. Par défaut à None (TCP sur host:port).
+            host (str, optionnel): Adresse d'écoute TCP. Par défaut à '127.0.0.1'.
+            port (int, optionnel): Port d'écoute TCP, 0 pour un port libre. Par défaut à 0.
+            workers (int, optionnel): Nombre de processus de prédiction. Par défaut au nombre de cœurs.
+            batch_max_length (int, optionnel): Longueur au-delà de laquelle une séquence est prédite seule. Par défaut à 1000.
+            batch_window (float, optionnel): Durée d'attente des autres requêtes avant l'envoi d'un lot, en secondes. Par défaut à 0.005.
+            max_batch (int, optionnel): Nombre de séquences à partir duquel un lot est envoyé sans attendre. Par défaut à 256.
+            timeout (float, optionnel): Durée maximale d'une requête sans 'timeout', en secondes. Par défaut à None.
+            latency_window (int, optionnel): Nombre de requêtes récentes utilisées pour les latences. Par défaut à 1000.
+        """
+        self.__socket_path=socket_path
+        self.__host=host
+        self.__port=port
+        self.__workers=workers or os.cpu_count() or 1
+        self.__batch_max_length=int(batch_max_length)
+        self.__batch_window=float(batch_window)
+        self.__max_batch=max(int(max_batch),1)
+        self.__timeout=timeout
+        self.__pool=None
+        self.__server=None
+        self.__loop=None
+        self.__thread=None
+        self.__pending={}
+        self.__timers={}
+        self.__counts={"requests":0,"completed":0,"timeouts":0,"errors":0,"batches":0,"batched_requests":0,"single_requests":0,"in_flight":0}
+        self.__latencies=collections.deque(maxlen=latency_window)
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def address(self):
+        """
+        Retourne l'adresse d'écoute du service démarré.
+
+        Returns:
+            str ou tuple: Chemin du socket Unix, ou couple (hôte, port).
+        """
+        if self.__socket_path is not None:
+            return self.__socket_path
+        return (self.__host,self.__port)
+
+    @property
+    def metrics(self):
+        """
+        Retourne les métriques du service.
+
+        Returns:
+            dict: 'queue_depth' (requêtes en attente d'un lot), 'in_flight' (requêtes en cours de prédiction),
+                les compteurs 'requests', 'completed', 'timeouts', 'errors', 'batches', 'batched_requests',
+                'single_requests', le nombre de processus 'workers' et les latences 'latency'
+                ('count', 'mean', 'p50', 'p95', 'max', en secondes) des dernières requêtes.
+        """
+        latencies=sorted(self.__latencies)
+        count=len(latencies)
+        latency={"count":count,"mean":sum(latencies)/count if count else 0.0,
+                 "p50":latencies[count//2] if count else 0.0,
+                 "p95":latencies[min(int(count*0.95),count-1)] if count else 0.0,
+                 "max":latencies[-1] if count else 0.0}
+        metrics=dict(self.__counts)
+        metrics["queue_depth"]=sum(len(v) for v in self.__pending.values())
+        metrics["workers"]=self.__workers
+        metrics["latency"]=latency
+        return metrics
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    async def serve(self,ready=None):
+        """
+        Démarre les processus et le serveur, puis répond aux requêtes jusqu'à l'annulation.
+
+        Args:
+            ready (callable, optionnel): Fonction appelée sans argument quand le service écoute. Par défaut à None.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        self.__loop=asyncio.get_running_loop()
+        self.__pool=ProcessPoolExecutor(self.__workers,initializer=Fold_service.warm_worker)
+        try:
+            #attend que chaque processus soit chaud avant d'accepter des requêtes
+            await asyncio.gather(*[self.__loop.run_in_executor(self.__pool,os.getpid) for _ in range(self.__workers)])
+            if self.__socket_path is not None:
+                if os.path.exists(self.__socket_path):
+                    os.unlink(self.__socket_path)
+                self.__server=await asyncio.start_unix_server(self.__handle,path=self.__socket_path)
+            else:
+                self.__server=await asyncio.start_server(self.__handle,self.__host,self.__port)
+                self.__port=self.__server.sockets[0].getsockname()[1]
+            if threading.current_thread() is threading.main_thread():
+                #arrêt propre (socket supprimé, processus terminés) sur SIGTERM
+                self.__loop.add_signal_handler(signal.SIGTERM,self.__server.close)
+            if ready is not None:
+                ready()
+            await self.__server.serve_forever()
+        finally:
+            if self.__server is not None:
+                self.__server.close()
+            for timer in self.__timers.values():
+                timer.cancel()
+            self.__pool.shutdown(cancel_futures=True)
+            if self.__socket_path is not None and os.path.exists(self.__socket_path):
+                os.unlink(self.__socket_path)
+
+    def start(self):
+        """
+        Lance le service dans un fil d'exécution séparé et attend qu'il écoute.
+
+        Returns:
+            str ou tuple: Adresse d'écoute du service.
+
+        Raises:
+            Exception: Si le service est déjà lancé ou ne démarre pas.
+        """
+        if self.__thread is not None:
+            raise Exception("le service est déjà lancé")
+        started=threading.Event()
+        errors=[]
+        def run():
+            try:
+                asyncio.run(self.serve(started.set))
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                started.set()
+        self.__thread=threading.Thread(target=run,name="Fold_service",daemon=True)
+        self.__thread.start()
+        started.wait()
+        if errors:
+            self.__thread=None
+            raise Exception("le service n'a pas démarré: {}".format(errors[0]))
+        return self.address
+
+    def close(self):
+        """
+        Arrête le service lancé par start() et ses processus.
+        """
+        if self.__thread is None:
+            return
+        if self.__server is not None:
+            self.__loop.call_soon_threadsafe(self.__server.close)
+        self.__thread.join()
+        self.__thread=None
+
+    @staticmethod
+    def warm_worker():
+        """
+        Prépare un processus de prédiction: importe les moteurs et compile les fonctions numba.
+        """
+        from .Batch_predict import Batch_predict
+        from .Predict_structure import Predict_structure
+        rna=Rna_seq("warm","GGGAAAUCCCGGGAAAUCCC")
+        Predict_structure(rna,3,skipPredAll=True)
+        Batch_predict([rna],3)
+
+    @staticmethod
+    def fold_batch(records,minloop,scores):
+        """
+        Prédit ensemble les structures de séquences courtes (dans un processus de prédiction).
+
+        Args:
+            records (list): Couples (identifiant, séquence).
+            minloop (int): Longueur minimale de la boucle.
+            scores (tuple): Scores (GC, AU, GU).
+
+        Returns:
+            list: Couples (structure dot-bracket, score) dans l'ordre des séquences, ou le message d'erreur
+                d'une séquence invalide.
+        """
+        from .Batch_predict import Batch_predict
+        rnas=[]
+        results=[None]*len(records)
+        for k,(seqid,seq) in enumerate(records):
+            try:
+                rnas.append((k,Rna_seq(seqid,seq)))
+            except Exception as e:
+                results[k]=str(e)
+        batch=Batch_predict([rna for _,rna in rnas],minloop,bases_scores=Scores(*scores))
+        for (k,_),st in zip(rnas,batch.structures):
+            results[k]=(st.dotpar,st.score)
+        return results
+
+    @staticmethod
+    def fold_single(seqid,seq,minloop,scores,timeout):
+        """
+        Prédit la structure d'une séquence longue (dans un processus de prédiction).
+
+        Args:
+            seqid (str): Identifiant de la séquence.
+            seq (str): Séquence d'ARN.
+            minloop (int): Longueur minimale de la boucle.
+            scores (tuple): Scores (GC, AU, GU).
+            timeout (float): Durée maximale du remplissage, ou None.
+
+        Returns:
+            tuple: (structure dot-bracket, score).
+        """
+        from .Predict_structure import Predict_structure
+        st=Predict_structure(Rna_seq(seqid,seq),minloop,skipPredAll=True,bases_scores=Scores(*scores),timeout=timeout).structure
+        return st.dotpar,st.score
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    async def __handle(self,reader,writer):
+        """
+        Lit les requêtes d'une connexion et répond à chacune dès qu'elle est traitée.
+
+        Args:
+            reader (asyncio.StreamReader): Flux de lecture de la connexion.
+            writer (asyncio.StreamWriter): Flux d'écriture de la connexion.
+        """
+        tasks=set()
+        lock=asyncio.Lock()
+        async def answer(line):
+            response=await self.__request(line)
+            async with lock:
+                writer.write((json.dumps(response)+"\n").encode())
+                await writer.drain()
+        try:
+            while True:
+                line=await reader.readline()
+                if not line:
+                    break
+                task=asyncio.ensure_future(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks,return_exceptions=True)
+        except (ConnectionError,asyncio.CancelledError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def __request(self,line):
+        """
+        Traite une requête.
+
+        Args:
+            line (bytes): Ligne JSON de la requête.
+
+        Returns:
+            dict: Réponse, avec 'ok' et le 'tag' de la requête.
+        """
+        try:
+            request=json.loads(line)
+        except ValueError:
+            return {"ok":False,"error":"requête JSON invalide"}
+        tag=request.get("tag")
+        op=request.get("op","fold")
+        if op=="ping":
+            return {"ok":True,"tag":tag}
+        if op=="metrics":
+            return {"ok":True,"tag":tag,"metrics":self.metrics}
+        if op!="fold":
+            return {"ok":False,"tag":tag,"error":"opération '{}' inconnue".format(op)}
+
+        start=time.perf_counter()
+        self.__counts["requests"]+=1
+        try:
+            seqid=str(request.get("id","seq"))
+            seq=str(request["seq"]).upper()
+            minloop=int(request.get("minloop",3))
+            scores=request.get("scores") or {}
+            scores=(int(scores.get("GC",3)),int(scores.get("AU",2)),int(scores.get("GU",1)))
+            timeout=request.get("timeout",self.__timeout)
+            if len(seq)<=self.__batch_max_length:
+                future=self.__enqueue(seqid,seq,minloop,scores)
+            else:
+                self.__counts["single_requests"]+=1
+                future=self.__dispatch(Fold_service.fold_single,seqid,seq,minloop,scores,timeout)
+            #le résultat d'une requête abandonnée est lu pour ne pas être signalé comme perdu
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            result=await asyncio.wait_for(asyncio.shield(future),timeout)
+            if isinstance(result,str):
+                raise Exception(result)
+            dotpar,score=result
+            response={"ok":True,"tag":tag,"id":seqid,"seq":seq,"dotpar":dotpar,"score":score}
+            self.__counts["completed"]+=1
+        except (asyncio.TimeoutError,TimeoutError):
+            self.__counts["timeouts"]+=1
+            response={"ok":False,"tag":tag,"error":"temps limite de {}s dépassé".format(timeout)}
+        except Exception as e:
+            self.__counts["errors"]+=1
+            response={"ok":False,"tag":tag,"error":str(e) or type(e).__name__}
+        self.__latencies.append(time.perf_counter()-start)
+        return response
+
+    def __enqueue(self,seqid,seq,minloop,scores):
+        """
+        Ajoute une séquence courte au prochain lot de mêmes paramètres.
+
+        Args:
+            seqid (str): Identifiant de la séquence.
+            seq (str): Séquence d'ARN.
+            minloop (int): Longueur minimale de la boucle.
+            scores (tuple): Scores (GC, AU, GU).
+
+        Returns:
+            asyncio.Future: Résultat de la séquence dans le lot.
+        """
+        key=(minloop,scores)
+        future=self.__loop.create_future()
+        self.__pending.setdefault(key,[]).append((seqid,seq,future))
+        if len(self.__pending[key])>=self.__max_batch:
+            self.__flush(key)
+        elif key not in self.__timers:
+            self.__timers[key]=self.__loop.call_later(self.__batch_window,self.__flush,key)
+        return future
+
+    def __flush(self,key):
+        """
+        Envoie le lot en attente pour des paramètres donnés à un processus de prédiction.
+
+        Args:
+            key (tuple): Paramètres (minloop, scores) du lot.
+        """
+        timer=self.__timers.pop(key,None)
+        if timer is not None:
+            timer.cancel()
+        batch=self.__pending.pop(key,[])
+        if not batch:
+            return
+        self.__counts["batches"]+=1
+        self.__counts["batched_requests"]+=len(batch)
+        done=self.__dispatch(Fold_service.fold_batch,[(seqid,seq) for seqid,seq,_ in batch],*key)
+        def resolve(done):
+            for k,(_,_,future) in enumerate(batch):
+                if future.done():
+                    continue
+                if done.exception() is not None:
+                    future.set_exception(done.exception())
+                else:
+                    future.set_result(done.result()[k])
+        done.add_done_callback(resolve)
+
+    def __dispatch(self,func,*args):
+        """
+        Exécute une fonction dans un processus de prédiction en comptant les requêtes en cours.
+
+        Args:
+            func (callable): Fonction à exécuter.
+            *args: Arguments de la fonction.
+
+        Returns:
+            asyncio.Future: Résultat de la fonction.
+        """
+        requests=len(args[0]) if func is Fold_service.fold_batch else 1
+        self.__counts["in_flight"]+=requests
+        future=self.__loop.run_in_executor(self.__pool,func,*args)
+        def finished(_):
+            self.__counts["in_flight"]-=requests
+        future.add_done_callback(finished)
+        return future
+
+class Fold_client:
+    """
+    Client bloquant du service Fold_service.
+
+    Attributs:
+        __address (str ou tuple): Chemin du socket Unix ou couple (hôte, port).
+        __timeout (float): Durée maximale d'attente d'une réponse, en secondes.
+        __socket (socket.socket): Connexion au service.
+        __reader (file): Flux de lecture des réponses.
+        __tag (int): Dernier numéro de requête.
+    """
+    def __init__(self,address,timeout=None):
+        """
+        Ouvre une connexion au service.
+
+        Args:
+            address (str ou tuple): Chemin du socket Unix ou couple (hôte, port) (Fold_service.address).
+            timeout (float, optionnel): Durée maximale d'attente d'une réponse, en secondes. Par défaut à None.
+        """
+        self.__address=address
+        self.__timeout=timeout
+        if isinstance(address,str):
+            self.__socket=socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        else:
+            self.__socket=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+            address=tuple(address)
+        self.__socket.settimeout(timeout)
+        self.__socket.connect(address)
+        self.__reader=self.__socket.makefile("rb")
+        self.__tag=0
+
+    #===================
+    #Méthodes magiques
+    #===================
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def fold(self,seq,seqid="seq",minloop=3,scores=None,timeout=None):
+        """
+        Prédit la structure d'une séquence.
+
+        Args:
+            seq (str): Séquence d'ARN.
+            seqid (str, optionnel): Identifiant de la séquence. Par défaut à 'seq'.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            scores (Scores, optionnel): Scores des paires. Par défaut à None (scores du service).
+            timeout (float, optionnel): Durée maximale de la requête côté service, en secondes. Par défaut à None.
+
+        Returns:
+            dict: Réponse du service ('ok', 'id', 'seq', 'dotpar', 'score', ou 'error').
+        """
+        return self.fold_many([seq],[seqid],minloop,scores,timeout)[0]
+
+    def fold_many(self,seqs,seqids=None,minloop=3,scores=None,timeout=None):
+        """
+        Envoie plusieurs séquences sans attendre les réponses, pour qu'elles soient regroupées par le service.
+
+        Args:
+            seqs (list): Séquences d'ARN.
+            seqids (list, optionnel): Identifiants des séquences. Par défaut à None ('seq0', 'seq1', ...).
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            scores (Scores, optionnel): Scores des paires. Par défaut à None (scores du service).
+            timeout (float, optionnel): Durée maximale de chaque requête côté service, en secondes. Par défaut à None.
+
+        Returns:
+            list: Réponses du service, dans l'ordre des séquences.
+        """
+        if seqids is None:
+            seqids=["seq{}".format(k) for k in range(len(seqs))]
+        requests=[]
+        for seqid,seq in zip(seqids,seqs):
+            request={"op":"fold","id":seqid,"seq":seq,"minloop":minloop}
+            if scores is not None:
+                request["scores"]={"GC":scores.pairs.get(("G","C"),0),"AU":scores.pairs.get(("A","U"),0),"GU":scores.pairs.get(("G","U"),0)}
+            if timeout is not None:
+                request["timeout"]=timeout
+            requests.append(request)
+        return self.__send(requests)
+
+    def metrics(self):
+        """
+        Retourne les métriques du service.
+
+        Returns:
+            dict: Métriques (voir Fold_service.metrics).
+        """
+        return self.__send([{"op":"metrics"}])[0]["metrics"]
+
+    def close(self):
+        """
+        Ferme la connexion.
+        """
+        self.__reader.close()
+        self.__socket.close()
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    def __send(self,requests):
+        """
+        Envoie des requêtes et attend toutes leurs réponses.
+
+        Args:
+            requests (list): Requêtes (dictionnaires).
+
+        Returns:
+            list: Réponses, dans l'ordre des requêtes.
+
+        Raises:
+            Exception: Si le service ferme la connexion.
+        """
+        tags=[]
+        lines=[]
+        for request in requests:
+            self.__tag+=1
+            request["tag"]=self.__tag
+            tags.append(self.__tag)
+            lines.append(json.dumps(request)+"\n")
+        self.__socket.sendall("".join(lines).encode())
+        responses={}
+        while len(responses)<len(tags):
+            line=self.__reader.readline()
+            if not line:
+                raise Exception("connexion fermée par le service")
+            response=json.loads(line)
+            responses[response.get("tag")]=response
+        return [responses[tag] for tag in tags]
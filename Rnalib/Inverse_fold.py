@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 18:32:44 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Alphabet import Alphabet
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+from .Rna_structure import Rna_structure
+from .Nussinov_kernels import Nussinov_kernels
+from concurrent.futures import ProcessPoolExecutor
+import random
+import time
+
+class Inverse_fold:
+    """
+    Classe cherchant des séquences dont la structure prédite est une structure cible.
+
+    Chaque départ est une marche adaptative: la séquence initiale place sur
+    chaque paire de la cible une paire de Scores.allowed_bp, puis chaque étape
+    mute une base non appariée ou remplace une paire de la cible par une autre
+    paire autorisée, de préférence aux positions mal repliées. Une mutation est
+    conservée si elle ne dégrade pas le coût (distance en paires entre la
+    structure prédite et la cible, puis écart entre le score optimal et celui
+    de la cible), sinon elle est annulée.
+
+    Après une mutation des positions lo à hi, seules les cases (i,j) avec
+    i<=hi et j>=lo sont recalculées (Nussinov_kernels.refill); la partie
+    modifiée de la matrice est sauvegardée pour être restaurée si la mutation
+    est rejetée. La structure prédite est celle du traceback de
+    Predict_structure.
+
+    Attributs:
+        __target (str): Structure cible en notation dot-bracket.
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __bases_scores (Scores): Scores des bases de l'ARN.
+        __starts (int): Nombre de départs indépendants.
+        __seed (int): Graine du générateur aléatoire.
+        __time_budget (float): Temps maximal en secondes.
+        __max_steps (int): Nombre maximal de mutations par départ.
+        __workers (int): Nombre de processus.
+        __backend (str): Moteur de remplissage de Nussinov_kernels.
+        __designs (list): Résultats des départs, du meilleur au moins bon.
+        __design_time (float): Temps du calcul.
+    """
+    def __init__(self,target: str,minloop=3,bases_scores=None,starts=1,seed=None,time_budget=None,max_steps=10000,workers=None,backend="auto"):
+        """
+        Initialise une instance de Inverse_fold et lance la recherche.
+
+        Args:
+            target (str): Structure cible en notation dot-bracket.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            starts (int, optionnel): Nombre de départs indépendants. Par défaut à 1.
+            seed (int, optionnel): Graine du générateur aléatoire; chaque départ en dérive la sienne. Par défaut à None.
+            time_budget (float, optionnel): Temps maximal en secondes pour l'ensemble des départs. Par défaut à None.
+            max_steps (int, optionnel): Nombre maximal de mutations par départ. Par défaut à 10000.
+            workers (int, optionnel): Nombre de processus répartissant les départs. Par défaut à None (aucun).
+            backend (str, optionnel): 'auto', 'numpy' ou 'numba'. Par défaut à 'auto'.
+
+        Raises:
+            Exception: Si la cible n'est pas une structure valide ou si bases_scores n'est pas un objet Scores.
+        """
+        if bases_scores is None:
+            self.__bases_scores=Scores()
+        elif isinstance(bases_scores,Scores):
+            self.__bases_scores=bases_scores
+        else:
+            raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
+        if not self.__bases_scores.allowed_bp:
+            raise Exception("aucune paire de bases n'est autorisée par les scores")
+
+        self.__minimal_loop_length=int(minloop)
+        Inverse_fold.target_pairs(target,self.__minimal_loop_length)
+        if backend in ("auto","python"):
+            backend="numba" if "numba" in Nussinov_kernels.available_backends() else "numpy"
+        self.__target=target
+        self.__starts=max(int(starts),1)
+        self.__seed=seed
+        self.__time_budget=time_budget
+        self.__max_steps=int(max_steps)
+        self.__workers=workers
+        self.__backend=backend
+        self.__designs=[]
+        self.__design_time=0
+
+        self.design()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def target(self):
+        """
+        Retourne la structure cible.
+
+        Returns:
+            str: Structure en notation dot-bracket.
+        """
+        return self.__target
+
+    @property
+    def designs(self):
+        """
+        Retourne les résultats des départs, du meilleur au moins bon.
+
+        Chaque résultat est un dictionnaire: 'seq' (séquence), 'solved' (la
+        structure prédite est la cible), 'distance' (paires différentes),
+        'gap' (score optimal - score de la cible), 'steps' (mutations essayées),
+        'accepted' (mutations conservées), 'cells' (cases recalculées), 'time'
+        (secondes) et 'seed'.
+
+        Returns:
+            list: Liste de dictionnaires.
+        """
+        return self.__designs
+
+    @property
+    def best(self):
+        """
+        Retourne la structure prédite pour la meilleure séquence trouvée.
+
+        Returns:
+            Rna_structure: Structure prédite de la meilleure séquence.
+        """
+        best=self.__designs[0]
+        rna=Rna_seq("design",best["seq"])
+        return Rna_structure(rna,fold=best["fold"],scores=self.__bases_scores)
+
+    @property
+    def solved(self):
+        """
+        Indique si au moins un départ a trouvé une séquence repliée en la cible.
+
+        Returns:
+            bool: True si la meilleure séquence se replie en la cible.
+        """
+        return bool(self.__designs) and self.__designs[0]["solved"]
+
+    @property
+    def design_time(self):
+        """
+        Retourne le temps du calcul.
+
+        Returns:
+            float: Temps en secondes.
+        """
+        return self.__design_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def design(self):
+        """
+        Lance les départs, en parallèle si workers est supérieur à 1.
+        """
+        start_time=time.time()
+        deadline=None if self.__time_budget is None else start_time+self.__time_budget
+        master=random.Random(self.__seed)
+        seeds=[master.getrandbits(63) for _ in range(self.__starts)]
+        args=[(self.__target,self.__minimal_loop_length,self.__bases_scores,s,deadline,self.__max_steps,self.__backend) for s in seeds]
+        if self.__workers is not None and self.__workers>1 and len(args)>1:
+            with ProcessPoolExecutor(min(self.__workers,len(args))) as pool:
+                designs=list(pool.map(Inverse_fold.design_run,*zip(*args)))
+        else:
+            designs=[Inverse_fold.design_run(*a) for a in args]
+        designs.sort(key=lambda d:(d["distance"],d["gap"],d["steps"]))
+        self.__designs=designs
+        self.__design_time=time.time()-start_time
+
+    @staticmethod
+    def target_pairs(target,minimal_loop_length=3):
+        """
+        Retourne les paires d'une structure cible, en vérifiant qu'elle peut être prédite.
+
+        Args:
+            target (str): Structure en notation dot-bracket.
+            minimal_loop_length (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+
+        Returns:
+            list: Paires (i,j), i<j.
+
+        Raises:
+            Exception: Si la structure contient un autre caractère que '(', ')' ou '.',
+                si elle est mal parenthésée ou si une boucle est trop courte.
+        """
+        stack=[]
+        pairs=[]
+        for pos,c in enumerate(target):
+            if c=="(":
+                stack.append(pos)
+            elif c==")":
+                if not stack:
+                    raise Exception("structure cible mal parenthésée en position {}".format(pos+1))
+                i=stack.pop()
+                if pos-i<=minimal_loop_length:
+                    raise Exception("boucle de la paire ({},{}) plus courte que {}".format(i+1,pos+1,minimal_loop_length))
+                pairs.append((i,pos))
+            elif c!=".":
+                raise Exception("caractère '{}' inattendu dans la structure cible".format(c))
+        if stack:
+            raise Exception("structure cible mal parenthésée en position {}".format(stack[-1]+1))
+        return sorted(pairs)
+
+    @staticmethod
+    def design_run(target,minimal_loop_length,bases_scores,seed,deadline=None,max_steps=10000,backend="numpy"):
+        """
+        Effectue une marche adaptative à partir d'une séquence compatible avec la cible.
+
+        Args:
+            target (str): Structure cible en notation dot-bracket.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            bases_scores (Scores): Scores des bases de l'ARN.
+            seed (int): Graine du générateur aléatoire.
+            deadline (float, optionnel): Heure (time.time()) à laquelle la marche s'arrête. Par défaut à None.
+            max_steps (int, optionnel): Nombre maximal de mutations. Par défaut à 10000.
+            backend (str, optionnel): 'numpy' ou 'numba'. Par défaut à 'numpy'.
+
+        Returns:
+            dict: Résultat du départ (voir Inverse_fold.designs), avec la structure prédite dans 'fold'.
+        """
+        tic=time.time()
+        rng=random.Random(seed)
+        rna=Alphabet.rna()
+        m=int(minimal_loop_length)
+        table=bases_scores.pair_table
+        allowed=[(rna.index(bp[0]),rna.index(bp[1])) for bp in bases_scores.allowed_bp]
+        pairs=Inverse_fold.target_pairs(target,m)
+        target_set=set(pairs)
+        partner={}
+        for i,j in pairs:
+            partner[i]=j
+            partner[j]=i
+        n=len(target)
+        #les positions non appariées reçoivent les bases ayant le moins de partenaires
+        degree=[sum(1 for bp in allowed if bp[0]==b) for b in range(len(rna))]
+        loners=[b for b in range(len(rna)) if degree[b]==min(degree)]
+        codes=np.array([rng.choice(loners) for _ in range(n)],dtype=np.uint8)
+        for i,j in pairs:
+            codes[i],codes[j]=rng.choice(allowed)
+
+        def evaluate():
+            fold=Nussinov_kernels.traceback(M,codes,table,m,backend)
+            target_score=sum(int(table[codes[i],codes[j]]) for i,j in pairs)
+            optimum=int(M[0,n-1]) if n>0 else 0
+            return len(set(fold)^target_set),optimum-target_score,fold
+
+        M=Nussinov_kernels.fill(codes,table,m,backend)
+        cells=n*(n+1)//2
+        distance,gap,fold=evaluate()
+        steps=0
+        accepted=0
+        while distance>0 and steps<max_steps and (deadline is None or time.time()<deadline):
+            steps+=1
+            wrong=sorted({p for bp in set(fold)^target_set for p in bp})
+            pos=rng.choice(wrong) if wrong and rng.random()<0.8 else rng.randrange(n)
+            if pos in partner:
+                i,j=min(pos,partner[pos]),max(pos,partner[pos])
+                choices=[bp for bp in allowed if bp!=(codes[i],codes[j])]
+                if not choices:
+                    continue
+                old=(codes[i],codes[j])
+                codes[i],codes[j]=rng.choice(choices)
+                lo,hi=i,j
+            else:
+                old=(codes[pos],)
+                codes[pos]=rng.choice([b for b in range(len(rna)) if b!=codes[pos]])
+                lo=hi=pos
+            saved=M[:hi+1,lo:].copy()
+            cells+=Nussinov_kernels.refill(M,codes,table,m,lo,hi,backend)
+            new_distance,new_gap,new_fold=evaluate()
+            if (new_distance,new_gap)<=(distance,gap):
+                distance,gap,fold=new_distance,new_gap,new_fold
+                accepted+=1
+            else:
+                M[:hi+1,lo:]=saved
+                if len(old)==2:
+                    codes[lo],codes[hi]=old
+                else:
+                    codes[pos]=old[0]
+        seq="".join(rna[c] for c in codes)
+        return {"seq":seq,"solved":distance==0,"distance":distance,"gap":gap,"steps":steps,"accepted":accepted,
+                "cells":cells,"time":time.time()-tic,"seed":seed,"fold":sorted(fold)}
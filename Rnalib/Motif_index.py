@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 20:02:51 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Rna_parser import Rna_parser
+
+class Motif_index:
+    """
+    Index en colonnes des hélices et des boucles d'une collection de structures.
+
+    Chaque ligne est un élément de Rna_structure.loop_decomposition(); les
+    colonnes sont des tableaux numpy, si bien qu'une requête est une suite de
+    comparaisons vectorisées sur toutes les lignes:
+
+    - structure (int32): indice de la structure dans ids;
+    - kind (int8): indice du type dans Motif_index.KINDS;
+    - i, j (int32): paire fermante (paire externe d'une hélice);
+    - length, left, right, branches, stem (int32): voir loop_decomposition().
+
+    Attributs:
+        __ids (list): Identifiants des structures, dans l'ordre d'indexation.
+        __columns (dict): Colonnes de l'index.
+    """
+    KINDS=("helix","hairpin","bulge","interior","multiloop","exterior")
+    COLUMNS=("structure","kind","i","j","length","left","right","branches","stem")
+
+    def __init__(self,structures=None):
+        """
+        Initialise l'index et y ajoute des structures.
+
+        Args:
+            structures (iterable, optionnel): Objets Rna_structure, ou dictionnaire
+                {identifiant: Rna_structure} comme celui de Rna_parser.parse_dotbrackets_file. Par défaut à None.
+        """
+        self.__ids=[]
+        self.__columns={name:np.zeros(0,dtype=np.int8 if name=="kind" else np.int32) for name in Motif_index.COLUMNS}
+        if structures is not None:
+            self.extend(structures)
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def ids(self):
+        """
+        Retourne les identifiants des structures indexées.
+
+        Returns:
+            list: Identifiants, dans l'ordre d'indexation.
+        """
+        return self.__ids
+
+    @property
+    def columns(self):
+        """
+        Retourne les colonnes de l'index.
+
+        Returns:
+            dict: {nom: numpy.ndarray}.
+        """
+        return self.__columns
+
+    #===================
+    #Méthodes magiques
+    #===================
+
+    def __len__(self):
+        """
+        Retourne le nombre d'éléments (lignes) de l'index.
+
+        Returns:
+            int: Nombre de lignes.
+        """
+        return len(self.__columns["kind"])
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    @staticmethod
+    def from_dotbrackets(filename: str,minimal_loop_length=3):
+        """
+        Construit l'index d'un fichier dot-bracket.
+
+        Args:
+            filename (str): Chemin du fichier.
+            minimal_loop_length (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+
+        Returns:
+            Motif_index: Index des structures du fichier.
+        """
+        return Motif_index(Rna_parser.parse_dotbrackets_file(filename,minimal_loop_length))
+
+    def extend(self,structures):
+        """
+        Décompose des structures et ajoute leurs éléments à l'index.
+
+        Args:
+            structures (iterable): Objets Rna_structure, ou dictionnaire {identifiant: Rna_structure}.
+        """
+        if isinstance(structures,dict):
+            structures=structures.values()
+        kinds={kind:code for code,kind in enumerate(Motif_index.KINDS)}
+        rows=[]
+        first=len(self.__ids)
+        for st in structures:
+            index=len(self.__ids)
+            self.__ids.append(st.rna.id)
+            rows.extend((index,kinds[r[0]])+r[1:] for r in st.loop_decomposition())
+        if len(self.__ids)==first:
+            return
+        block=np.array(rows,dtype=np.int64).reshape(-1,len(Motif_index.COLUMNS))
+        for c,name in enumerate(Motif_index.COLUMNS):
+            column=self.__columns[name]
+            self.__columns[name]=np.concatenate((column,block[:,c].astype(column.dtype)))
+
+    def select(self,kind=None,**conditions):
+        """
+        Retourne les lignes vérifiant toutes les conditions.
+
+        Une condition est un entier (égalité) ou un couple (minimum, maximum),
+        bornes incluses, None laissant la borne ouverte. Par exemple
+        select('hairpin', stem=(5,None), length=(4,8)) ou select('multiloop', branches=3).
+
+        Args:
+            kind (str ou tuple, optionnel): Type(s) d'élément (Motif_index.KINDS). Par défaut à None (tous).
+            **conditions: Conditions sur les colonnes.
+
+        Returns:
+            numpy.ndarray: Indices des lignes sélectionnées.
+
+        Raises:
+            Exception: Si un type ou une colonne est inconnu.
+        """
+        return np.flatnonzero(self.mask(kind,**conditions))
+
+    def mask(self,kind=None,**conditions):
+        """
+        Retourne le masque booléen des lignes vérifiant toutes les conditions (voir select).
+
+        Args:
+            kind (str ou tuple, optionnel): Type(s) d'élément. Par défaut à None (tous).
+            **conditions: Conditions sur les colonnes.
+
+        Returns:
+            numpy.ndarray: Masque booléen, une valeur par ligne.
+
+        Raises:
+            Exception: Si un type ou une colonne est inconnu.
+        """
+        mask=np.ones(len(self),dtype=bool)
+        if kind is not None:
+            kinds=(kind,) if isinstance(kind,str) else tuple(kind)
+            for k in kinds:
+                if k not in Motif_index.KINDS:
+                    raise Exception("type d'élément '{}' inconnu ({})".format(k,", ".join(Motif_index.KINDS)))
+            mask&=np.isin(self.__columns["kind"],[Motif_index.KINDS.index(k) for k in kinds])
+        for name,value in conditions.items():
+            if name not in self.__columns:
+                raise Exception("colonne '{}' inconnue ({})".format(name,", ".join(Motif_index.COLUMNS)))
+            column=self.__columns[name]
+            if isinstance(value,tuple):
+                low,high=value
+                if low is not None:
+                    mask&=column>=low
+                if high is not None:
+                    mask&=column<=high
+            else:
+                mask&=column==value
+        return mask
+
+    def structures(self,kind=None,**conditions):
+        """
+        Retourne les structures contenant au moins un élément vérifiant les conditions (voir select).
+
+        Args:
+            kind (str ou tuple, optionnel): Type(s) d'élément. Par défaut à None (tous).
+            **conditions: Conditions sur les colonnes.
+
+        Returns:
+            numpy.ndarray: Indices des structures dans ids, triés.
+        """
+        found=np.zeros(len(self.__ids),dtype=bool)
+        found[self.__columns["structure"][self.mask(kind,**conditions)]]=True
+        return np.flatnonzero(found)
+
+    def count(self,kind=None,**conditions):
+        """
+        Compte, pour chaque structure, les éléments vérifiant les conditions (voir select).
+
+        Args:
+            kind (str ou tuple, optionnel): Type(s) d'élément. Par défaut à None (tous).
+            **conditions: Conditions sur les colonnes.
+
+        Returns:
+            numpy.ndarray: Nombre d'éléments par structure, dans l'ordre de ids.
+        """
+        return np.bincount(self.__columns["structure"][self.mask(kind,**conditions)],minlength=len(self.__ids))
+
+    def rows(self,indices):
+        """
+        Retourne des lignes de l'index sous la forme de Rna_structure.loop_decomposition().
+
+        Args:
+            indices (iterable): Indices de lignes.
+
+        Returns:
+            list: Tuples (identifiant, type, i, j, longueur, gauche, droite, branches, tige).
+        """
+        c=self.__columns
+        return [(self.__ids[c["structure"][r]],Motif_index.KINDS[c["kind"][r]])+tuple(int(c[name][r]) for name in Motif_index.COLUMNS[2:])
+                for r in indices]
+
+    def save(self,filename):
+        """
+        Enregistre l'index (numpy .npz compressé).
+
+        Args:
+            filename (str): Chemin du fichier.
+        """
+        np.savez_compressed(filename,ids=np.array(self.__ids,dtype=str),**self.__columns)
+
+    @staticmethod
+    def load(filename):
+        """
+        Charge un index enregistré par save().
+
+        Args:
+            filename (str): Chemin du fichier.
+
+        Returns:
+            Motif_index: Index chargé.
+        """
+        index=Motif_index()
+        with np.load(filename) as data:
+            index.__ids=data["ids"].tolist()
+            index.__columns={name:data[name] for name in Motif_index.COLUMNS}
+        return index
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 17:05:12 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Alphabet import Alphabet
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+from .Rna_structure import Rna_structure
+from .Nussinov_kernels import Nussinov_kernels
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+class Mutation_scan:
+    """
+    Classe calculant le score optimal et la structure de tous les mutants ponctuels d'un ARN.
+
+    La séquence sauvage est repliée une seule fois (matrice de Nussinov et ses
+    pointeurs de retour), puis la matrice « outside » est calculée
+    (Nussinov_kernels.outside). Une mutation en m ne change que les paires
+    contenant m, d'où le score optimal du mutant:
+    - m non apparié: M[0,m-1]+M[m+1,n-1] si aucune paire n'entoure m, sinon le
+      meilleur W[i,j]+s(i,j)+M[i+1,m-1]+M[m+1,j-1] sur les paires (i,j) qui
+      entourent m;
+    - m apparié à l: W[m,l]+s'(m,l)+M[m+1,l-1] (ou symétrique si l<m), avec le
+      score s' de la base mutée.
+    Chaque position coûte O(n²) pour ses trois mutants, au lieu de trois
+    repliements en O(n³). La structure optimale de chaque mutant est
+    reconstruite à partir des pointeurs des deux matrices.
+
+    Attributs:
+        __rna (Rna_seq): Séquence sauvage.
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __bases_scores (Scores): Scores des bases de l'ARN.
+        __backend (str): Moteur de remplissage de Nussinov_kernels.
+        __workers (int): Nombre de threads répartissant les positions.
+        __with_structures (bool): Indique si les structures des mutants sont reconstruites.
+        __wild_type (Rna_structure): Structure optimale de la séquence sauvage.
+        __result (numpy.ndarray): Tableau structuré des mutants.
+        __structures (list): Structures des mutants en notation dot-bracket.
+        __scan_time (float): Temps du calcul.
+    """
+    DTYPE=np.dtype([("position",np.int32),("wild","U1"),("mutant","U1"),("score",np.int64),("delta",np.int64),("distance",np.int32)])
+
+    def __init__(self,rnaSeq: Rna_seq,minloop=3,bases_scores=None,backend="auto",workers=None,structures=True):
+        """
+        Initialise une instance de Mutation_scan et calcule tous les mutants ponctuels.
+
+        Args:
+            rnaSeq (Rna_seq): Séquence sauvage.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            backend (str, optionnel): Moteur de remplissage ('auto', 'numpy', 'numba', 'wavefront' ou 'tiled'). Par défaut à 'auto'.
+            workers (int, optionnel): Nombre de threads répartissant les positions. Par défaut à None (un seul).
+            structures (bool, optionnel): Reconstruit la structure de chaque mutant et sa distance à la
+                structure sauvage. Par défaut à True.
+
+        Raises:
+            Exception: Si rnaSeq n'est pas un objet Rna_seq ou si bases_scores n'est pas un objet Scores.
+        """
+        if not isinstance(rnaSeq,Rna_seq):
+            raise Exception("'{}' n'est pas un objet Rna_seq".format(rnaSeq))
+
+        if bases_scores is None:
+            self.__bases_scores=Scores()
+        elif isinstance(bases_scores,Scores):
+            self.__bases_scores=bases_scores
+        else:
+            raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
+
+        if backend in ("auto","python"):
+            backend="numba" if "numba" in Nussinov_kernels.available_backends() else "numpy"
+        self.__rna=rnaSeq
+        self.__minimal_loop_length=int(minloop)
+        self.__backend=backend
+        self.__workers=workers
+        self.__with_structures=structures
+        self.__wild_type=None
+        self.__result=np.zeros(0,dtype=Mutation_scan.DTYPE)
+        self.__structures=[]
+        self.__scan_time=0
+
+        self.scan()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def rna(self):
+        """
+        Retourne la séquence sauvage.
+
+        Returns:
+            Rna_seq: Séquence sauvage.
+        """
+        return self.__rna
+
+    @property
+    def wild_type(self):
+        """
+        Retourne la structure optimale de la séquence sauvage.
+
+        Returns:
+            Rna_structure: Structure sauvage.
+        """
+        return self.__wild_type
+
+    @property
+    def result(self):
+        """
+        Retourne les mutants, position par position et dans l'ordre de Alphabet.rna().
+
+        Champs: 'position' (0 pour la première base), 'wild', 'mutant', 'score'
+        (score optimal du mutant), 'delta' (score - score sauvage) et 'distance'
+        (nombre de paires différentes de la structure sauvage, -1 sans les structures).
+
+        Returns:
+            numpy.ndarray: Tableau structuré de 3n lignes (Mutation_scan.DTYPE).
+        """
+        return self.__result
+
+    @property
+    def structures(self):
+        """
+        Retourne les structures optimales des mutants, dans l'ordre de result.
+
+        Returns:
+            list: Structures en notation dot-bracket (vide si structures=False).
+        """
+        return self.__structures
+
+    @property
+    def scores(self):
+        """
+        Retourne les scores des bases de l'ARN.
+
+        Returns:
+            Scores: Scores des bases de l'ARN.
+        """
+        return self.__bases_scores
+
+    @property
+    def scan_time(self):
+        """
+        Retourne le temps du calcul.
+
+        Returns:
+            float: Temps en secondes.
+        """
+        return self.__scan_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def scan(self):
+        """
+        Replie la séquence sauvage puis calcule le score et la structure de chaque mutant.
+        """
+        start_time=time.time()
+        codes=self.__rna.codes
+        table=self.__bases_scores.pair_table
+        n=len(codes)
+        m=self.__minimal_loop_length
+        self.__M,self.__case,self.__split=Nussinov_kernels.fill(codes,table,m,self.__backend,pointers=True)
+        self.__O,self.__rule,self.__arg,self.__W,self.__W_arg=Nussinov_kernels.outside(self.__M,codes,table,m)
+        wild=Nussinov_kernels.traceback_pointers(self.__case,self.__split)
+        self.__wild_type=Rna_structure(self.__rna,fold=wild,scores=self.__bases_scores)
+        self.__partner=np.full(n,-1,dtype=np.int64)
+        for i,j in wild:
+            self.__partner[i]=j
+            self.__partner[j]=i
+        self.__optimum=int(self.__M[0,n-1]) if n>0 else 0
+        self.__codes=codes
+        self.__table=table
+        self.__P=table[codes[:,None],codes[None,:]]
+        self.__enclosing=np.where(self.__P>0,self.__W+self.__P,Nussinov_kernels.NEG)
+
+        positions=list(range(n))
+        if self.__workers is not None and self.__workers>1 and n>1:
+            chunks=[positions[k::self.__workers] for k in range(self.__workers)]
+            with ThreadPoolExecutor(self.__workers) as pool:
+                parts=list(pool.map(self.__scan_positions,chunks))
+            by_position={}
+            for part in parts:
+                for row,dotpar in part:
+                    by_position.setdefault(row[0],[]).append((row,dotpar))
+            rows=[item for p in positions for item in by_position[p]]
+        else:
+            rows=self.__scan_positions(positions)
+        self.__result=np.array([row for row,_ in rows],dtype=Mutation_scan.DTYPE)
+        self.__structures=[dotpar for _,dotpar in rows] if self.__with_structures else []
+        #les matrices (n² entiers chacune) ne sont plus utiles
+        self.__M=self.__case=self.__split=self.__O=self.__rule=self.__arg=None
+        self.__W=self.__W_arg=self.__P=self.__enclosing=None
+        self.__scan_time=time.time()-start_time
+
+    def mutant_structure(self,index):
+        """
+        Retourne la structure optimale d'un mutant sur sa propre séquence.
+
+        Args:
+            index (int): Ligne du mutant dans result.
+
+        Returns:
+            Rna_structure: Structure du mutant, dont l'identifiant est '<id>:<sauvage><position+1><mutant>'.
+
+        Raises:
+            Exception: Si les structures n'ont pas été calculées.
+        """
+        if not self.__with_structures:
+            raise Exception("les structures des mutants n'ont pas été calculées (structures=False)")
+        row=self.__result[index]
+        pos=int(row["position"])
+        seq=self.__rna.seq[:pos]+row["mutant"]+self.__rna.seq[pos+1:]
+        mutant=Rna_seq("{}:{}{}{}".format(self.__rna.id,row["wild"],pos+1,row["mutant"]),seq)
+        return Rna_structure(mutant,dotpar=self.__structures[index],scores=self.__bases_scores)
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    def __scan_positions(self,positions):
+        """
+        Calcule les mutants d'une liste de positions.
+
+        Args:
+            positions (list): Positions à muter.
+
+        Returns:
+            list: Couples (ligne de result, structure dot-bracket ou None).
+        """
+        M=self.__M
+        W=self.__W
+        codes=self.__codes
+        table=self.__table
+        n=len(codes)
+        m=self.__minimal_loop_length
+        rna=Alphabet.rna()
+        rows=[]
+        for pos in positions:
+            #m non apparié: hors de toute paire, ou dans la boucle d'une paire (i,j)
+            unpaired=(int(M[0,pos-1]) if pos>0 else 0)+(int(M[pos+1,n-1]) if pos<n-1 else 0)
+            unpaired_case=("exterior",)
+            if 0<pos<n-1:
+                sub=self.__enclosing[:pos,pos+1:]+M[1:pos+1,pos-1][:,None]+M[pos+1,pos:n-1][None,:]
+                best=int(sub.argmax())
+                i,j=divmod(best,n-pos-1)
+                if sub[i,j]>unpaired:
+                    unpaired=int(sub[i,j])
+                    unpaired_case=("enclosed",i,j+pos+1)
+            #m apparié à l>m ou l<m
+            right=np.arange(pos+m+1,n)
+            left=np.arange(0,max(pos-m,0))
+            right_ctx=W[pos,right]+M[pos+1,right-1] if len(right) else None
+            left_ctx=W[left,pos]+M[left+1,pos-1] if len(left) else None
+            wild=int(codes[pos])
+            for base in range(len(rna)):
+                if base==wild:
+                    continue
+                score=unpaired
+                case=unpaired_case
+                if right_ctx is not None:
+                    pair=table[base,codes[right]]
+                    values=np.where(pair>0,right_ctx+pair,Nussinov_kernels.NEG)
+                    k=int(values.argmax())
+                    if values[k]>score:
+                        score=int(values[k])
+                        case=("pair",pos,int(right[k]))
+                if left_ctx is not None:
+                    pair=table[codes[left],base]
+                    values=np.where(pair>0,left_ctx+pair,Nussinov_kernels.NEG)
+                    k=int(values.argmax())
+                    if values[k]>score:
+                        score=int(values[k])
+                        case=("pair",int(left[k]),pos)
+                distance=-1
+                dotpar=None
+                if self.__with_structures:
+                    fold=self.__mutant_fold(pos,base,score,case)
+                    distance=len(set(fold)^set(self.__wild_type.fold))
+                    dotpar=self.__to_dotpar(fold,n)
+                rows.append(((pos,rna[wild],rna[base],score,score-self.__optimum,distance),dotpar))
+        return rows
+
+    def __mutant_fold(self,pos,base,score,case):
+        """
+        Reconstruit la structure optimale d'un mutant.
+
+        La structure sauvage est conservée si son score sur le mutant est optimal.
+
+        Args:
+            pos (int): Position mutée.
+            base (int): Code de la base mutée.
+            score (int): Score optimal du mutant.
+            case (tuple): Cas optimal ('exterior',), ('enclosed',i,j) ou ('pair',k,l).
+
+        Returns:
+            list: Paires (i,j) de la structure.
+        """
+        partner=int(self.__partner[pos])
+        kept=self.__optimum
+        if partner>=0:
+            i,j=min(pos,partner),max(pos,partner)
+            new=self.__table[base,self.__codes[j]] if i==pos else self.__table[self.__codes[i],base]
+            kept=kept-int(self.__P[i,j])+int(new) if new>0 else None
+        if kept==score:
+            return list(self.__wild_type.fold)
+        n=len(self.__codes)
+        if case[0]=="exterior":
+            return self.__inside(0,pos-1)+self.__inside(pos+1,n-1)
+        if case[0]=="enclosed":
+            _,i,j=case
+            return self.__pair_context(i,j)+[(i,j)]+self.__inside(i+1,pos-1)+self.__inside(pos+1,j-1)
+        _,k,l=case
+        return self.__pair_context(k,l)+[(k,l)]+self.__inside(k+1,l-1)
+
+    def __inside(self,i,j):
+        """
+        Retourne les paires optimales de l'intervalle [i,j] (pointeurs de retour).
+
+        Args:
+            i (int): Début de l'intervalle.
+            j (int): Fin de l'intervalle.
+
+        Returns:
+            list: Paires (i,j).
+        """
+        if j-i<=self.__minimal_loop_length:
+            return []
+        return Nussinov_kernels.traceback_pointers(self.__case,self.__split,start=(i,j))
+
+    def __context(self,a,b):
+        """
+        Retourne les paires optimales placées hors de l'intervalle [a,b] (pointeurs outside).
+
+        Args:
+            a (int): Début de l'intervalle.
+            b (int): Fin de l'intervalle.
+
+        Returns:
+            list: Paires (i,j).
+        """
+        n=len(self.__codes)
+        fold=[]
+        while (a,b)!=(0,n-1):
+            rule=int(self.__rule[a,b])
+            arg=int(self.__arg[a,b])
+            if rule==1:
+                b+=1
+            elif rule==2:
+                a,b=a-1,b+1
+                fold.append((a,b))
+            elif rule==3:
+                fold.append((b+1,arg))
+                fold+=self.__inside(b+2,arg-1)
+                b=arg
+            else:
+                fold.append((a-1,b+1))
+                fold+=self.__inside(arg,a-2)
+                a,b=arg,b+1
+        return fold
+
+    def __pair_context(self,k,j):
+        """
+        Retourne les paires optimales placées hors de la paire (k,j).
+
+        Args:
+            k (int): Première base de la paire.
+            j (int): Seconde base de la paire.
+
+        Returns:
+            list: Paires (i,j).
+        """
+        i=int(self.__W_arg[k,j])
+        if i<0:
+            return self.__context(k,j)
+        return self.__inside(i,k-1)+self.__context(i,j)
+
+    @staticmethod
+    def __to_dotpar(fold,size):
+        """
+        Convertit une liste de paires en notation dot-bracket.
+
+        Args:
+            fold (list): Paires (i,j), i<j.
+            size (int): Longueur de la séquence.
+
+        Returns:
+            str: Structure en notation dot-bracket.
+        """
+        struct=["."]*size
+        for i,j in fold:
+            struct[i]="("
+            struct[j]=")"
+        return "".join(struct)
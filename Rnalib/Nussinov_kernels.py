@@ -0,0 +1,1130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:17 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import importlib.util
+
+#numba n'est importé qu'à la première compilation (voir _jit)
+numba_mod=importlib.util.find_spec("numba") is not None
+_jitted={}
+
+def _fill_compiled(M,codes,table,minimal_loop_length,j0,j1):
+    """
+    Remplit les colonnes j0 à j1-1 de la matrice de scores (version compilée par numba).
+
+    Args:
+        M (numpy.ndarray): Matrice de scores, dont les colonnes précédentes sont remplies.
+        codes (numpy.ndarray): Codes de la séquence.
+        table (numpy.ndarray): Table des scores d'appariement.
+        minimal_loop_length (int): Longueur minimale de la boucle.
+        j0 (int): Première colonne.
+        j1 (int): Colonne de fin (exclue).
+    """
+    for j in range(max(j0,1),j1):
+        for i in range(j):
+            if j - i > minimal_loop_length:
+                best=M[i,j-1]
+                c2=M[i+1,j-1]+table[codes[i],codes[j]]
+                if c2>best:
+                    best=c2
+                for k in range(i+1,j-minimal_loop_length):
+                    c3=M[i,k-1]+table[codes[k],codes[j]]+M[k+1,j-1]
+                    if c3>best:
+                        best=c3
+                M[i,j]=best
+
+def _refill_compiled(M,codes,table,minimal_loop_length,lo,hi):
+    """
+    Recalcule les cases (i,j), i<=hi et j>=lo, après une modification des positions lo à hi (version compilée par numba).
+
+    Args:
+        M (numpy.ndarray): Matrice de scores remplie pour l'ancienne séquence.
+        codes (numpy.ndarray): Codes de la nouvelle séquence.
+        table (numpy.ndarray): Table des scores d'appariement.
+        minimal_loop_length (int): Longueur minimale de la boucle.
+        lo (int): Première position modifiée.
+        hi (int): Dernière position modifiée.
+
+    Returns:
+        int: Nombre de cases recalculées.
+    """
+    n=codes.shape[0]
+    cells=0
+    for j in range(max(lo,1),n):
+        for i in range(min(hi,j-minimal_loop_length-1)+1):
+            best=M[i,j-1]
+            c2=M[i+1,j-1]+table[codes[i],codes[j]]
+            if c2>best:
+                best=c2
+            for k in range(i+1,j-minimal_loop_length):
+                c3=M[i,k-1]+table[codes[k],codes[j]]+M[k+1,j-1]
+                if c3>best:
+                    best=c3
+            M[i,j]=best
+            cells+=1
+    return cells
+
+def _traceback_compiled(M,codes,table,minimal_loop_length):
+    """
+    Effectue le traceback par pile d'une matrice de scores (version compilée par numba).
+
+    Args:
+        M (numpy.ndarray): Matrice de scores.
+        codes (numpy.ndarray): Codes de la séquence.
+        table (numpy.ndarray): Table des scores d'appariement.
+        minimal_loop_length (int): Longueur minimale de la boucle.
+
+    Returns:
+        numpy.ndarray: Appariements optimaux, de taille (nombre de paires, 2).
+    """
+    n=codes.shape[0]
+    stack=np.empty((n+2,2),dtype=np.int64)
+    fold=np.empty((n//2+1,2),dtype=np.int64)
+    nfold=0
+    stack[0,0]=0
+    stack[0,1]=n-1
+    top=1
+    steps=0
+    while top>0:
+        top-=1
+        steps+=1
+        i=stack[top,0]
+        j=stack[top,1]
+        if j - i > minimal_loop_length and j>0:
+            if M[i,j]==M[i,j-1]:
+                stack[top,0]=i
+                stack[top,1]=j-1
+                top+=1
+            elif M[i,j]==M[i+1,j-1]+table[codes[i],codes[j]] and table[codes[i],codes[j]]>0:
+                fold[nfold,0]=i
+                fold[nfold,1]=j
+                nfold+=1
+                stack[top,0]=i+1
+                stack[top,1]=j-1
+                top+=1
+            else:
+                for k in range(i+1,j-minimal_loop_length):
+                    if M[i,j]==M[i,k-1]+table[codes[k],codes[j]]+M[k+1,j-1] and table[codes[k],codes[j]]>0:
+                        fold[nfold,0]=k
+                        fold[nfold,1]=j
+                        nfold+=1
+                        stack[top,0]=i
+                        stack[top,1]=k-1
+                        stack[top+1,0]=k+1
+                        stack[top+1,1]=j-1
+                        top+=2
+                        break
+    return fold[:nfold],steps
+
+def _fill_pointers_compiled(M,case,split,codes,table,minimal_loop_length,j0,j1):
+    """
+    Remplit les colonnes j0 à j1-1 en enregistrant les pointeurs de retour (version compilée par numba).
+
+    Args:
+        M (numpy.ndarray): Matrice de scores, dont les colonnes précédentes sont remplies.
+        case (numpy.ndarray): Codes des cas optimaux (int8).
+        split (numpy.ndarray): Premier point de coupure optimal (int32).
+        codes (numpy.ndarray): Codes de la séquence.
+        table (numpy.ndarray): Table des scores d'appariement.
+        minimal_loop_length (int): Longueur minimale de la boucle.
+        j0 (int): Première colonne.
+        j1 (int): Colonne de fin (exclue).
+    """
+    for j in range(max(j0,1),j1):
+        for i in range(j):
+            if j - i > minimal_loop_length:
+                c1=M[i,j-1]
+                p=table[codes[i],codes[j]]
+                c2=M[i+1,j-1]+p
+                #premier point de coupure optimal parmi les paires autorisées
+                c3=-1
+                first=-1
+                for k in range(i+1,j-minimal_loop_length):
+                    pk=table[codes[k],codes[j]]
+                    if pk>0:
+                        v=M[i,k-1]+pk+M[k+1,j-1]
+                        if v>c3:
+                            c3=v
+                            first=k
+                best=max(c1,c2,c3)
+                M[i,j]=best
+                flags=0
+                if c1==best:
+                    flags|=1
+                if c2==best and p>0:
+                    flags|=2
+                if first>=0 and c3==best:
+                    flags|=4
+                    split[i,j]=first
+                case[i,j]=flags
+
+def _fill_packed_compiled(P,codes,table,minimal_loop_length,j0,j1):
+    """
+    Remplit les colonnes j0 à j1-1 d'une matrice triangulaire compactée par colonnes (version compilée par numba).
+
+    La case (i,j), i<=j, est rangée à l'indice j*(j+1)/2+i de P.
+
+    Args:
+        P (numpy.ndarray): Matrice compactée, dont les colonnes précédentes sont remplies.
+        codes (numpy.ndarray): Codes de la séquence.
+        table (numpy.ndarray): Table des scores d'appariement.
+        minimal_loop_length (int): Longueur minimale de la boucle.
+        j0 (int): Première colonne.
+        j1 (int): Colonne de fin (exclue).
+    """
+    for j in range(max(j0,1),j1):
+        prev=(j-1)*j//2
+        col=j*(j+1)//2
+        for i in range(j-minimal_loop_length):
+            best=P[prev+i]
+            #M[i+1][j-1] vaut 0 sous la diagonale
+            c2=table[codes[i],codes[j]]
+            if i+1<=j-1:
+                c2+=P[prev+i+1]
+            if c2>best:
+                best=c2
+            for k in range(i+1,j-minimal_loop_length):
+                pk=table[codes[k],codes[j]]
+                if pk>0:
+                    c3=P[(k-1)*k//2+i]+pk
+                    if k+1<=j-1:
+                        c3+=P[prev+k+1]
+                    if c3>best:
+                        best=c3
+            P[col+i]=best
+
+def _jit(func):
+    """
+    Retourne la version compilée par numba d'une fonction, en important numba au premier appel.
+
+    Args:
+        func (callable): Fonction à compiler.
+
+    Returns:
+        callable: Fonction compilée (conservée pour les appels suivants).
+    """
+    if func not in _jitted:
+        import numba
+        _jitted[func]=numba.njit(cache=True)(func)
+    return _jitted[func]
+
+class Nussinov_kernels:
+    """
+    Noyaux de calcul de l'algorithme de Nussinov sur des séquences encodées.
+
+    Les séquences sont encodées par Alphabet.encode_rna() et les scores
+    d'appariement lus dans une table indexée par ces codes (Scores.pair_table).
+    Les matrices produites sont identiques à celles de Predict_structure.
+
+    Les pointeurs de retour sont deux matrices: 'case' (int8) contient les
+    cas optimaux de chaque case (1: j non apparié, 2: paire (i,j), 4: au moins
+    un point de coupure k) et 'split' (int32) le premier point de coupure
+    optimal, ou -1.
+
+    Les fonctions de remplissage acceptent un rappel progress(fraction),
+    appelé après chaque colonne, diagonale ou groupe de blocs avec la part des
+    colonnes ou diagonales déjà remplies. Une exception levée par ce rappel
+    interrompt le remplissage.
+    """
+    #valeur des cases inaccessibles de Nussinov_kernels.outside()
+    NEG=np.iinfo(np.int64).min//4
+
+    @staticmethod
+    def available_backends():
+        """
+        Retourne la liste des moteurs de calcul utilisables.
+
+        Returns:
+            list: Noms des moteurs ('python', 'numpy' et 'numba' si numba est installé).
+        """
+        backends=["python","numpy","wavefront","tiled"]
+        if numba_mod:
+            backends.append("numba")
+        return backends
+
+    @staticmethod
+    def fill_counters(size,minimal_loop_length,first_column=0):
+        """
+        Calcule le nombre de cases remplies et de points de coupure examinés par le remplissage des colonnes first_column à size-1.
+
+        Args:
+            size (int): Longueur de la séquence.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            first_column (int, optionnel): Première colonne remplie (reprise d'une matrice sur disque). Par défaut à 0.
+
+        Returns:
+            dict: Compteurs 'cells' et 'split_points'.
+        """
+        cells=0
+        split_points=0
+        #la colonne j contient j-minimal_loop_length cases (i,j) à remplir, et la case (i,i+d)
+        #examine d-minimal_loop_length-1 points de coupure
+        for j in range(max(first_column,0),size):
+            a=j-max(minimal_loop_length,0)
+            if a>0:
+                cells+=a
+                split_points+=a*(a-1)//2
+        return {"cells":cells,"split_points":split_points}
+
+    @staticmethod
+    def fill_banded(codes,table,minimal_loop_length,max_span):
+        """
+        Remplit la matrice de scores en n'autorisant que les paires (i,j) telles que j-i<=max_span.
+
+        Seules les cases (i,j) avec j-i<=max_span sont calculées et conservées,
+        dans un tableau (n, max_span+1) où B[j,d] est la case (j-d,j): l'intérieur
+        d'une paire ne contient que de telles cases. La ligne 0 de la matrice
+        complète (boucle externe) est un tableau F à une dimension, F[j]=M[0][j].
+        Chaque colonne est calculée d'un bloc par NumPy, en O(max_span²): le
+        remplissage prend un temps O(n·max_span²) et une mémoire O(n·max_span).
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            max_span (int): Distance maximale j-i entre deux bases appariées.
+
+        Returns:
+            tuple: Bande B (numpy.ndarray, (n, max_span+1)) et boucle externe F (numpy.ndarray, n).
+        """
+        codes=np.asarray(codes,dtype=np.int64)
+        table=np.asarray(table,dtype=np.int64)
+        size=len(codes)
+        span=max(int(max_span),0)
+        m=int(minimal_loop_length)
+        NEG=Nussinov_kernels.NEG
+        B=np.zeros((size,span+1),dtype=np.int64)
+        F=np.zeros(size,dtype=np.int64)
+        #Fs[k]=F[k-1], nul avant le début de la séquence
+        Fs=np.zeros(size+1,dtype=np.int64)
+        for j in range(1,size):
+            lo=max(0,j-span)
+            rows=np.arange(lo,j)
+            #paires (k,j) possibles, k de lo à j-m-1: score de la paire et de son intérieur
+            ks=np.arange(lo,max(j-m,lo))
+            pk=table[codes[ks],codes[j]]
+            inner_k=np.where(ks+1<=j-1,B[j-1,np.clip(j-2-ks,0,span)],0)
+            term=np.where(pk>0,pk+inner_k,NEG)
+            #case (i,j): j non apparié, paire (i,j) ou paire (k,j) avec i<k
+            unpaired=B[j-1,j-1-rows]
+            pij=table[codes[rows],codes[j]]
+            inner=np.where(rows+1<=j-1,B[j-1,np.clip(j-2-rows,0,span)],0)
+            best=np.maximum(unpaired,np.where(pij>0,pij+inner,NEG))
+            if len(ks)>1:
+                splits=ks[1:]
+                offsets=(splits-1)[None,:]-rows[:,None]
+                left=B[(splits-1)[None,:],np.clip(offsets,0,span)]
+                candidates=np.where(offsets>=0,left+term[None,1:],NEG)
+                best=np.maximum(best,candidates.max(axis=1))
+            best[j-rows<=m]=0
+            B[j,j-rows]=best
+            #boucle externe
+            F[j]=F[j-1]
+            if len(ks):
+                F[j]=max(F[j-1],int((Fs[ks]+term).max()))
+            Fs[j+1]=F[j]
+        return B,F
+
+    @staticmethod
+    def traceback_banded(B,F,codes,table,minimal_loop_length,counters=None):
+        """
+        Effectue le traceback de fill_banded, avec les mêmes règles de priorité que Predict_structure.
+
+        Args:
+            B (numpy.ndarray): Bande retournée par fill_banded.
+            F (numpy.ndarray): Boucle externe retournée par fill_banded.
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            counters (dict, optionnel): Compteurs où ajouter le nombre de cases visitées ('traceback_steps'). Par défaut à None.
+
+        Returns:
+            list: Liste des appariements optimaux.
+        """
+        span=B.shape[1]-1 if B.ndim==2 else 0
+        band=B.tolist()
+        outer=F.tolist()
+        seq=np.asarray(codes).tolist()
+        pairs=np.asarray(table).tolist()
+        m=minimal_loop_length
+        def cell(i,j):
+            return band[j][j-i] if 0<=j-i<=span else 0
+        def F_at(j):
+            return outer[j] if j>=0 else 0
+        fold=[]
+        stack=[]
+        steps=0
+        #boucle externe: intervalle (0,j)
+        j=len(seq)-1
+        while j>m:
+            steps+=1
+            if outer[j]==outer[j-1]:
+                j-=1
+                continue
+            for k in range(max(0,j-span),j-m):
+                p=pairs[seq[k]][seq[j]]
+                if p>0 and outer[j]==F_at(k-1)+p+cell(k+1,j-1):
+                    fold.append((k,j))
+                    stack.append((k+1,j-1))
+                    j=k-1
+                    break
+        #intérieur des paires: cases de la bande
+        while len(stack)>0:
+            i,j=stack.pop()
+            steps+=1
+            if j - i > m and j>0:
+                if cell(i,j)==cell(i,j-1):
+                    stack.append((i, j-1))
+                elif cell(i,j)==cell(i+1,j-1)+pairs[seq[i]][seq[j]] and pairs[seq[i]][seq[j]]>0:
+                    fold.append((i,j))
+                    stack.append((i+1, j-1))
+                else:
+                    for k in range(i+1,j-m):
+                        if cell(i,j)==cell(i,k-1)+pairs[seq[k]][seq[j]]+cell(k+1,j-1) and pairs[seq[k]][seq[j]]>0:
+                            fold.append((k,j))
+                            stack.append((i, k-1))
+                            stack.append((k+1, j-1))
+                            break
+        if counters is not None:
+            counters["traceback_steps"]=counters.get("traceback_steps",0)+steps
+        return fold
+
+    @staticmethod
+    def fill(codes,table,minimal_loop_length,backend="numpy",workers=None,tile_size=128,pointers=False,progress=None):
+        """
+        Remplit la matrice de scores d'une séquence encodée.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            backend (str, optionnel): 'numpy', 'numba', 'wavefront' ou 'tiled'. Par défaut à 'numpy'.
+            workers (int, optionnel): Nombre de threads du moteur 'wavefront'. Par défaut au nombre de cœurs.
+            tile_size (int, optionnel): Taille des blocs du moteur 'tiled'. Par défaut à 128.
+            pointers (bool, optionnel): Enregistre aussi les pointeurs de retour pendant le remplissage. Par défaut à False.
+            progress (callable, optionnel): Rappel progress(fraction) appelé pendant le remplissage. Par défaut à None.
+
+        Returns:
+            numpy.ndarray: Matrice de scores remplie, ou le tuple (M, case, split) si pointers est vrai.
+        """
+        if backend=="tiled":
+            return Nussinov_kernels.fill_tiled(codes,table,minimal_loop_length,tile_size,pointers=pointers,progress=progress)
+        if backend=="wavefront":
+            return Nussinov_kernels.fill_wavefront(codes,table,minimal_loop_length,workers,pointers=pointers,progress=progress)
+        if backend=="numba":
+            return Nussinov_kernels.__fill_numba(codes,table,minimal_loop_length,pointers,progress)
+        result=Nussinov_kernels.fill_batch(np.asarray(codes)[None,:],table,minimal_loop_length,pointers=pointers,progress=progress)
+        if pointers:
+            return tuple(a[0] for a in result)
+        return result[0]
+
+    @staticmethod
+    def traceback(M,codes,table,minimal_loop_length,backend="numpy",counters=None):
+        """
+        Effectue le traceback par pile d'une matrice de scores.
+
+        Args:
+            M (numpy.ndarray): Matrice de scores.
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            backend (str, optionnel): 'numpy', 'numba', 'wavefront' ou 'tiled'. Par défaut à 'numpy'.
+            counters (dict, optionnel): Compteurs où ajouter le nombre de cases visitées ('traceback_steps'). Par défaut à None.
+
+        Returns:
+            list: Liste des appariements optimaux.
+        """
+        if backend=="numba":
+            fold,steps=_jit(_traceback_compiled)(np.ascontiguousarray(M,dtype=np.int64),np.ascontiguousarray(codes),np.ascontiguousarray(table,dtype=np.int64),int(minimal_loop_length))
+            if counters is not None:
+                counters["traceback_steps"]=counters.get("traceback_steps",0)+int(steps)
+            return [(int(i),int(j)) for i,j in fold]
+        return Nussinov_kernels.traceback_stack(M,codes,table,minimal_loop_length,counters=counters)
+
+    @staticmethod
+    def traceback_pointers(case,split,counters=None,start=None):
+        """
+        Effectue le traceback en suivant les pointeurs de retour, en O(n).
+
+        Les choix suivent les priorités de traceback_stack, la structure obtenue est donc identique.
+
+        Args:
+            case (numpy.ndarray): Codes des cas optimaux.
+            split (numpy.ndarray): Premiers points de coupure optimaux.
+            counters (dict, optionnel): Compteurs où ajouter le nombre de cases visitées ('traceback_steps'). Par défaut à None.
+            start (tuple, optionnel): Intervalle (i,j) à retracer. Par défaut à toute la séquence.
+
+        Returns:
+            list: Liste des appariements optimaux.
+        """
+        stack=[(0,len(case)-1) if start is None else start]
+        fold=[]
+        steps=0
+        while len(stack)>0:
+            i,j=stack.pop()
+            steps+=1
+            if j<=i:
+                continue
+            flags=int(case[i,j])
+            if flags&1:
+                stack.append((i, j-1))
+            elif flags&2:
+                fold.append((i,j))
+                stack.append((i+1, j-1))
+            elif flags&4:
+                k=int(split[i,j])
+                fold.append((k,j))
+                stack.append((i, k-1))
+                stack.append((k+1, j-1))
+        if counters is not None:
+            counters["traceback_steps"]=counters.get("traceback_steps",0)+steps
+        return fold
+
+    @staticmethod
+    def refill(M,codes,table,minimal_loop_length,lo,hi,backend="numpy"):
+        """
+        Met à jour en place une matrice de scores après la modification des positions lo à hi.
+
+        Seules les cases (i,j) avec i<=hi et j>=lo dépendent de ces positions:
+        elles sont recalculées colonne par colonne, les autres sont conservées.
+
+        Args:
+            M (numpy.ndarray): Matrice de scores remplie pour l'ancienne séquence.
+            codes (numpy.ndarray): Codes de la nouvelle séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            lo (int): Première position modifiée.
+            hi (int): Dernière position modifiée.
+            backend (str, optionnel): 'numba' pour le noyau compilé, sinon NumPy. Par défaut à 'numpy'.
+
+        Returns:
+            int: Nombre de cases recalculées.
+        """
+        m=int(minimal_loop_length)
+        if backend=="numba":
+            return int(_jit(_refill_compiled)(M,np.ascontiguousarray(codes),np.ascontiguousarray(table,dtype=np.int64),m,int(lo),int(hi)))
+        codes=np.asarray(codes)
+        table=np.asarray(table)
+        n=len(codes)
+        neg=np.iinfo(np.int64).min//2
+        cells=0
+        for j in range(max(lo,m+1,1),n):
+            rows=j-m
+            R=min(hi+1,rows)
+            if R<=0:
+                continue
+            pair=table[codes[:rows],codes[j]]
+            V=pair+M[1:rows+1,j-1]
+            best=np.maximum(M[:R,j-1],V[:R])
+            if rows>1:
+                #point de coupure k=t+1, valide si k>i
+                W=M[:R,:rows-1]+np.where(pair[1:rows]>0,V[1:rows],neg)[None,:]
+                W[np.arange(R)[:,None]>np.arange(rows-1)[None,:]]=neg
+                best=np.maximum(best,W.max(axis=1))
+            M[:R,j]=best
+            cells+=R
+        return cells
+
+    @staticmethod
+    def outside(M,codes,table,minimal_loop_length):
+        """
+        Calcule la matrice « outside » associée à une matrice de scores remplie.
+
+        O[a,b] est le meilleur score des paires placées hors de l'intervalle [a,b]
+        parmi les structures dont le découpage (celui du remplissage) passe par
+        [a,b]: O[a,b]+M[a,b] est le meilleur score d'une telle structure. Un
+        intervalle [a,b] est obtenu d'un intervalle parent (i,j) par l'un des cas
+        du remplissage: 1: j non apparié (a=i, b=j-1), 2: paire (i,j) (a=i+1,
+        b=j-1), 3: partie gauche d'un point de coupure k=b+1 (a=i, arg=j), 4:
+        intérieur de la paire (k,j) d'un point de coupure k=a-1 (b=j-1, arg=i).
+
+        W[k,j] est le meilleur score hors de [k,j] d'une structure contenant la
+        paire (k,j), calculé pour tous les couples j-k>minimal_loop_length, même
+        non appariables: il donne le score d'une paire créée par une mutation.
+        W_arg vaut -1 si la paire ferme l'intervalle [k,j] (cas 2), sinon le
+        début i de l'intervalle parent (cas 3).
+
+        Les colonnes sont calculées de droite à gauche, chacune vectorisée sur
+        les lignes, en O(n³) comme le remplissage.
+
+        Args:
+            M (numpy.ndarray): Matrice de scores remplie.
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+
+        Returns:
+            tuple: (O, rule, arg, W, W_arg); les cases inaccessibles valent Nussinov_kernels.NEG.
+        """
+        M=np.asarray(M,dtype=np.int64)
+        codes=np.asarray(codes)
+        n=len(codes)
+        m=int(minimal_loop_length)
+        neg=Nussinov_kernels.NEG
+        O=np.full((n,n),neg,dtype=np.int64)
+        rule=np.zeros((n,n),dtype=np.int8)
+        arg=np.full((n,n),-1,dtype=np.int32)
+        W=np.full((n,n),neg,dtype=np.int64)
+        W_arg=np.full((n,n),-1,dtype=np.int32)
+        if n==0:
+            return O,rule,arg,W,W_arg
+        P=np.asarray(table,dtype=np.int64)[codes[:,None],codes[None,:]]
+        O[0,n-1]=0
+        rows=np.arange(n)
+        for j in range(n-1,0,-1):
+            outj=O[:j+1,j]
+            #R[k] = max_{i<k} O[i,j]+M[i,k-1], pour k=1..j
+            Z=outj[:j,None]+M[:j,:j]
+            Z[rows[:j,None]>rows[None,:j]]=neg
+            R=np.full(j+1,neg,dtype=np.int64)
+            R_arg=np.full(j+1,-1,dtype=np.int32)
+            R_arg[1:]=Z.argmax(axis=0)
+            R[1:]=Z[R_arg[1:],rows[:j]]
+            #paires (k,j) possibles: j-k>m
+            kmax=j-m
+            if kmax>0:
+                own=outj[:kmax]
+                cols=np.where(own>=R[:kmax],-1,R_arg[:kmax])
+                W[:kmax,j]=np.maximum(own,R[:kmax])
+                W_arg[:kmax,j]=cols
+            #colonne b=j-1 de O
+            b=j-1
+            a=rows[:b+1]
+            best=np.full(b+1,neg,dtype=np.int64)
+            how=np.zeros(b+1,dtype=np.int8)
+            where=np.full(b+1,-1,dtype=np.int32)
+            #cas 1: parent (a,j) non apparié en j
+            c1=np.where(j-a>m,outj[:b+1],neg)
+            better=c1>best
+            best=np.where(better,c1,best)
+            how[better]=1
+            #cas 2: parent (a-1,j) apparié
+            if b>=1:
+                c2=np.full(b+1,neg,dtype=np.int64)
+                valid=(j-(a[1:]-1)>m)&(P[a[1:]-1,j]>0)
+                c2[1:]=np.where(valid,outj[:b]+P[a[1:]-1,j],neg)
+                better=c2>best
+                best=np.where(better,c2,best)
+                how[better]=2
+            #cas 3: partie gauche [a,k-1] d'un point de coupure k=j, parent (a,J)
+            first=j+m+1
+            if first<n:
+                Js=np.arange(first,n)
+                T=np.where(P[j,Js]>0,P[j,Js]+M[j+1,Js-1],neg)
+                S=O[:b+1,first:]+T[None,:]
+                top=S.argmax(axis=1)
+                c3=S[a,top]
+                better=c3>best
+                best=np.where(better,c3,best)
+                how[better]=3
+                where[better]=(top+first)[better]
+            #cas 4: intérieur [k+1,j-1] de la paire (k,j), k=a-1, parent (i,j) avec i<k
+            if b>=2:
+                ks=a[2:]-1
+                valid=(j-ks>m)&(P[ks,j]>0)
+                c4=np.full(b+1,neg,dtype=np.int64)
+                c4[2:]=np.where(valid,R[ks]+P[ks,j],neg)
+                better=c4>best
+                best=np.where(better,c4,best)
+                how[better]=4
+                where[2:][better[2:]]=R_arg[ks][better[2:]]
+            best[best<neg//2]=neg
+            O[:b+1,b]=best
+            rule[:b+1,b]=how
+            arg[:b+1,b]=where
+        W[W<neg//2]=neg
+        return O,rule,arg,W,W_arg
+
+    @staticmethod
+    def fill_packed(P,codes,table,minimal_loop_length,j0,j1,progress=None,chunk=256):
+        """
+        Remplit en place les colonnes j0 à j1-1 d'une matrice triangulaire compactée par colonnes.
+
+        La case (i,j), i<=j, est rangée à l'indice j*(j+1)/2+i de P: chaque colonne
+        est contiguë, ce qui permet de remplir un np.memmap colonne par colonne et
+        de reprendre après la dernière colonne terminée. Avec numba la boucle est
+        compilée; sinon chaque colonne est vectorisée par groupes de chunk points de coupure.
+
+        Args:
+            P (numpy.ndarray): Matrice compactée de taille n*(n+1)/2, dont les colonnes précédentes sont remplies.
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            j0 (int): Première colonne.
+            j1 (int): Colonne de fin (exclue).
+            progress (callable, optionnel): Rappel progress(j) appelé après chaque colonne j terminée. Par défaut à None.
+            chunk (int, optionnel): Nombre de points de coupure traités à la fois sans numba. Par défaut à 256.
+        """
+        codes=np.ascontiguousarray(codes)
+        m=int(minimal_loop_length)
+        table=np.asarray(table)
+        if numba_mod:
+            table=np.ascontiguousarray(table,dtype=P.dtype)
+            width=1 if progress is not None else max(j1-j0,1)
+            #numba attend un tableau simple: la vue partage la mémoire du np.memmap
+            dense=np.asarray(P)
+            for start in range(j0,j1,width):
+                _jit(_fill_packed_compiled)(dense,codes,table,m,start,min(start+width,j1))
+                if progress is not None:
+                    progress(start)
+            return
+        table=table.astype(P.dtype)
+        neg=np.iinfo(P.dtype).min//2
+        for j in range(max(j0,1),j1):
+            rows=j-m
+            if rows>0:
+                #colonne j-1, complétée par M[j][j-1]=0
+                prev=np.zeros(j+1,dtype=P.dtype)
+                prev[:j]=P[(j-1)*j//2:(j-1)*j//2+j]
+                pair=table[codes[:rows],codes[j]]
+                best=np.maximum(prev[:rows],pair+prev[1:rows+1])
+                #V[k] = score de la paire (k,j) + M[k+1][j-1], ignoré si la paire est interdite
+                V=np.where(pair>0,pair+prev[1:rows+1],neg)
+                for k0 in range(1,rows,chunk):
+                    ks=np.arange(k0,min(k0+chunk,rows))
+                    i=np.arange(ks[-1])
+                    #M[i][k-1] est rangé à (k-1)k/2+i, valable pour i<k
+                    idx=((ks-1)*ks//2)[None,:]+i[:,None]
+                    valid=i[:,None]<ks[None,:]
+                    W=np.where(valid,P[np.where(valid,idx,0)]+V[ks][None,:],neg)
+                    np.maximum(best[:len(i)],W.max(axis=1),out=best[:len(i)])
+                P[j*(j+1)//2:j*(j+1)//2+rows]=best
+            if progress is not None:
+                progress(j)
+
+    @staticmethod
+    def traceback_packed(P,codes,table,minimal_loop_length,counters=None):
+        """
+        Effectue le traceback par pile directement sur une matrice triangulaire compactée.
+
+        Les choix suivent les priorités de traceback_stack; seules les cases
+        visitées sont lues, ce qui convient à un np.memmap.
+
+        Args:
+            P (numpy.ndarray): Matrice compactée par colonnes (voir fill_packed).
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            counters (dict, optionnel): Compteurs où ajouter le nombre de cases visitées ('traceback_steps'). Par défaut à None.
+
+        Returns:
+            list: Liste des appariements optimaux.
+        """
+        def get(i,j):
+            return int(P[j*(j+1)//2+i]) if i<=j else 0
+        seq=np.asarray(codes).tolist()
+        pairs=np.asarray(table).tolist()
+        stack=[(0,len(seq)-1)]
+        fold=[]
+        steps=0
+        while len(stack)>0:
+            i,j=stack.pop()
+            steps+=1
+            if j - i > minimal_loop_length and j>0:
+                value=get(i,j)
+                if value==get(i,j-1):
+                    stack.append((i, j-1))
+                elif value==get(i+1,j-1)+pairs[seq[i]][seq[j]] and pairs[seq[i]][seq[j]]>0:
+                    fold.append((i,j))
+                    stack.append((i+1, j-1))
+                else:
+                    ks=np.arange(i+1,j-minimal_loop_length)
+                    pair=np.asarray(table)[codes[ks],codes[j]]
+                    left=P[(ks-1)*ks//2+i]
+                    #M[k+1][j-1] vaut 0 sous la diagonale
+                    below=ks+1<=j-1
+                    right=np.where(below,P[np.where(below,(j-1)*j//2+ks+1,0)],0)
+                    ok=(left+pair+right==value) & (pair>0)
+                    if ok.any():
+                        k=int(ks[np.argmax(ok)])
+                        fold.append((k,j))
+                        stack.append((i, k-1))
+                        stack.append((k+1, j-1))
+        if counters is not None:
+            counters["traceback_steps"]=counters.get("traceback_steps",0)+steps
+        return fold
+
+    @staticmethod
+    def fill_batch(codes,table,minimal_loop_length,pointers=False,progress=None):
+        """
+        Remplit simultanément les matrices de scores d'un lot de séquences de même longueur.
+
+        Le calcul est vectorisé colonne par colonne sur l'ensemble du lot et des
+        lignes i. Une séquence plus courte peut être complétée à droite par des
+        positions non appariables sans modifier sa sous-matrice.
+
+        Args:
+            codes (numpy.ndarray): Codes des séquences, de taille (lot, n).
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            pointers (bool, optionnel): Enregistre aussi les pointeurs de retour. Par défaut à False.
+            progress (callable, optionnel): Rappel progress(fraction) appelé après chaque colonne. Par défaut à None.
+
+        Returns:
+            numpy.ndarray: Matrices de scores de taille (lot, n, n), ou le tuple (M, case, split) si pointers est vrai.
+        """
+        batch,n=codes.shape
+        M=np.zeros((batch,n,n),dtype=np.int64)
+        if pointers:
+            case=np.zeros((batch,n,n),dtype=np.int8)
+            split=np.full((batch,n,n),-1,dtype=np.int32)
+        neg=np.iinfo(np.int64).min//2
+        #lower[i,t] est vrai pour les points de coupure k=t+1 non valides (k<=i)
+        lower=np.tril(np.ones((n,n),dtype=bool),-1)
+        for j in range(minimal_loop_length+1,n):
+            rows=j-minimal_loop_length
+            #V[k] = score de la paire (k,j) + M[k+1][j-1]
+            pair=table[codes[:,:rows],codes[:,j,None]]
+            V=pair+M[:,1:rows+1,j-1]
+            c1=M[:,:rows,j-1]
+            c2=V
+            best=np.maximum(c1,c2)
+            if rows>1:
+                #les points de coupure sans paire autorisée ne dépassent jamais c1
+                W=M[:,:rows,:rows-1]+np.where(pair[:,1:rows]>0,V[:,1:rows],neg)[:,None,:]
+                W[:,lower[:rows,:rows-1]]=neg
+                c3=W.max(axis=2)
+                best=np.maximum(best,c3)
+            M[:,:rows,j]=best
+            if pointers:
+                flags=(c1==best).astype(np.int8)|(((c2==best)&(pair>0)).astype(np.int8)*2)
+                if rows>1:
+                    found=c3==best
+                    flags|=found.astype(np.int8)*4
+                    split[:,:rows,j]=np.where(found,W.argmax(axis=2)+1,-1)
+                case[:,:rows,j]=flags
+            if progress is not None:
+                progress((j-minimal_loop_length)/(n-minimal_loop_length-1))
+        if pointers:
+            return M,case,split
+        return M
+
+    @staticmethod
+    def fill_wavefront(codes,table,minimal_loop_length,workers=None,min_block=64,pointers=False,progress=None):
+        """
+        Remplit la matrice de scores diagonale par diagonale, en parallèle.
+
+        Toutes les cases d'une même diagonale j-i sont indépendantes: chaque
+        diagonale est découpée en blocs de lignes confiés à des threads, les
+        calculs NumPy sur les blocs relâchant le GIL. Une copie transposée de la
+        matrice est tenue à jour pour que les lectures de colonnes M[k+1][j-1]
+        soient contiguës.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            workers (int, optionnel): Nombre de threads. Par défaut au nombre de cœurs.
+            min_block (int, optionnel): Nombre minimal de cases par bloc. Par défaut à 64.
+            pointers (bool, optionnel): Enregistre aussi les pointeurs de retour. Par défaut à False.
+            progress (callable, optionnel): Rappel progress(fraction) appelé après chaque diagonale. Par défaut à None.
+
+        Returns:
+            numpy.ndarray: Matrice de scores remplie, ou le tuple (M, case, split) si pointers est vrai.
+        """
+        codes=np.ascontiguousarray(codes)
+        n=len(codes)
+        dtype=Nussinov_kernels.__score_dtype(n,table)
+        table=np.asarray(table).astype(dtype)
+        M=np.zeros((n,n),dtype=dtype)
+        MT=np.zeros((n,n),dtype=dtype)
+        if pointers:
+            case=np.zeros((n,n),dtype=np.int8)
+            split=np.full((n,n),-1,dtype=np.int32)
+        neg=np.iinfo(dtype).min//2
+        if workers is None:
+            workers=os.cpu_count() or 1
+        workers=max(int(workers),1)
+        flatM=M.reshape(-1)
+        flatMT=MT.reshape(-1)
+        item=M.itemsize
+
+        def block(d,i0,i1):
+            #Cases (i,i+d) pour i dans [i0,i1)
+            rows=np.arange(i0,i1)
+            cj=codes[rows+d]
+            c1=M[rows,rows+d-1]
+            pair=table[codes[rows],cj]
+            c2=MT[rows+d-1,rows+1]+pair
+            best=np.maximum(c1,c2)
+            L=d-minimal_loop_length-1
+            if L>0:
+                #M[i][i+s] et M[i+2+s][i+d-1] sont lus par des vues à pas constant
+                left=as_strided(flatM[i0*(n+1):],shape=(i1-i0,L),strides=((n+1)*item,item))
+                right=as_strided(flatMT[i0*(n+1)+(d-1)*n+2:],shape=(i1-i0,L),strides=((n+1)*item,item))
+                window=as_strided(codes[i0+1:],shape=(i1-i0,L),strides=(codes.strides[0],codes.strides[0]))
+                pk=table[window,cj[:,None]]
+                #les points de coupure sans paire autorisée ne dépassent jamais c1
+                W=left+right+np.where(pk>0,pk,neg)
+                c3=W.max(axis=1)
+                best=np.maximum(best,c3)
+            M[rows,rows+d]=best
+            MT[rows+d,rows]=best
+            if pointers:
+                flags=(c1==best).astype(np.int8)|(((c2==best)&(pair>0)).astype(np.int8)*2)
+                if L>0:
+                    found=c3==best
+                    flags|=found.astype(np.int8)*4
+                    split[rows,rows+d]=np.where(found,rows+1+W.argmax(axis=1),-1)
+                case[rows,rows+d]=flags
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for d in range(minimal_loop_length+1,n):
+                cells=n-d
+                nblocks=min(workers,max(cells//min_block,1))
+                bounds=[cells*b//nblocks for b in range(nblocks+1)]
+                if nblocks==1:
+                    block(d,0,cells)
+                else:
+                    list(executor.map(lambda b: block(d,bounds[b],bounds[b+1]),range(nblocks)))
+                if progress is not None:
+                    progress((d-minimal_loop_length)/(n-minimal_loop_length-1))
+        if pointers:
+            return M,case,split
+        return M
+
+    @staticmethod
+    def fill_tiled(codes,table,minimal_loop_length,tile_size=128,chunk=32,pointers=False,progress=None):
+        """
+        Remplit la matrice de scores par blocs carrés.
+
+        Les blocs sont traités par diagonale de blocs. Pour le bloc (I,J), la
+        contribution des points de coupure situés strictement entre les blocs I
+        et J ne dépend que de blocs déjà calculés: elle est obtenue par un
+        produit max-plus entre une tranche de lignes de M et une tranche de
+        colonnes lue dans une copie transposée de M. Les points de coupure
+        restants sont traités colonne par colonne à l'intérieur du bloc. Tous
+        les accès se font ainsi par tranches contiguës de taille bornée.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            tile_size (int, optionnel): Taille des blocs. Par défaut à 128.
+            chunk (int, optionnel): Nombre de points de coupure traités à la fois dans le produit max-plus. Par défaut à 32.
+            pointers (bool, optionnel): Enregistre aussi les pointeurs de retour. Par défaut à False.
+            progress (callable, optionnel): Rappel progress(fraction) appelé après chaque diagonale de blocs. Par défaut à None.
+
+        Returns:
+            numpy.ndarray: Matrice de scores remplie, ou le tuple (M, case, split) si pointers est vrai.
+        """
+        codes=np.ascontiguousarray(codes)
+        n=len(codes)
+        m=minimal_loop_length
+        dtype=Nussinov_kernels.__score_dtype(n,table)
+        table=np.asarray(table).astype(dtype)
+        M=np.zeros((n,n),dtype=dtype)
+        MT=np.zeros((n,n),dtype=dtype)
+        if pointers:
+            case=np.zeros((n,n),dtype=np.int8)
+            split=np.full((n,n),-1,dtype=np.int32)
+        b=max(int(tile_size),1)
+        nb=-(-n//b)
+        neg=np.iinfo(dtype).min//2
+        for D in range(nb):
+            for I in range(nb-D):
+                J=I+D
+                i0,i1=I*b,min((I+1)*b,n)
+                j0,j1=J*b,min((J+1)*b,n)
+                #Points de coupure t=k-1 entièrement connus: produit max-plus
+                t0,t1=i1,max(i1,j0-m-1)
+                partial=np.full((i1-i0,j1-j0),neg,dtype=dtype)
+                #premier point de coupure t atteignant partial
+                partial_t=np.full((i1-i0,j1-j0),-1,dtype=np.int64)
+                if D>=2 and t1>t0:
+                    left=M[i0:i1,t0:t1]
+                    pair=table[codes[t0+1:t1+1,None],codes[None,j0:j1]]
+                    #les points de coupure sans paire autorisée ne dépassent jamais c1
+                    right=np.where(pair>0,pair+MT[j0-1:j1-1,t0+2:t1+2].T,neg)
+                    for c in range(0,t1-t0,chunk):
+                        block=left[:,c:c+chunk,None]+right[None,c:c+chunk,:]
+                        block_max=block.max(axis=1)
+                        if pointers:
+                            better=block_max>partial
+                            partial_t[better]=(t0+c+block.argmax(axis=1))[better]
+                        np.maximum(partial,block_max,out=partial)
+                #Points de coupure restants, dans les blocs I et J
+                if D>=2:
+                    T=np.concatenate((np.arange(i0,i1),np.arange(t1,j1)))
+                else:
+                    T=np.arange(i0,j1)
+                for j in range(j0,j1):
+                    #Seules les lignes i<j-m sont calculées, les autres restent à 0
+                    r1=min(i1,j-m)
+                    if r1<=i0:
+                        continue
+                    rows=np.arange(i0,r1)
+                    c1=M[rows,j-1]
+                    pair=table[codes[rows],codes[j]]
+                    c2=MT[j-1,rows+1]+pair
+                    c3=partial[:r1-i0,j-j0]
+                    c3_t=partial_t[:r1-i0,j-j0]
+                    Tj=T[T<=j-m-2]
+                    if len(Tj)>0:
+                        pk=table[codes[Tj+1],codes[j]]
+                        W=M[i0:r1,Tj]+np.where(pk>0,pk+MT[j-1,Tj+2],neg)[None,:]
+                        W[Tj[None,:]<rows[:,None]]=neg
+                        W_max=W.max(axis=1)
+                        if pointers:
+                            W_t=Tj[W.argmax(axis=1)]
+                            #à score égal le point de coupure le plus à gauche est conservé
+                            take=(W_max>c3)|((W_max==c3)&(W_t<c3_t))
+                            c3_t=np.where(take,W_t,c3_t)
+                        c3=np.maximum(c3,W_max)
+                    best=np.maximum(np.maximum(c1,c2),c3)
+                    M[rows,j]=best
+                    MT[j,rows]=best
+                    if pointers:
+                        flags=(c1==best).astype(np.int8)|(((c2==best)&(pair>0)).astype(np.int8)*2)
+                        found=c3==best
+                        flags|=found.astype(np.int8)*4
+                        split[rows,j]=np.where(found,c3_t+1,-1)
+                        case[rows,j]=flags
+            if progress is not None:
+                progress((D+1)/nb)
+        if pointers:
+            return M,case,split
+        return M
+
+    @staticmethod
+    def traceback_stack(M,codes,table,minimal_loop_length,list_limit=2048,counters=None):
+        """
+        Effectue le traceback en utilisant une pile, avec les mêmes règles de priorité que Predict_structure.
+
+        Les petites matrices NumPy sont converties en listes; au-delà de list_limit
+        la matrice est lue directement et la recherche du point de coupure est vectorisée.
+
+        Args:
+            M (list ou numpy.ndarray): Matrice de scores.
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            list_limit (int, optionnel): Taille au-delà de laquelle la matrice n'est pas convertie en listes. Par défaut à 2048.
+            counters (dict, optionnel): Compteurs où ajouter le nombre de cases visitées ('traceback_steps'). Par défaut à None.
+
+        Returns:
+            list: Liste des appariements optimaux.
+        """
+        array_mode=isinstance(M,np.ndarray) and M.shape[0]>list_limit
+        if isinstance(M,np.ndarray) and not array_mode:
+            M=M.tolist()
+        seq=np.asarray(codes).tolist()
+        pairs=np.asarray(table).tolist()
+        stack=[(0,len(seq)-1)]
+        fold=[]
+        steps=0
+        while len(stack)>0:
+            i,j=stack.pop()
+            steps+=1
+            if j - i > minimal_loop_length and j>0:
+                if M[i][j]==M[i][j-1]:
+                    stack.append((i, j-1))
+                elif M[i][j]==M[i+1][j-1]+pairs[seq[i]][seq[j]] and pairs[seq[i]][seq[j]]>0:
+                    fold.append((i,j))
+                    stack.append((i+1, j-1))
+                elif array_mode:
+                    k=Nussinov_kernels.__split_point(M,codes,table,minimal_loop_length,i,j)
+                    if k is not None:
+                        fold.append((k,j))
+                        stack.append((i, k-1))
+                        stack.append((k+1, j-1))
+                else:
+                    for k in range(i+1,j-minimal_loop_length):
+                        if M[i][j]==M[i][k-1]+pairs[seq[k]][seq[j]]+M[k+1][j-1] and pairs[seq[k]][seq[j]]>0:
+                            fold.append((k,j))
+                            stack.append((i, k-1))
+                            stack.append((k+1, j-1))
+                            break
+        if counters is not None:
+            counters["traceback_steps"]=counters.get("traceback_steps",0)+steps
+        return fold
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    @staticmethod
+    def __fill_numba(codes,table,minimal_loop_length,pointers=False,progress=None,steps=100):
+        """
+        Remplit la matrice de scores avec les noyaux compilés, par groupes de colonnes si un rappel est donné.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            pointers (bool, optionnel): Enregistre aussi les pointeurs de retour. Par défaut à False.
+            progress (callable, optionnel): Rappel progress(fraction) appelé après chaque groupe de colonnes. Par défaut à None.
+            steps (int, optionnel): Nombre de groupes de colonnes quand progress est donné. Par défaut à 100.
+
+        Returns:
+            numpy.ndarray: Matrice de scores remplie, ou le tuple (M, case, split) si pointers est vrai.
+        """
+        codes=np.ascontiguousarray(codes)
+        table=np.ascontiguousarray(table,dtype=np.int64)
+        m=int(minimal_loop_length)
+        n=len(codes)
+        M=np.zeros((n,n),dtype=np.int64)
+        if pointers:
+            case=np.zeros((n,n),dtype=np.int8)
+            split=np.full((n,n),-1,dtype=np.int32)
+        width=max(n,1) if progress is None else max(-(-n//steps),1)
+        for j0 in range(0,n,width):
+            j1=min(j0+width,n)
+            if pointers:
+                _jit(_fill_pointers_compiled)(M,case,split,codes,table,m,j0,j1)
+            else:
+                _jit(_fill_compiled)(M,codes,table,m,j0,j1)
+            if progress is not None:
+                progress(j1/n)
+        if pointers:
+            return M,case,split
+        return M
+
+    @staticmethod
+    def __score_dtype(n,table):
+        """
+        Choisit le type entier des matrices de scores.
+
+        Args:
+            n (int): Longueur de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+
+        Returns:
+            numpy.dtype: int32 tant que le score maximal possible ne déborde pas, sinon int64.
+        """
+        if n//2*max(int(np.asarray(table).max()),0)<np.iinfo(np.int32).max:
+            return np.int32
+        return np.int64
+
+    @staticmethod
+    def __split_point(M,codes,table,minimal_loop_length,i,j):
+        """
+        Recherche vectorisée du premier point de coupure k optimal pour la case (i,j).
+
+        Args:
+            M (numpy.ndarray): Matrice de scores.
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            i (int): Indice de début.
+            j (int): Indice de fin.
+
+        Returns:
+            int: Le premier k tel que (k,j) soit appariée dans une solution optimale, ou None.
+        """
+        ks=np.arange(i+1,j-minimal_loop_length)
+        if len(ks)==0:
+            return None
+        pair=np.asarray(table)[codes[ks],codes[j]]
+        ok=(M[i,ks-1]+pair+M[ks+1,j-1]==M[i,j]) & (pair>0)
+        if not ok.any():
+            return None
+        return int(ks[np.argmax(ok)])
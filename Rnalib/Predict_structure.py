@@ -9,13 +9,13 @@ import numpy as np
 from .Rna_seq import Rna_seq
 from .Scores import Scores
 from .Rna_structure import Rna_structure
+from .Nussinov_kernels import Nussinov_kernels
+from .Disk_matrix import Disk_matrix
 import time
-
-try:
-    import pandas as pd
-    pandas_mod=True
-except:
-    pandas_mod=False
+import sys
+import json
+import heapq
+import threading
     
 class Predict_structure:
     """
@@ -31,8 +31,23 @@ class Predict_structure:
         __skipPredAll (bool): Indicateur pour sauter la prédiction de toutes les structures.
         __use_recurse (bool): Indicateur pour utiliser la récursion.
         __bases_scores (Scores): Scores des bases de l'ARN.
+        __backend (str): Moteur de calcul utilisé ('python', 'numpy', 'numba', 'wavefront' ou 'tiled').
+        __workers (int): Nombre de threads du moteur 'wavefront'.
+        __tile_size (int): Taille des blocs du moteur 'tiled'.
+        __use_pointers (bool): Indicateur d'enregistrement des pointeurs de retour.
+        __pointers (tuple): Pointeurs de retour (case, split) ou None.
+        __metrics (dict): Durées par phase et compteurs de la dernière prédiction.
+        __counters (dict): Compteurs de la prédiction en cours.
+        __progress (callable): Rappel de progression progress(phase, valeur).
+        __cancel (threading.Event): Demande d'arrêt de la prédiction en cours (cancel()).
+        __timeout (float): Durée maximale d'une prédiction en secondes.
+        __max_structures (int): Nombre maximal de structures optimales énumérées.
+        __deadline (float): Instant limite de la prédiction en cours.
+        __complete (bool): Indicateur d'énumération complète des structures optimales.
+        __matrix_file (str): Fichier de la matrice sur disque, ou None.
+        __metrics_hook (callable): Fonction appelée avec __metrics après chaque prédiction.
     """
-    def __init__(self,rnaSeq: Rna_seq,minloop=3,skipPredAll=False,use_recurse=False,bases_scores=None): 
+    def __init__(self,rnaSeq: Rna_seq,minloop=3,skipPredAll=False,use_recurse=False,bases_scores=None,backend="auto",workers=None,tile_size=128,backpointers=False,metrics_hook=None,progress=None,timeout=None,max_structures=None,matrix_file=None): 
         """
         Initialise une instance de Predict_structure.
 
@@ -42,9 +57,32 @@ class Predict_structure:
             skipPredAll (bool, optionnel): Indicateur pour sauter la prédiction de toutes les structures. Par défaut à False.
             use_recurse (bool, optionnel): Indicateur pour utiliser la récursion. Par défaut à False.
             bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            backend (str, optionnel): Moteur de calcul du remplissage et du traceback: 'python', 'numpy', 'numba',
+                'wavefront' (diagonales remplies en parallèle), 'tiled' (remplissage par blocs, pour les ARN de
+                plusieurs kb) ou 'auto' (numba s'il est installé, sinon python). Par défaut à 'auto'.
+            workers (int, optionnel): Nombre de threads du moteur 'wavefront'. Par défaut au nombre de cœurs.
+            tile_size (int, optionnel): Taille des blocs du moteur 'tiled'. Par défaut à 128.
+            backpointers (bool, optionnel): Enregistre les pointeurs de retour (5 octets par case) pour des tracebacks
+                en O(n) sans réévaluer les cas. Par défaut à False.
+            metrics_hook (callable, optionnel): Fonction appelée avec le dictionnaire des métriques (voir metrics)
+                après chaque prédiction. Par défaut à None.
+            progress (callable, optionnel): Rappel progress(phase, valeur) appelé avec ('fill', part des colonnes ou
+                diagonales remplies) puis ('enumeration', nombre de structures énumérées). Un rappel qui retourne
+                False demande l'arrêt de la prédiction, comme cancel(). Par défaut à None.
+            timeout (float, optionnel): Durée maximale de la prédiction en secondes. Dépassée pendant le remplissage,
+                elle lève TimeoutError; pendant l'énumération, les structures déjà trouvées sont conservées.
+                Par défaut à None.
+            max_structures (int, optionnel): Nombre maximal de structures optimales énumérées. Par défaut à None.
+            matrix_file (str, optionnel): Fichier où la matrice est remplie en place (Disk_matrix), pour les séquences
+                dont la matrice ne tient pas en mémoire. Un remplissage interrompu reprend au dernier point de reprise
+                et le traceback lit directement le fichier. Par défaut à None.
 
         Raises:
-            Exception: Si rnaSeq n'est pas un objet Rna_seq ou si bases_scores n'est pas un objet Scores.
+            Exception: Si rnaSeq n'est pas un objet Rna_seq, si bases_scores n'est pas un objet Scores
+                ou si le moteur demandé n'est pas disponible.
+            TimeoutError: Si timeout est dépassé avant la fin du remplissage.
+            Exception: Si l'arrêt est demandé avant la fin du remplissage.
+            Exception: Si backpointers est demandé avec matrix_file.
         """
         if not isinstance(rnaSeq,Rna_seq):
             raise Exception("'{}' n'est pas un objet Rna_seq".format(rnaSeq))
@@ -56,6 +94,29 @@ class Predict_structure:
         else:
             raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
             
+        if backend=="auto":
+            backend="numba" if "numba" in Nussinov_kernels.available_backends() else "python"
+        if backend not in Nussinov_kernels.available_backends():
+            raise Exception("moteur de calcul '{}' non disponible (choix: {})".format(backend,", ".join(Nussinov_kernels.available_backends())))
+        self.__backend=backend
+        self.__workers=workers
+        self.__tile_size=tile_size
+        self.__use_pointers=backpointers
+        self.__pointers=None
+        self.__metrics={}
+        self.__counters={}
+        self.__metrics_hook=metrics_hook
+        self.__progress=progress
+        self.__cancel=threading.Event()
+        self.__timeout=timeout
+        self.__max_structures=max_structures
+        self.__deadline=None
+        self.__complete=True
+        self.__suboptimal_complete=True
+        if matrix_file is not None and backpointers:
+            raise Exception("les pointeurs de retour ne sont pas disponibles avec une matrice sur disque")
+        self.__matrix_file=matrix_file
+            
         self.__rna=rnaSeq
         self.__minimal_loop_length = int(minloop)
         self.__matrix=None
@@ -87,8 +148,12 @@ class Predict_structure:
         """
         Retourne la matrice de calcul de structure.
 
+        Le type dépend du moteur : liste de listes pour 'python', numpy.ndarray
+        pour les autres moteurs (y compris 'auto' lorsque numba est installé),
+        Disk_matrix avec matrix_file. np.asarray(matrix) donne un tableau dans tous les cas.
+
         Returns:
-            None: Matrice pour les calculs de structure.
+            list, numpy.ndarray ou Disk_matrix: Matrice pour les calculs de structure.
         """
         return self.__matrix
     
@@ -122,6 +187,62 @@ class Predict_structure:
         """
         return self.__bases_scores
     
+    @property
+    def backend(self):
+        """
+        Retourne le moteur de calcul utilisé.
+
+        Returns:
+            str: 'python', 'numpy', 'numba', 'wavefront' ou 'tiled'.
+        """
+        return self.__backend
+    
+    @property
+    def backpointers(self):
+        """
+        Retourne les pointeurs de retour enregistrés pendant le remplissage.
+
+        Returns:
+            tuple: (case, split), voir Nussinov_kernels, ou None si backpointers=False.
+        """
+        return self.__pointers
+    
+    @property
+    def metrics(self):
+        """
+        Retourne les métriques de la dernière prédiction.
+
+        'phases' donne la durée en secondes de l'encodage, du remplissage, du traceback,
+        de l'énumération des structures optimales et de la construction des Rna_structure
+        et de leurs arbres. 'counters' donne le nombre de cases calculées, de points de
+        coupure examinés, de cases visitées par le traceback, de branches explorées par
+        l'énumération et la taille maximale des matrices en octets.
+
+        Returns:
+            dict: Dictionnaire {'backend', 'length', 'phases', 'counters'}.
+        """
+        return self.__metrics
+    
+    @property
+    def complete(self):
+        """
+        Indique si toutes les structures optimales ont été énumérées.
+
+        Returns:
+            bool: False si l'énumération a été arrêtée par timeout, max_structures ou cancel().
+        """
+        return self.__complete
+
+    @property
+    def suboptimal_complete(self):
+        """
+        Indique si la dernière énumération de suboptimal_structures() est allée à son terme.
+
+        Returns:
+            bool: False si elle a été arrêtée par max_structures ou max_memory.
+        """
+        return self.__suboptimal_complete
+    
     @property
     def structures_nbr(self):
         """
@@ -150,8 +271,11 @@ class Predict_structure:
         out_lines.append("paramètres: [θ={} - {}]".format(self.__minimal_loop_length,show_scores))
         out_lines.append("score max = {}".format(self.__structure.score))
         if len(self.__all_structures)>0:
-            out_lines.append("Nombre de structures optimales: {}".format(len(self.__all_structures)))
+            out_lines.append("Nombre de structures optimales: {}{}".format(len(self.__all_structures),"" if self.__complete else " (énumération interrompue)"))
         out_lines.append("temps de calcul: {}s".format(self.__predict_time))
+        if self.__metrics:
+            out_lines.append("phases: "+" - ".join("{}={:.4f}s".format(k,v) for k,v in self.__metrics['phases'].items()))
+            out_lines.append("compteurs: "+" - ".join("{}={}".format(k,v) for k,v in self.__metrics['counters'].items()))
         maxlength=max([len(v) for v in out_lines])
         stdout="*"*maxlength+"\n"
         stdout+="\n".join(out_lines)+"\n"
@@ -195,34 +319,196 @@ class Predict_structure:
                     outall.write(outstruct)
             else:
                 print(outstruct)
+
+    def suboptimal_structures(self,delta,max_structures=None,max_memory=None):
+        """
+        Énumère les structures dont le score est à moins de delta du score optimal.
+
+        L'énumération (à la Wuchty) relit la matrice déjà remplie, sans nouveau
+        repliement. Chaque état partiel porte une borne exacte (score des paires
+        déjà choisies plus les valeurs de la matrice sur les intervalles restants) :
+        les états sont développés du meilleur au moins bon, si bien que les
+        structures sortent par score décroissant, chacune une seule fois. Les
+        paires et les intervalles restants sont des listes chaînées partagées entre
+        états, chaque état n'ajoute donc que quelques tuples.
+
+        Args:
+            delta (int): Écart maximal au score optimal.
+            max_structures (int, optionnel): Nombre maximal de structures produites. Par défaut à None.
+            max_memory (int, optionnel): Taille estimée maximale, en octets, des états en attente. Par défaut à None.
+
+        Yields:
+            Rna_structure: Structures par score décroissant.
+        """
+        M=self.__matrix
+        if isinstance(M,np.ndarray):
+            M=M.tolist()
+        if isinstance(M,Disk_matrix):
+            M=M.rows()
+        cell=lambda i,j: M[i][j]
+        codes=self.__rna.encoded
+        table=self.__code_table
+        minloop=self.__minimal_loop_length
+        size=len(codes)
+        best=cell(0,size-1) if size>0 else 0
+        floor=best-delta
+        state_bytes=sys.getsizeof((0,0,None,None))+5*sys.getsizeof((0,None))
+        heap=[(-best,0,None,((0,size-1),None))]
+        pushed=0
+        produced=0
+        self.__suboptimal_complete=True
+        while heap:
+            neg,_,fold,stack=heapq.heappop(heap)
+            while stack is not None and stack[0][1]-stack[0][0]<=minloop:
+                stack=stack[1]
+            if stack is None:
+                pairs=[]
+                while fold is not None:
+                    pairs.append(fold[0])
+                    fold=fold[1]
+                yield Rna_structure(self.__rna,fold=pairs,scores=self.__bases_scores)
+                produced+=1
+                if max_structures is not None and produced>=max_structures and heap:
+                    self.__suboptimal_complete=False
+                    return
+                continue
+            (i,j),rest=stack
+            base=-neg-cell(i,j)
+            children=[(base+cell(i,j-1),fold,((i,j-1),rest))]
+            p=table[codes[i]][codes[j]]
+            if p>0:
+                children.append((base+p+cell(i+1,j-1),((i,j),fold),((i+1,j-1),rest)))
+            pair_j=[row[codes[j]] for row in table]
+            for k in range(i+1,j-minloop):
+                p=pair_j[codes[k]]
+                if p>0:
+                    children.append((base+cell(i,k-1)+p+cell(k+1,j-1),((k,j),fold),((i,k-1),((k+1,j-1),rest))))
+            for bound,child_fold,child_stack in children:
+                if bound>=floor:
+                    pushed+=1
+                    heapq.heappush(heap,(-bound,-pushed,child_fold,child_stack))
+            if max_memory is not None and len(heap)*state_bytes>max_memory:
+                self.__suboptimal_complete=False
+                return
                 
-    def export_matrixt_to_csv(self,outcsv,sep=","):
+    def export_matrixt_to_csv(self,outcsv,sep=",",chunk_rows=256):
         """
 	    Exporte la matrice des scores vers un fichier CSV.
 
+	    Les lignes sont formatées par blocs de chunk_rows, une seule opération de
+	    formatage par ligne.
+
 	    Args:
 		outcsv (str): Nom du fichier CSV de sortie.
 		sep (str, optionnel): Séparateur pour le fichier CSV. Par défaut à ",".
+		chunk_rows (int, optionnel): Nombre de lignes formatées à la fois. Par défaut à 256.
 	    """
         size_rna=len(self.__rna.seq)
+        row_format=sep.join(["%s"]+["%d"]*size_rna)+"\n"
         with open(outcsv,"w") as outc:
             outc.write(sep.join([" "]+[v for v in self.__rna.seq])+"\n")
-            for i in range(size_rna):
-                out_line=sep.join([self.__rna.seq[i]]+[str(v) for v in self.__matrix[i]])
-                outc.write("{}\n".format(out_line))
+            for start in range(0,size_rna,chunk_rows):
+                rows=range(start,min(start+chunk_rows,size_rna))
+                if isinstance(self.__matrix,np.ndarray):
+                    block=self.__matrix[start:rows.stop].tolist()
+                else:
+                    block=[list(self.__matrix[i]) for i in rows]
+                outc.write("".join(row_format % (self.__rna.seq[i],*row) for i,row in zip(rows,block)))
+    
+    def export_matrix(self,filename):
+        """
+	    Exporte la matrice des scores au format binaire compressé NumPy (.npz).
+
+	    Seul le triangle supérieur est enregistré, compacté colonne par colonne
+	    (la case (i,j), i<=j, à l'indice j*(j+1)/2+i, comme Disk_matrix), avec la
+	    séquence et les paramètres de la prédiction.
+
+	    Args:
+		filename (str): Nom du fichier .npz de sortie.
+	    """
+        if isinstance(self.__matrix,Disk_matrix):
+            packed=np.asarray(self.__matrix.data)
+        else:
+            M=np.asarray(self.__matrix)
+            packed=M.T[np.tril_indices(len(M))]
+        np.savez_compressed(filename,triangle=packed,seq_id=np.array(self.__rna.id),seq=np.array(self.__rna.seq),
+                            minloop=np.array(self.__minimal_loop_length),
+                            scores=np.array(json.dumps(self.__bases_scores.scores)),backend=np.array(self.__backend))
+    
+    @staticmethod
+    def load_matrix(filename,packed=False):
+        """
+	    Charge une matrice des scores exportée par export_matrix.
+
+	    Args:
+		filename (str): Nom du fichier .npz.
+		packed (bool, optionnel): Retourne le triangle compacté plutôt que la matrice carrée. Par défaut à False.
+
+	    Returns:
+		tuple: (Rna_seq, matrice numpy.ndarray, dictionnaire des paramètres 'minloop', 'scores' et 'backend').
+	    """
+        with np.load(filename) as data:
+            rna=Rna_seq(str(data["seq_id"]),str(data["seq"]))
+            infos={"minloop":int(data["minloop"]),"scores":json.loads(str(data["scores"])),"backend":str(data["backend"])}
+            triangle=data["triangle"]
+        if packed:
+            return rna,triangle,infos
+        size=len(rna.seq)
+        M=np.zeros((size,size),dtype=triangle.dtype)
+        M.T[np.tril_indices(size)]=triangle
+        return rna,M,infos
             
     def print_matrix(self):
         """
 	    Affiche la matrice des scores.
 
 	    Utilise pandas pour un affichage formaté si disponible, sinon utilise numpy.
+	    pandas n'est importé qu'ici.
 	    """
-        if pandas_mod:
+        try:
+            import pandas as pd
+        except ImportError:
+            pd=None
+        if pd is not None:
             bases = [*self.__rna.seq]
-            print(pd.DataFrame(np.array(self.__matrix), index = bases, columns = bases))
+            print(pd.DataFrame(np.asarray(self.__matrix), index = bases, columns = bases))
         else:
-            print(np.array(self.__matrix))
+            print(np.asarray(self.__matrix))
     
+    @staticmethod
+    def add_metrics(total,metrics):
+        """
+        Ajoute les durées et les compteurs d'une prédiction à un total.
+
+        Permet aux traitements par lots d'agréger les métriques reçues par metrics_hook.
+
+        Args:
+            total (dict): Métriques cumulées, modifiées en place (un dictionnaire vide convient).
+            metrics (dict): Métriques d'une prédiction.
+
+        Returns:
+            dict: Le total mis à jour.
+        """
+        total["predictions"]=total.get("predictions",0)+metrics.get("predictions",1)
+        for group in ("phases","counters"):
+            values=total.setdefault(group,{})
+            for k,v in metrics[group].items():
+                if k=="matrix_bytes":
+                    values[k]=max(values.get(k,0),v)
+                else:
+                    values[k]=values.get(k,0)+v
+        return total
+
+    def cancel(self):
+        """
+        Demande l'arrêt de la prédiction en cours, par exemple depuis un autre thread.
+
+        Pendant l'énumération, les structures optimales déjà trouvées sont
+        conservées et complete vaut False; pendant le remplissage, la prédiction
+        lève une exception. La demande est effacée au début de la prédiction suivante.
+        """
+        self.__cancel.set()
+
     def structures_prediction(self,skipPredAll=False,use_recurse=False):
         """
 	    Prédit les structures d'ARN en remplissant la matrice des scores et en effectuant le traceback.
@@ -230,29 +516,99 @@ class Predict_structure:
 	    Args:
 		skipPredAll (bool, optionnel): Indicateur pour sauter la prédiction de toutes les structures. Par défaut à False.
 		use_recurse (bool, optionnel): Indicateur pour utiliser la récursion. Par défaut à False.
+
+	    Raises:
+		TimeoutError: Si timeout est dépassé avant la fin du remplissage.
+		Exception: Si l'arrêt est demandé (cancel() ou progress retournant False) avant la fin du remplissage.
 	    """
         start_time=time.time()
+        phases={"encoding":0.0,"fill":0.0,"traceback":0.0,"enumeration":0.0,"structure":0.0}
+        counters=Nussinov_kernels.fill_counters(len(self.__rna.seq),self.__minimal_loop_length)
+        counters.update({"traceback_steps":0,"branches":0})
+        self.__counters=counters
+        self.__deadline=None if self.__timeout is None else time.perf_counter()+self.__timeout
+        self.__complete=True
+        self.__cancel.clear()
+        fill_progress=self.__fill_progress
         #Remplit la matrice des scores
-        self.__matrix=self.__fill_mat(self.__rna.seq,self.__minimal_loop_length)
+        self.__pointers=None
+        self.__code_table=self.__bases_scores.code_table
+        if self.__matrix_file is not None:
+            tic=time.perf_counter()
+            codes=self.__rna.codes
+            table=self.__bases_scores.pair_table
+            phases["encoding"]=time.perf_counter()-tic
+            tic=time.perf_counter()
+            self.__matrix=Disk_matrix(self.__matrix_file,codes,table,self.__minimal_loop_length)
+            #seules les colonnes après le point de reprise sont remplies
+            counters.update(Nussinov_kernels.fill_counters(len(codes),self.__minimal_loop_length,self.__matrix.last_column+1))
+            self.__matrix.fill(fill_progress)
+            #lecture case par case pour les tracebacks récursif et d'énumération
+            M=self.__matrix.rows()
+            phases["fill"]=time.perf_counter()-tic
+        elif self.__backend=="python":
+            tic=time.perf_counter()
+            if self.__use_pointers:
+                size=len(self.__rna.seq)
+                self.__pointers=(np.zeros((size,size),dtype=np.int8),np.full((size,size),-1,dtype=np.int32))
+            self.__matrix=self.__fill_mat(self.__rna.encoded,self.__minimal_loop_length,self.__pointers,fill_progress)
+            M=self.__matrix
+            phases["fill"]=time.perf_counter()-tic
+        else:
+            tic=time.perf_counter()
+            codes=self.__rna.codes
+            table=self.__bases_scores.pair_table
+            phases["encoding"]=time.perf_counter()-tic
+            tic=time.perf_counter()
+            result=Nussinov_kernels.fill(codes,table,self.__minimal_loop_length,self.__backend,self.__workers,self.__tile_size,pointers=self.__use_pointers,progress=fill_progress)
+            if self.__use_pointers:
+                self.__matrix,case,split=result
+                self.__pointers=(case,split)
+            else:
+                self.__matrix=result
+            M=self.__matrix.tolist() if use_recurse or not skipPredAll else None
+            phases["fill"]=time.perf_counter()-tic
+        counters["matrix_bytes"]=self.__matrix_bytes(self.__matrix)+self.__matrix_bytes(M if M is not self.__matrix and self.__matrix_file is None else None)
+        if self.__pointers is not None:
+            counters["matrix_bytes"]+=sum(a.nbytes for a in self.__pointers)
         
+        tic=time.perf_counter()
         if use_recurse:
             #Traceback en utilisant la récursivité
             fold=[]
-            fold = self.__traceback_rec(self.__matrix,self.__rna.seq,self.__minimal_loop_length,fold,0,len(self.__rna.seq)-1)
-        else:
+            fold = self.__traceback_rec(M,self.__rna.encoded,self.__minimal_loop_length,fold,0,len(self.__rna.seq)-1)
+        elif self.__matrix_file is not None:
+            #Traceback lu directement dans le fichier de la matrice
+            fold = self.__matrix.traceback(counters)
+        elif self.__pointers is not None:
+            #Traceback en suivant les pointeurs de retour
+            fold = Nussinov_kernels.traceback_pointers(*self.__pointers,counters=counters)
+        elif self.__backend=="python":
             #Traceback en utilisant une pile
-            fold = self.__traceback_stack(self.__matrix,self.__rna.seq,self.__minimal_loop_length)
+            fold = self.__traceback_stack(self.__matrix,self.__rna.encoded,self.__minimal_loop_length)
+        else:
+            fold = Nussinov_kernels.traceback(self.__matrix,codes,table,self.__minimal_loop_length,self.__backend,counters=counters)
+        phases["traceback"]=time.perf_counter()-tic
         
+        tic=time.perf_counter()
         self.__structure = Rna_structure(self.__rna,fold=fold,scores=self.__bases_scores)
+        phases["structure"]=time.perf_counter()-tic
         if not skipPredAll:
             self.__all_structures=[]
             fold_list=[]
-            self.__traceback_all(self.__matrix,self.__rna.seq,self.__minimal_loop_length,fold_list)
+            tic=time.perf_counter()
+            self.__traceback_all(M,self.__rna.encoded,self.__minimal_loop_length,fold_list,pointers=self.__pointers)
+            phases["enumeration"]=time.perf_counter()-tic
+            tic=time.perf_counter()
             for fold in fold_list:
                 rna_st=Rna_structure(self.__rna,fold=fold,scores=self.__bases_scores)
                 if rna_st.check_structure():
                     self.__all_structures.append(rna_st)
+            phases["structure"]+=time.perf_counter()-tic
         self.__predict_time=time.time()-start_time
+        self.__metrics={"backend":self.__backend,"length":len(self.__rna.seq),"phases":phases,"counters":counters}
+        if self.__metrics_hook is not None:
+            self.__metrics_hook(self.__metrics)
         
     #===================
     #Méthodes privées
@@ -270,38 +626,97 @@ class Predict_structure:
 	    """
         return [[0]*len(s) for i in range(0,len(s))]
 
-    def __pairing(self,pair):
+    def __fill_progress(self,fraction):
+        """
+        Transmet la progression du remplissage et vérifie le temps limite et les demandes d'arrêt.
+
+        Args:
+            fraction (float): Part des colonnes ou diagonales remplies.
+
+        Raises:
+            TimeoutError: Si le temps limite est dépassé.
+            Exception: Si l'arrêt est demandé.
+        """
+        if self.__progress is not None and self.__progress("fill",fraction) is False:
+            self.__cancel.set()
+        if self.__cancel.is_set():
+            raise Exception("prédiction annulée pendant le remplissage ({:.0%})".format(fraction))
+        if self.__deadline is not None and time.perf_counter()>self.__deadline:
+            raise TimeoutError("temps limite de {}s dépassé pendant le remplissage ({:.0%})".format(self.__timeout,fraction))
+
+    def __enumeration_stopped(self,output):
+        """
+        Indique si l'énumération des structures optimales doit s'arrêter.
+
+        Args:
+            output (list): Structures déjà énumérées.
+
+        Returns:
+            bool: True si le nombre maximal de structures ou le temps limite est atteint, ou si l'arrêt est demandé.
+        """
+        if self.__complete:
+            if self.__cancel.is_set():
+                self.__complete=False
+            elif self.__max_structures is not None and len(output)>=self.__max_structures:
+                self.__complete=False
+            elif self.__deadline is not None and time.perf_counter()>self.__deadline:
+                self.__complete=False
+        return not self.__complete
+
+    @staticmethod
+    def __matrix_bytes(M):
+        """
+        Retourne la taille mémoire d'une matrice de scores.
+
+        Args:
+            M (list ou numpy.ndarray): Matrice de scores, ou None.
+
+        Returns:
+            int: Taille en octets (listes et entiers compris pour une liste de listes).
+        """
+        if M is None:
+            return 0
+        if isinstance(M,(np.ndarray,Disk_matrix)):
+            return int(M.nbytes)
+        return sys.getsizeof(M)+sum(sys.getsizeof(row) for row in M)
+
+    def __pairing(self,c1,c2):
         """
 	    Retourne le score d'appariement pour une paire de bases.
 
 	    Args:
-		pair (tuple): Paire de bases (base1, base2).
+		c1 (int): Code de la première base (Rna_seq.encoded).
+		c2 (int): Code de la seconde base.
 
 	    Returns:
 		int: Score d'appariement pour la paire de bases.
 	    """
-        if pair in self.__bases_scores.pairs.keys():
-            return self.__bases_scores.pairs[pair]
-        return 0
+        return self.__code_table[c1][c2]
 
-    def __fill_mat(self,rna,minimal_loop_length):
+    def __fill_mat(self,rna,minimal_loop_length,pointers=None,progress=None):
         """
 	    Remplit la matrice de scores pour une séquence d'ARN.
 
 	    Args:
-		rna (str): Séquence d'ARN.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
 		minimal_loop_length (int): Longueur minimale de la boucle.
+		pointers (tuple, optionnel): Matrices (case, split) où enregistrer les pointeurs de retour. Par défaut à None.
+		progress (callable, optionnel): Rappel progress(fraction) appelé après chaque colonne. Par défaut à None.
 
 	    Returns:
 		list: Matrice de scores remplie.
 	    """
         M=self.__init_matrix(rna)
+        table=self.__code_table
         for j in range(1,len(rna)):
+            pair_j=[row[rna[j]] for row in table]
             for i in range(j):
-                if j - i > minimal_loop_length:
+                if j - i > minimal_loop_length and pointers is not None:
+                    M[i][j]=self.__fill_cell_pointers(M,rna,minimal_loop_length,pointers,i,j)
+                elif j - i > minimal_loop_length:
                     c1=M[i][j-1]
-                    c2=M[i+1][j-1]+self.__pairing((rna[i],rna[j]))
-                    c3_list=[M[i][k-1]+self.__pairing((rna[k],rna[j]))+M[k+1][j-1] for k in range(i+1,j-minimal_loop_length)]
+                    c2=M[i+1][j-1]+pair_j[rna[i]]
+                    c3_list=[M[i][k-1]+pair_j[rna[k]]+M[k+1][j-1] for k in range(i+1,j-minimal_loop_length)]
                     if len(c3_list)>0:
                         c3=max(c3_list)
                     else:
@@ -309,15 +724,57 @@ class Predict_structure:
                     M[i][j]=max(c1,c2,c3)
                 else:
                     M[i][j]=0
+            if progress is not None:
+                progress(j/(len(rna)-1))
         return M
     
+    def __fill_cell_pointers(self,M,rna,minimal_loop_length,pointers,i,j):
+        """
+	    Calcule la case (i,j) en enregistrant les cas optimaux et le premier point de coupure optimal.
+
+	    Les points de coupure sans paire autorisée ne dépassent jamais M[i][j-1] : ils sont ignorés.
+
+	    Args:
+		M (list): Matrice de scores.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
+		minimal_loop_length (int): Longueur minimale de la boucle.
+		pointers (tuple): Matrices (case, split).
+		i (int): Indice de début.
+		j (int): Indice de fin.
+
+	    Returns:
+		int: Score de la case (i,j).
+	    """
+        case,split=pointers
+        c1=M[i][j-1]
+        p=self.__pairing(rna[i],rna[j])
+        c2=M[i+1][j-1]+p
+        c3=-1
+        first=-1
+        for k in range(i+1,j-minimal_loop_length):
+            pk=self.__pairing(rna[k],rna[j])
+            if pk>0 and M[i][k-1]+pk+M[k+1][j-1]>c3:
+                c3=M[i][k-1]+pk+M[k+1][j-1]
+                first=k
+        best=max(c1,c2,c3)
+        flags=0
+        if c1==best:
+            flags|=1
+        if c2==best and p>0:
+            flags|=2
+        if first>=0 and c3==best:
+            flags|=4
+            split[i,j]=first
+        case[i,j]=flags
+        return best
+    
     def __traceback_rec(self,M,rna,minimal_loop_length,fold,i,j):
         """
 	    Effectue le traceback récursif pour trouver les appariements optimaux.
 
 	    Args:
 		M (list): Matrice de scores.
-		rna (str): Séquence d'ARN.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
 		minimal_loop_length (int): Longueur minimale de la boucle.
 		fold (list): Liste des appariements trouvés.
 		i (int): Indice de début.
@@ -326,16 +783,16 @@ class Predict_structure:
 	    Returns:
 		list: Liste des appariements optimaux.
 	    """
-        rna=rna.upper()    
+        self.__counters["traceback_steps"]+=1
         if j - i > minimal_loop_length:
             if M[i][j]==M[i][j-1]:
                 fold=self.__traceback_rec(M, rna,minimal_loop_length, fold, i, j-1)
-            elif M[i][j]==M[i+1][j-1]+self.__pairing((rna[i],rna[j])):
+            elif M[i][j]==M[i+1][j-1]+self.__pairing(rna[i],rna[j]):
                 fold.append((i,j))
                 self.__traceback_rec(M, rna,minimal_loop_length, fold, i+1, j-1)
             else:
                 for k in range(i+1,j-minimal_loop_length):
-                    if M[i][j]==M[i][k-1]+self.__pairing((rna[k],rna[j]))+M[k+1][j-1]:
+                    if M[i][j]==M[i][k-1]+self.__pairing(rna[k],rna[j])+M[k+1][j-1]:
                         fold.append((k,j))
                         self.__traceback_rec(M, rna,minimal_loop_length, fold, i, k-1)
                         self.__traceback_rec(M, rna,minimal_loop_length, fold, k+1, j-1)
@@ -349,7 +806,7 @@ class Predict_structure:
 
 	    Args:
 		M (list): Matrice de scores.
-		rna (str): Séquence d'ARN.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
 		minimal_loop_length (int): Longueur minimale de la boucle.
 		i (int): Indice de début.
 		j (int): Indice de fin.
@@ -358,19 +815,18 @@ class Predict_structure:
 	    Returns:
 		str: Structure en notation dot-bracket.
 	    """
-        rna=rna.upper()
         if struct is None:
             struct=['.']*len(rna)
         if j - i > minimal_loop_length:
             if M[i][j]==M[i][j-1]:
                 struct=self.__traceback_str(M, rna,minimal_loop_length,i, j-1,struct)
-            elif M[i][j]==M[i+1][j-1]+self.__pairing((rna[i],rna[j])):
+            elif M[i][j]==M[i+1][j-1]+self.__pairing(rna[i],rna[j]):
                 struct[i]="("
                 struct[j]=")"
                 self.__traceback_str(M, rna,minimal_loop_length,i+1, j-1,struct)
             else:
                 for k in range(i+1,j-minimal_loop_length):
-                    if M[i][j]==M[i][k-1]+self.__pairing((rna[k],rna[j]))+M[k+1][j-1]:
+                    if M[i][j]==M[i][k-1]+self.__pairing(rna[k],rna[j])+M[k+1][j-1]:
                         struct[k]="("
                         struct[j]=")"
                         self.__traceback_str(M, rna,minimal_loop_length,i, k-1,struct)
@@ -384,7 +840,7 @@ class Predict_structure:
 
 	    Args:
 		M (list): Matrice de scores.
-		rna (str): Séquence d'ARN.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
 		minimal_loop_length (int): Longueur minimale de la boucle.
 		i (int): Indice de début.
 		j (int): Indice de fin.
@@ -392,15 +848,14 @@ class Predict_structure:
 	    Returns:
 		str: Structure en notation dot-bracket.
 	    """
-        rna=rna.upper()
         if j - i > minimal_loop_length:
             if M[i][j]==M[i][j-1]:
                 return self.__traceback_str2(M, rna,minimal_loop_length,i, j-1)+"."
-            elif M[i][j]==M[i+1][j-1]+self.__pairing((rna[i],rna[j])):
+            elif M[i][j]==M[i+1][j-1]+self.__pairing(rna[i],rna[j]):
                 return "("+self.__traceback_str2(M, rna,minimal_loop_length,i+1, j-1)+")"
             else:
                 for k in range(i+1,j-minimal_loop_length):
-                    if M[i][j]==M[i][k-1]+self.__pairing((rna[k],rna[j]))+M[k+1][j-1]:
+                    if M[i][j]==M[i][k-1]+self.__pairing(rna[k],rna[j])+M[k+1][j-1]:
                         return self.__traceback_str2(M, rna,minimal_loop_length,i, k-1) +"("+ self.__traceback_str2(M, rna,minimal_loop_length,k+1, j-1)+")"
                         break
         elif j==i:
@@ -414,75 +869,92 @@ class Predict_structure:
 
 	    Args:
 		M (list): Matrice de scores.
-		rna (str): Séquence d'ARN.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
 		minimal_loop_length (int): Longueur minimale de la boucle.
 
 	    Returns:
 		list: Liste des appariements optimaux.
 	    """
         stack=[(0,len(rna)-1)]
-        rna=rna.upper()
         fold=[]
+        steps=0
         while len(stack)>0:
             i,j=stack.pop()
+            steps+=1
             if j - i > minimal_loop_length and j>0:
                 if M[i][j]==M[i][j-1]:
                     stack.append((i, j-1))
-                elif M[i][j]==M[i+1][j-1]+self.__pairing((rna[i],rna[j])) and self.__pairing((rna[i],rna[j]))>0:
+                elif M[i][j]==M[i+1][j-1]+self.__pairing(rna[i],rna[j]) and self.__pairing(rna[i],rna[j])>0:
                     fold.append((i,j))
                     stack.append((i+1, j-1))
                 else:
                     for k in range(i+1,j-minimal_loop_length):
-                        if M[i][j]==M[i][k-1]+self.__pairing((rna[k],rna[j]))+M[k+1][j-1] and self.__pairing((rna[k],rna[j]))>0:
+                        if M[i][j]==M[i][k-1]+self.__pairing(rna[k],rna[j])+M[k+1][j-1] and self.__pairing(rna[k],rna[j])>0:
                             fold.append((k,j))
                             stack.append((i, k-1))
                             stack.append((k+1, j-1))
                             break
+        self.__counters["traceback_steps"]+=steps
         return fold
     
     
-    def __traceback_all(self,M,rna,minimal_loop_length,output,stack=None,fold=None):
+    def __traceback_all(self,M,rna,minimal_loop_length,output,stack=None,fold=None,pointers=None):
         """
 	    Effectue le traceback pour trouver toutes les structures optimales.
 
 	    Args:
 		M (list): Matrice de scores.
-		rna (str): Séquence d'ARN.
+		rna (bytes): Codes de la séquence d'ARN (Rna_seq.encoded).
 		minimal_loop_length (int): Longueur minimale de la boucle.
 		output (list): Liste pour stocker toutes les structures optimales.
 		stack (list, optionnel): Pile pour le traceback. Par défaut à None.
 		fold (list, optionnel): Liste des appariements trouvés. Par défaut à None.
+		pointers (tuple, optionnel): Pointeurs de retour (case, split) évitant de réévaluer les cas. Par défaut à None.
 	    """
+        if self.__enumeration_stopped(output):
+            return
+        self.__counters["branches"]+=1
         if fold is None:
             stack=[(0,len(rna)-1)]
             fold=[]
         while len(stack)>0:
+            if self.__enumeration_stopped(output):
+                return
             i,j=stack.pop()
             c=0
             if j - i > minimal_loop_length and j>0:
                 tmpstack2=stack.copy()
                 tmpfold2=fold.copy()
-                if M[i][j]==M[i][j-1] and M[i][j]==M[i+1][j-1]+self.__pairing((rna[i],rna[j])) and self.__pairing((rna[i],rna[j]))>0:
+                if pointers is None:
+                    unpaired=M[i][j]==M[i][j-1]
+                    paired=M[i][j]==M[i+1][j-1]+self.__pairing(rna[i],rna[j]) and self.__pairing(rna[i],rna[j])>0
+                    first_k=i+1
+                else:
+                    flags=int(pointers[0][i,j])
+                    unpaired=flags&1
+                    paired=flags&2
+                    first_k=int(pointers[1][i,j]) if flags&4 else j-minimal_loop_length
+                if unpaired and paired:
                     c+=1
                     tmpstack=stack.copy()
                     stack.append((i, j-1))
                     tmpfold=fold.copy()
                     tmpfold.append((i,j))
                     tmpstack.append((i+1, j-1))
-                    self.__traceback_all(M,rna,minimal_loop_length,output,tmpstack,tmpfold)
+                    self.__traceback_all(M,rna,minimal_loop_length,output,tmpstack,tmpfold,pointers)
                 else:
-                    if M[i][j]==M[i][j-1]:
+                    if unpaired:
                         c+=1
                         stack.append((i, j-1))
-                    elif M[i][j]==M[i+1][j-1]+self.__pairing((rna[i],rna[j])) and self.__pairing((rna[i],rna[j]))>0:
+                    elif paired:
                         c+=1
                         fold.append((i,j))
                         stack.append((i+1, j-1))
     
-                for k in range(i+1,j-minimal_loop_length):
+                for k in range(first_k,j-minimal_loop_length):
                     tmpfold3=tmpfold2.copy()
                     tmpstack3=tmpstack2.copy()
-                    if M[i][j]==M[i][k-1]+self.__pairing((rna[k],rna[j]))+M[k+1][j-1] and self.__pairing((rna[k],rna[j]))>0:
+                    if M[i][j]==M[i][k-1]+self.__pairing(rna[k],rna[j])+M[k+1][j-1] and self.__pairing(rna[k],rna[j])>0:
                         if c==0:
                             c+=1
                             fold.append((k,j))
@@ -493,6 +965,10 @@ class Predict_structure:
                             tmpfold3.append((k,j))
                             tmpstack3.append((i, k-1))
                             tmpstack3.append((k+1, j-1))
-                            self.__traceback_all(M,rna,minimal_loop_length,output,tmpstack3,tmpfold3)
+                            self.__traceback_all(M,rna,minimal_loop_length,output,tmpstack3,tmpfold3,pointers)
                             
-        output.append(fold)
\ No newline at end of file
+        if self.__enumeration_stopped(output):
+            return
+        output.append(fold)
+        if self.__progress is not None and self.__progress("enumeration",len(output)) is False:
+            self.__cancel.set()
\ No newline at end of file
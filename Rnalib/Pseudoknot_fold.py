@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 14:06:23 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Rna_seq import Rna_seq
+from .Scores import Scores
+from .Rna_structure import Rna_structure
+from .Nussinov_kernels import Nussinov_kernels
+import time
+
+class Pseudoknot_fold:
+    """
+    Classe prédisant une structure pouvant contenir des pseudonoeuds de type H.
+
+    Un pseudonoeud de type H est formé de deux tiges qui se croisent: la tige
+    S1 (paire externe (i,j), a paires) et la tige S2 (paire externe (k,l),
+    b paires), avec i < k < j < l, dans l'ordre
+    i..i+a-1 | L1 | k..k+b-1 | L2 | j-a+1..j | L3 | l-b+1..l.
+    Les boucles L1, L2 et L3 sont repliées en structures imbriquées (matrice
+    de Nussinov), sans pseudonoeud. Les pseudonoeuds sont des éléments de la
+    structure externe ou de l'intérieur d'une paire, jamais d'une autre
+    boucle de pseudonoeud.
+
+    Pour rester utilisable sur quelques centaines de nucléotides, l'espace de
+    recherche est élagué:
+    - les tiges candidates sont précalculées: suites d'au moins min_stem
+      paires autorisées empilées, de portée j-i au plus max_span;
+    - pour chaque tige S1, les tiges S2 sont lues dans une fenêtre des tiges
+      triées par position de début, puis filtrées de façon vectorisée
+      (positions compatibles, portée l-i au plus max_span);
+    - seul le meilleur pseudonoeud de chaque intervalle (i,l) est conservé.
+
+    La matrice finale ajoute au remplissage de Nussinov le cas « le segment se
+    termine par un pseudonoeud (k,l) », en O(n³) plus une opération vectorisée
+    par pseudonoeud candidat. Le score d'un pseudonoeud est la somme des
+    scores de ses paires et de ses boucles, moins penalty; à égalité, le
+    traceback préfère les structures imbriquées.
+
+    Attributs:
+        __rna (Rna_seq): Séquence d'ARN.
+        __minimal_loop_length (int): Longueur minimale de la boucle.
+        __bases_scores (Scores): Scores des bases de l'ARN.
+        __min_stem (int): Nombre minimal de paires d'une tige.
+        __max_span (int): Portée maximale d'une tige et d'un pseudonoeud.
+        __penalty (int): Pénalité retirée au score de chaque pseudonoeud.
+        __backend (str): Moteur de Nussinov_kernels pour la matrice imbriquée.
+        __nested_matrix (numpy.ndarray): Matrice de Nussinov sans pseudonoeud.
+        __matrix (numpy.ndarray): Matrice des scores avec pseudonoeuds.
+        __stems (numpy.ndarray): Tiges candidates.
+        __pseudoknots (list): Pseudonoeuds de la structure prédite.
+        __structure (Rna_structure): Structure prédite.
+        __predict_time (float): Temps de prédiction.
+    """
+    def __init__(self,rnaSeq: Rna_seq,minloop=3,bases_scores=None,min_stem=3,max_span=200,penalty=0,backend="auto"):
+        """
+        Initialise une instance de Pseudoknot_fold et prédit la structure.
+
+        Args:
+            rnaSeq (Rna_seq): Séquence d'ARN.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            bases_scores (Scores, optionnel): Scores des bases de l'ARN. Par défaut à None.
+            min_stem (int, optionnel): Nombre minimal de paires d'une tige de pseudonoeud. Par défaut à 3.
+            max_span (int, optionnel): Portée maximale d'une tige et d'un pseudonoeud (None: sans limite). Par défaut à 200.
+            penalty (int, optionnel): Pénalité retirée au score de chaque pseudonoeud. Par défaut à 0.
+            backend (str, optionnel): 'auto', 'numpy' ou 'numba', pour la matrice imbriquée. Par défaut à 'auto'.
+
+        Raises:
+            Exception: Si rnaSeq n'est pas un objet Rna_seq ou si bases_scores n'est pas un objet Scores.
+        """
+        if not isinstance(rnaSeq,Rna_seq):
+            raise Exception("'{}' n'est pas un objet Rna_seq".format(rnaSeq))
+        if bases_scores is None:
+            self.__bases_scores=Scores()
+        elif isinstance(bases_scores,Scores):
+            self.__bases_scores=bases_scores
+        else:
+            raise Exception("'{}' n'est pas un objet Score()".format(bases_scores))
+        if backend=="auto":
+            backend="numba" if "numba" in Nussinov_kernels.available_backends() else "numpy"
+
+        self.__rna=rnaSeq
+        self.__minimal_loop_length=int(minloop)
+        self.__min_stem=max(int(min_stem),1)
+        self.__max_span=len(rnaSeq.seq) if max_span is None else int(max_span)
+        self.__penalty=int(penalty)
+        self.__backend=backend
+        self.__nested_matrix=None
+        self.__matrix=None
+        self.__stems=None
+        self.__pseudoknots=[]
+        self.__structure=None
+        self.__predict_time=0
+
+        self.structure_prediction()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def rna(self):
+        """
+        Retourne la séquence d'ARN.
+
+        Returns:
+            Rna_seq: Séquence d'ARN.
+        """
+        return self.__rna
+
+    @property
+    def structure(self):
+        """
+        Retourne la structure prédite.
+
+        Returns:
+            Rna_structure: Structure prédite, les tiges S2 des pseudonoeuds étant notées '[]'.
+        """
+        return self.__structure
+
+    @property
+    def score(self):
+        """
+        Retourne le score optimal, pénalités des pseudonoeuds comprises.
+
+        Returns:
+            int: Score de la structure prédite.
+        """
+        n=len(self.__matrix)
+        return int(self.__matrix[0,n-1]) if n else 0
+
+    @property
+    def matrix(self):
+        """
+        Retourne la matrice des scores avec pseudonoeuds.
+
+        Returns:
+            numpy.ndarray: Matrice des scores.
+        """
+        return self.__matrix
+
+    @property
+    def nested_matrix(self):
+        """
+        Retourne la matrice de Nussinov sans pseudonoeud.
+
+        Returns:
+            numpy.ndarray: Matrice des scores imbriqués.
+        """
+        return self.__nested_matrix
+
+    @property
+    def stems(self):
+        """
+        Retourne les tiges candidates.
+
+        Returns:
+            numpy.ndarray: Tableau (nombre de tiges, 4): i, j (paire externe), nombre de paires et score.
+        """
+        return self.__stems
+
+    @property
+    def pseudoknots(self):
+        """
+        Retourne les pseudonoeuds de la structure prédite.
+
+        Returns:
+            list: Tuples (i, j, a, k, l, b): tige S1 de paire externe (i,j) et a paires, tige S2 de paire externe (k,l) et b paires.
+        """
+        return self.__pseudoknots
+
+    @property
+    def predict_time(self):
+        """
+        Retourne le temps de prédiction.
+
+        Returns:
+            float: Temps de prédiction en secondes.
+        """
+        return self.__predict_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def structure_prediction(self):
+        """
+        Prédit la structure: tiges candidates, pseudonoeuds candidats, remplissage puis traceback.
+        """
+        start_time=time.time()
+        codes=self.__rna.codes
+        table=self.__bases_scores.pair_table
+        m=self.__minimal_loop_length
+        self.__nested_matrix=Nussinov_kernels.fill(codes,table,m,self.__backend)
+        self.__stems=Pseudoknot_fold.candidate_stems(codes,table,m,self.__min_stem,self.__max_span)
+        ends=Pseudoknot_fold.pseudoknot_candidates(self.__stems,self.__nested_matrix,self.__max_span,self.__penalty)
+        self.__matrix=Pseudoknot_fold.__fill(codes,table,m,ends)
+        fold,self.__pseudoknots=self.__traceback(codes,table,ends)
+        self.__structure=Rna_structure(self.__rna,fold=fold,scores=self.__bases_scores)
+        self.__predict_time=time.time()-start_time
+
+    @staticmethod
+    def candidate_stems(codes,table,minimal_loop_length=3,min_stem=3,max_span=None):
+        """
+        Précalcule les tiges candidates des pseudonoeuds.
+
+        Une tige (i,j,a) est une suite de a paires autorisées empilées
+        (i,j), (i+1,j-1)... dont chaque paire respecte la longueur minimale de
+        boucle; toutes les tiges d'au moins min_stem paires sont retenues, y
+        compris celles contenues dans une tige plus longue.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            min_stem (int, optionnel): Nombre minimal de paires. Par défaut à 3.
+            max_span (int, optionnel): Portée maximale j-i. Par défaut à None (sans limite).
+
+        Returns:
+            numpy.ndarray: Tableau (nombre de tiges, 4) d'entiers (i, j, a, score), trié par i puis j.
+        """
+        codes=np.asarray(codes)
+        n=len(codes)
+        if max_span is None:
+            max_span=n
+        span=np.arange(n)[None,:]-np.arange(n)[:,None]
+        pair=np.asarray(table,dtype=np.int64)[codes[:,None],codes[None,:]]
+        pair[(span<=minimal_loop_length)|(span>max_span)]=0
+        #run[i,j]: paires empilées depuis (i,j) vers l'intérieur, cumul[i,j]: somme de leurs scores
+        run=np.zeros((n+1,n+1),dtype=np.int64)
+        cumul=np.zeros((n+1,n+1),dtype=np.int64)
+        for i in range(n-2,-1,-1):
+            valid=pair[i,1:]>0
+            run[i,1:n]=np.where(valid,run[i+1,0:n-1]+1,0)
+            cumul[i,1:n]=np.where(valid,cumul[i+1,0:n-1]+pair[i,1:],0)
+        I,J=np.nonzero(run[:n,:n]>=min_stem)
+        counts=run[I,J]-min_stem+1
+        first=np.repeat(np.cumsum(counts)-counts,counts)
+        a=np.arange(counts.sum())-first+min_stem
+        I=np.repeat(I,counts)
+        J=np.repeat(J,counts)
+        score=cumul[I,J]-cumul[I+a,J-a]
+        return np.stack((I,J,a,score),axis=1).astype(np.int64).reshape(-1,4)
+
+    @staticmethod
+    def pseudoknot_candidates(stems,M,max_span=None,penalty=0):
+        """
+        Cherche le meilleur pseudonoeud de type H de chaque intervalle (i,l).
+
+        Args:
+            stems (numpy.ndarray): Tiges candidates (candidate_stems).
+            M (numpy.ndarray): Matrice de Nussinov sans pseudonoeud, pour les boucles.
+            max_span (int, optionnel): Portée maximale l-i. Par défaut à None (sans limite).
+            penalty (int, optionnel): Pénalité retirée au score de chaque pseudonoeud. Par défaut à 0.
+
+        Returns:
+            dict: {l: liste de tuples (i, score, S1, S2)} triée par i, S1 et S2 étant des lignes de stems;
+                seuls les pseudonoeuds de score positif sont retenus.
+        """
+        n=len(M)
+        if max_span is None:
+            max_span=n
+        #matrice bordée de zéros: les boucles vides (début = fin+1) valent 0
+        P=np.zeros((n+1,n+1),dtype=np.int64)
+        P[:n,:n]=M
+        si,sj,sa,ss=(stems[:,c] for c in range(4))
+        shortest=int(sa.min()) if len(stems) else 0
+        found=[]
+        for s1 in range(len(stems)):
+            i,j,a,score1=(int(v) for v in stems[s1])
+            #S2 commence dans la boucle de S1 et laisse la place d'une tige avant le brin 3' de S1
+            lo=np.searchsorted(si,i+a,side="left")
+            hi=np.searchsorted(si,j-a+2-shortest,side="left")
+            if hi<=lo:
+                continue
+            k,l,b,score2=si[lo:hi],sj[lo:hi],sa[lo:hi],ss[lo:hi]
+            ok=(k+b<=j-a+1)&(l-b>=j)&(l-i<=max_span)
+            if not ok.any():
+                continue
+            rows=np.flatnonzero(ok)
+            k,l,b,score2=k[rows],l[rows],b[rows],score2[rows]
+            score=score1+score2+P[i+a,k-1]+P[k+b,j-a]+P[j+1,l-b]-penalty
+            keep=score>0
+            if keep.any():
+                found.append(np.stack((np.full(keep.sum(),i),l[keep],score[keep],np.full(keep.sum(),s1),lo+rows[keep]),axis=1))
+        ends={}
+        if not found:
+            return ends
+        found=np.concatenate(found)
+        I,L,S,S1,S2=(found[:,c] for c in range(5))
+        order=np.lexsort((S2,S1,-S,L,I))
+        found=found[order]
+        first=np.ones(len(found),dtype=bool)
+        first[1:]=(found[1:,0]!=found[:-1,0])|(found[1:,1]!=found[:-1,1])
+        for i,l,score,s1,s2 in found[first].tolist():
+            ends.setdefault(l,[]).append((i,score,s1,s2))
+        return ends
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    @staticmethod
+    def __fill(codes,table,minimal_loop_length,ends):
+        """
+        Remplit la matrice de Nussinov étendue aux pseudonoeuds candidats, colonne par colonne.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            ends (dict): Pseudonoeuds candidats par position de fin (pseudoknot_candidates).
+
+        Returns:
+            numpy.ndarray: Matrice des scores.
+        """
+        codes=np.asarray(codes)
+        table=np.asarray(table)
+        m=minimal_loop_length
+        n=len(codes)
+        Q=np.zeros((n,n),dtype=np.int64)
+        neg=np.iinfo(np.int64).min//2
+        lower=np.tril(np.ones((n,n),dtype=bool),-1)
+        for j in range(max(m+1,1),n):
+            rows=j-m
+            pair=table[codes[:rows],codes[j]]
+            V=pair+Q[1:rows+1,j-1]
+            best=np.maximum(Q[:rows,j-1],V)
+            if rows>1:
+                W=Q[:rows,:rows-1]+np.where(pair[1:rows]>0,V[1:rows],neg)[None,:]
+                W[lower[:rows,:rows-1]]=neg
+                best=np.maximum(best,W.max(axis=1))
+            #le segment [i,j] se termine par le pseudonoeud (k,j)
+            for k,score,_,_ in ends.get(j,()):
+                if k<rows:
+                    best[k]=max(best[k],score)
+                    if k>0:
+                        best[:k]=np.maximum(best[:k],Q[:k,k-1]+score)
+            Q[:rows,j]=best
+        return Q
+
+    def __traceback(self,codes,table,ends):
+        """
+        Retrace la structure optimale de la matrice étendue, puis des boucles des pseudonoeuds dans la matrice imbriquée.
+
+        Args:
+            codes (numpy.ndarray): Codes de la séquence.
+            table (numpy.ndarray): Table des scores d'appariement.
+            ends (dict): Pseudonoeuds candidats par position de fin.
+
+        Returns:
+            tuple: Liste des paires et liste des pseudonoeuds (i, j, a, k, l, b).
+        """
+        m=self.__minimal_loop_length
+        seq=np.asarray(codes).tolist()
+        pairs=np.asarray(table).tolist()
+        matrices=(self.__matrix,self.__nested_matrix)
+        n=len(seq)
+        stack=[(0,n-1,0)] if n else []
+        fold=[]
+        knots=[]
+        while stack:
+            i,j,nested=stack.pop()
+            if j-i<=m:
+                continue
+            X=matrices[nested]
+            value=X[i,j]
+            p=pairs[seq[i]][seq[j]]
+            if value==X[i,j-1]:
+                stack.append((i,j-1,nested))
+            elif p>0 and value==X[i+1,j-1]+p:
+                fold.append((i,j))
+                stack.append((i+1,j-1,nested))
+            else:
+                ks=np.arange(i+1,j-m)
+                split=np.asarray(table)[np.asarray(codes)[ks],seq[j]] if len(ks) else np.zeros(0,dtype=np.int64)
+                ok=(X[i,ks-1]+split+X[ks+1,j-1]==value)&(split>0) if len(ks) else np.zeros(0,dtype=bool)
+                if ok.any():
+                    k=int(ks[np.argmax(ok)])
+                    fold.append((k,j))
+                    stack.append((i,k-1,nested))
+                    stack.append((k+1,j-1,nested))
+                    continue
+                for k,score,s1,s2 in ends.get(j,()):
+                    if k>=i and value==(X[i,k-1] if k>i else 0)+score:
+                        a,b=int(self.__stems[s1,2]),int(self.__stems[s2,2])
+                        k1,j1=int(self.__stems[s1,0]),int(self.__stems[s1,1])
+                        k2,l2=int(self.__stems[s2,0]),int(self.__stems[s2,1])
+                        fold+=[(k1+t,j1-t) for t in range(a)]+[(k2+t,l2-t) for t in range(b)]
+                        knots.append((k1,j1,a,k2,l2,b))
+                        stack.append((i,k-1,0))
+                        stack+=[(k1+a,k2-1,1),(k2+b,j1-a,1),(j1+1,l2-b,1)]
+                        break
+        return sorted(fold),sorted(knots)
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:02:44 2026
+
+@author: Mathieu Genete
+"""
+from .Rna_parser import Rna_parser
+from .Rna_seq import Rna_seq
+from .Rna_structure import Rna_structure
+from .Scores import Scores
+import argparse
+import collections
+import itertools
+import os
+import sys
+
+class Rna_cli:
+    """
+    Interface en ligne de commande de Rnalib (python -m Rnalib).
+
+    Les sous-commandes fold, convert, compare et stats lisent leurs entrées
+    (fichier ou '-' pour l'entrée standard) et écrivent sur la sortie standard
+    un enregistrement à la fois: la mémoire utilisée ne dépend que de la taille
+    du plus long enregistrement.
+    """
+    FORMATS={".fa":"fasta",".fasta":"fasta",".fna":"fasta",".db":"db",".dbn":"db",".dot":"db",".ct":"ct"}
+
+    @staticmethod
+    def main(argv=None):
+        """
+        Analyse les arguments et exécute la sous-commande demandée.
+
+        Args:
+            argv (list, optionnel): Arguments de la ligne de commande. Par défaut à sys.argv[1:].
+
+        Returns:
+            int: Code de retour (0 en cas de succès, 1 en cas d'erreur sur un enregistrement).
+        """
+        args=Rna_cli.parser().parse_args(argv)
+        try:
+            args.run(args)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            #sortie fermée par la commande suivante du pipeline (head, ...)
+            devnull=os.open(os.devnull,os.O_WRONLY)
+            os.dup2(devnull,sys.stdout.fileno())
+        except Exception as e:
+            print("rnalib: erreur: {}".format(e),file=sys.stderr)
+            return 1
+        return 0
+
+    @staticmethod
+    def parser():
+        """
+        Construit l'analyseur des arguments.
+
+        Returns:
+            argparse.ArgumentParser: Analyseur avec les sous-commandes fold, convert, compare et stats.
+        """
+        parser=argparse.ArgumentParser(prog="rnalib",description="Prédiction et manipulation de structures secondaires d'ARN")
+        sub=parser.add_subparsers(dest="command",required=True)
+
+        fold=sub.add_parser("fold",help="prédit les structures des séquences d'un fichier FASTA")
+        fold.add_argument("input",nargs="?",default="-",help="fichier FASTA ('-' pour l'entrée standard)")
+        fold.add_argument("--to",choices=["db","ct"],default="db",help="format de sortie (défaut: db)")
+        fold.add_argument("--minloop",type=int,default=3,help="longueur minimale des boucles (défaut: 3)")
+        fold.add_argument("--GC",type=int,default=3,help="score d'une paire GC (défaut: 3)")
+        fold.add_argument("--AU",type=int,default=2,help="score d'une paire AU (défaut: 2)")
+        fold.add_argument("--GU",type=int,default=1,help="score d'une paire GU (défaut: 1)")
+        fold.add_argument("--max-span",type=int,default=None,help="distance maximale entre deux bases appariées")
+        fold.add_argument("--workers",type=int,default=1,help="nombre de processus de prédiction (défaut: 1)")
+        fold.add_argument("--backend",default="auto",help="moteur de calcul de Predict_structure (défaut: auto)")
+        fold.set_defaults(run=Rna_cli.fold)
+
+        convert=sub.add_parser("convert",help="convertit des structures entre les formats db, ct et fasta")
+        convert.add_argument("input",nargs="?",default="-",help="fichier d'entrée ('-' pour l'entrée standard)")
+        convert.add_argument("--from",dest="source",choices=["db","ct"],default=None,help="format d'entrée (défaut: selon l'extension)")
+        convert.add_argument("--to",choices=["db","ct","fasta"],required=True,help="format de sortie")
+        convert.add_argument("--minloop",type=int,default=3,help="longueur minimale des boucles vérifiée à la lecture (défaut: 3)")
+        convert.set_defaults(run=Rna_cli.convert)
+
+        compare=sub.add_parser("compare",help="compare deux fichiers de structures enregistrement par enregistrement")
+        compare.add_argument("reference",help="structures de référence ('-' pour l'entrée standard)")
+        compare.add_argument("predicted",help="structures prédites ('-' pour l'entrée standard)")
+        compare.add_argument("--from",dest="source",choices=["db","ct"],default=None,help="format des deux fichiers (défaut: selon l'extension)")
+        compare.add_argument("--minloop",type=int,default=0,help="longueur minimale des boucles vérifiée à la lecture (défaut: 0)")
+        compare.set_defaults(run=Rna_cli.compare)
+
+        stats=sub.add_parser("stats",help="statistiques de chaque structure")
+        stats.add_argument("input",nargs="?",default="-",help="fichier de structures ('-' pour l'entrée standard)")
+        stats.add_argument("--from",dest="source",choices=["db","ct"],default=None,help="format d'entrée (défaut: selon l'extension)")
+        stats.add_argument("--minloop",type=int,default=0,help="longueur minimale des boucles vérifiée à la lecture (défaut: 0)")
+        stats.add_argument("--GC",type=int,default=3,help="score d'une paire GC (défaut: 3)")
+        stats.add_argument("--AU",type=int,default=2,help="score d'une paire AU (défaut: 2)")
+        stats.add_argument("--GU",type=int,default=1,help="score d'une paire GU (défaut: 1)")
+        stats.set_defaults(run=Rna_cli.stats)
+
+        serve=sub.add_parser("serve",help="lance le service local de prédiction (Fold_service)")
+        serve.add_argument("--socket",default=None,help="chemin du socket Unix (défaut: TCP sur --host/--port)")
+        serve.add_argument("--host",default="127.0.0.1",help="adresse d'écoute TCP (défaut: 127.0.0.1)")
+        serve.add_argument("--port",type=int,default=8765,help="port d'écoute TCP (défaut: 8765)")
+        serve.add_argument("--workers",type=int,default=None,help="nombre de processus de prédiction (défaut: nombre de cœurs)")
+        serve.add_argument("--batch-max-length",type=int,default=1000,help="longueur maximale des séquences regroupées (défaut: 1000)")
+        serve.add_argument("--batch-window",type=float,default=0.005,help="attente avant l'envoi d'un lot, en secondes (défaut: 0.005)")
+        serve.add_argument("--timeout",type=float,default=None,help="durée maximale d'une requête, en secondes")
+        serve.set_defaults(run=Rna_cli.serve)
+        return parser
+
+    #===================
+    #Sous-commandes
+    #===================
+
+    @staticmethod
+    def fold(args):
+        """
+        Prédit la structure de chaque séquence FASTA et l'écrit au format db ou ct.
+
+        Avec plusieurs processus, au plus 2·workers séquences sont en cours de
+        prédiction et les structures sont écrites dans l'ordre des séquences.
+
+        Args:
+            args (argparse.Namespace): Arguments de la sous-commande.
+        """
+        options=(args.minloop,(args.GC,args.AU,args.GU),args.backend,args.max_span)
+        with Rna_cli.__open(args.input) as handle:
+            records=((rna.id,rna.seq) for rna in Rna_parser.iter_fasta(handle))
+            if args.workers<=1:
+                results=(Rna_cli.fold_record(seqid,seq,*options) for seqid,seq in records)
+                Rna_cli.__write_folds(results,args.to)
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(args.workers) as pool:
+                    Rna_cli.__write_folds(Rna_cli.__ordered(pool,records,options,2*args.workers),args.to)
+
+    @staticmethod
+    def convert(args):
+        """
+        Convertit chaque structure au format demandé.
+
+        Args:
+            args (argparse.Namespace): Arguments de la sous-commande.
+        """
+        with Rna_cli.__open(args.input) as handle:
+            for struct in Rna_cli.__read_structures(handle,Rna_cli.__format(args.input,args.source),args.minloop):
+                Rna_cli.__write(struct,args.to)
+
+    @staticmethod
+    def compare(args):
+        """
+        Compare deux fichiers de structures, lus en parallèle enregistrement par enregistrement.
+
+        Écrit une ligne tabulée par couple: identifiant, longueur, paires de chaque
+        structure, vrais positifs, faux positifs, faux négatifs, distance en paires
+        de bases, sensibilité, valeur prédictive positive, F1 et identité.
+
+        Args:
+            args (argparse.Namespace): Arguments de la sous-commande.
+
+        Raises:
+            Exception: Si les deux fichiers n'ont pas le même nombre d'enregistrements ou des séquences différentes.
+        """
+        sys.stdout.write("id\tlength\tref_pairs\tpred_pairs\ttp\tfp\tfn\tbp_distance\tsensitivity\tppv\tf1\tidentical\n")
+        with Rna_cli.__open(args.reference) as ref_handle, Rna_cli.__open(args.predicted) as pred_handle:
+            references=Rna_cli.__read_structures(ref_handle,Rna_cli.__format(args.reference,args.source),args.minloop)
+            predictions=Rna_cli.__read_structures(pred_handle,Rna_cli.__format(args.predicted,args.source),args.minloop)
+            for ref,pred in Rna_cli.__zip_strict(references,predictions):
+                if ref.rna.seq!=pred.rna.seq:
+                    raise Exception("les séquences de '{}' et '{}' sont différentes".format(ref.rna.id,pred.rna.id))
+                counts=Rna_cli.compare_structures(ref,pred)
+                sys.stdout.write("{}\t{}\t{ref_pairs}\t{pred_pairs}\t{tp}\t{fp}\t{fn}\t{bp_distance}\t{sensitivity:.3f}\t{ppv:.3f}\t{f1:.3f}\t{identical}\n".format(
+                    ref.rna.id,len(ref.rna.seq),**counts))
+
+    @staticmethod
+    def stats(args):
+        """
+        Écrit une ligne tabulée de statistiques par structure.
+
+        Args:
+            args (argparse.Namespace): Arguments de la sous-commande.
+        """
+        scores=Scores(args.GC,args.AU,args.GU)
+        sys.stdout.write("id\tlength\tpairs\tpaired_fraction\tgc_content\thelices\tmax_span\tscore\n")
+        with Rna_cli.__open(args.input) as handle:
+            for struct in Rna_cli.__read_structures(handle,Rna_cli.__format(args.input,args.source),args.minloop):
+                infos=Rna_cli.structure_stats(struct,scores)
+                sys.stdout.write("{}\t{length}\t{pairs}\t{paired_fraction:.3f}\t{gc_content:.3f}\t{helices}\t{max_span}\t{score}\n".format(
+                    struct.rna.id,**infos))
+
+    @staticmethod
+    def serve(args):
+        """
+        Lance le service local de prédiction jusqu'à l'interruption (Ctrl-C).
+
+        Args:
+            args (argparse.Namespace): Arguments de la sous-commande.
+        """
+        import asyncio
+        from .Fold_service import Fold_service
+        service=Fold_service(args.socket,args.host,args.port,args.workers,args.batch_max_length,args.batch_window,timeout=args.timeout)
+        ready=lambda: print("rnalib: service à l'écoute sur {}".format(service.address),file=sys.stderr,flush=True)
+        try:
+            asyncio.run(service.serve(ready))
+        except (KeyboardInterrupt,asyncio.CancelledError):
+            pass
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    @staticmethod
+    def fold_record(seqid,seq,minloop=3,scores=(3,2,1),backend="auto",max_span=None):
+        """
+        Prédit la structure optimale d'une séquence.
+
+        Avec max_span, seules les cases (i,j) avec j-i<=max_span sont remplies
+        (Nussinov_kernels.fill_banded): O(n·max_span²) en temps et O(n·max_span) en mémoire.
+
+        Args:
+            seqid (str): Identifiant de la séquence.
+            seq (str): Séquence d'ARN.
+            minloop (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            scores (tuple, optionnel): Scores (GC, AU, GU). Par défaut à (3, 2, 1).
+            backend (str, optionnel): Moteur de calcul de Predict_structure (sans effet avec max_span). Par défaut à 'auto'.
+            max_span (int, optionnel): Distance maximale entre deux bases appariées. Par défaut à None.
+
+        Returns:
+            tuple: (identifiant, séquence, structure en notation dot-bracket).
+        """
+        from .Nussinov_kernels import Nussinov_kernels
+        from .Predict_structure import Predict_structure
+        rna=Rna_seq(seqid,seq)
+        bases_scores=Scores(*scores)
+        if max_span is None:
+            return seqid,rna.seq,Predict_structure(rna,minloop,skipPredAll=True,bases_scores=bases_scores,backend=backend).structure.dotpar
+        codes=rna.codes
+        table=bases_scores.pair_table
+        B,F=Nussinov_kernels.fill_banded(codes,table,minloop,max_span)
+        fold=Nussinov_kernels.traceback_banded(B,F,codes,table,minloop)
+        return seqid,rna.seq,Rna_structure(rna,fold=fold,scores=bases_scores).dotpar
+
+    @staticmethod
+    def compare_structures(ref: Rna_structure,pred: Rna_structure):
+        """
+        Compare les paires de bases de deux structures d'une même séquence.
+
+        Args:
+            ref (Rna_structure): Structure de référence.
+            pred (Rna_structure): Structure prédite.
+
+        Returns:
+            dict: 'ref_pairs', 'pred_pairs', 'tp', 'fp', 'fn', 'bp_distance', 'sensitivity', 'ppv', 'f1'
+                (nan si indéfini) et 'identical'.
+        """
+        ref_pairs=set(ref.fold)
+        pred_pairs=set(pred.fold)
+        tp=len(ref_pairs&pred_pairs)
+        fp=len(pred_pairs)-tp
+        fn=len(ref_pairs)-tp
+        sensitivity=tp/(tp+fn) if tp+fn else float("nan")
+        ppv=tp/(tp+fp) if tp+fp else float("nan")
+        f1=2*tp/(2*tp+fp+fn) if tp+fp+fn else float("nan")
+        return {"ref_pairs":len(ref_pairs),"pred_pairs":len(pred_pairs),"tp":tp,"fp":fp,"fn":fn,"bp_distance":fp+fn,
+                "sensitivity":sensitivity,"ppv":ppv,"f1":f1,"identical":ref_pairs==pred_pairs}
+
+    @staticmethod
+    def structure_stats(struct: Rna_structure,scores=None):
+        """
+        Calcule les statistiques d'une structure.
+
+        Args:
+            struct (Rna_structure): Structure à décrire.
+            scores (Scores, optionnel): Scores des paires. Par défaut à Scores().
+
+        Returns:
+            dict: 'length', 'pairs', 'paired_fraction', 'gc_content', 'helices' (empilements maximaux),
+                'max_span' et 'score'.
+        """
+        if scores is None:
+            scores=Scores()
+        seq=struct.rna.seq
+        fold=set(struct.fold)
+        size=len(seq)
+        helices=sum(1 for i,j in fold if (i-1,j+1) not in fold)
+        return {"length":size,"pairs":len(fold),"paired_fraction":2*len(fold)/size if size else 0.0,
+                "gc_content":(seq.count("G")+seq.count("C"))/size if size else 0.0,"helices":helices,
+                "max_span":max((j-i for i,j in fold),default=0),
+                "score":sum(scores.pairs.get((seq[i],seq[j]),0) for i,j in fold)}
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    @staticmethod
+    def __open(filename):
+        """
+        Ouvre un fichier d'entrée, ou l'entrée standard pour '-'.
+
+        Args:
+            filename (str): Chemin du fichier ou '-'.
+
+        Returns:
+            file: Flux texte (l'entrée standard n'est pas fermée à la sortie du bloc with).
+        """
+        if filename=="-":
+            return open(sys.stdin.fileno(),"r",closefd=False)
+        return open(filename,"r")
+
+    @staticmethod
+    def __format(filename,source):
+        """
+        Détermine le format d'un fichier de structures.
+
+        Args:
+            filename (str): Chemin du fichier ou '-'.
+            source (str): Format donné par --from, ou None.
+
+        Returns:
+            str: 'db' ou 'ct'.
+
+        Raises:
+            Exception: Si le format ne peut pas être déduit de l'extension.
+        """
+        if source is not None:
+            return source
+        fmt=Rna_cli.FORMATS.get(os.path.splitext(filename)[1].lower())
+        if fmt not in ("db","ct"):
+            raise Exception("format de '{}' inconnu, préciser --from db ou --from ct".format(filename))
+        return fmt
+
+    @staticmethod
+    def __read_structures(handle,fmt,minloop):
+        """
+        Lit les structures d'un flux db ou ct.
+
+        Args:
+            handle (file): Flux texte.
+            fmt (str): 'db' ou 'ct'.
+            minloop (int): Longueur minimale des boucles vérifiée à la lecture.
+
+        Returns:
+            generator: Objets Rna_structure.
+        """
+        if fmt=="ct":
+            return Rna_parser.iter_connect(handle,minloop)
+        return Rna_parser.iter_dotbrackets(handle,minloop)
+
+    @staticmethod
+    def __write(struct: Rna_structure,fmt):
+        """
+        Écrit une structure sur la sortie standard.
+
+        Les enregistrements ct commencent par une ligne d'en-tête 'longueur identifiant'.
+
+        Args:
+            struct (Rna_structure): Structure à écrire.
+            fmt (str): 'db', 'ct' ou 'fasta'.
+        """
+        rna=struct.rna
+        if fmt=="ct":
+            sys.stdout.write("{}\t{}\n{}".format(len(rna.seq),rna.id,struct.structure_to_ct()))
+        elif fmt=="fasta":
+            sys.stdout.write(">{}\n{}\n".format(rna.id,rna.seq))
+        else:
+            sys.stdout.write(">{}\n{}\n{}\n".format(rna.id,rna.seq,struct.dotpar))
+
+    @staticmethod
+    def __write_folds(results,fmt):
+        """
+        Écrit les structures prédites sur la sortie standard.
+
+        Args:
+            results (iterable): Triplets (identifiant, séquence, structure dot-bracket).
+            fmt (str): 'db' ou 'ct'.
+        """
+        for seqid,seq,dotpar in results:
+            if fmt=="db":
+                sys.stdout.write(">{}\n{}\n{}\n".format(seqid,seq,dotpar))
+            else:
+                Rna_cli.__write(Rna_structure(Rna_seq(seqid,seq),dotpar=dotpar),fmt)
+
+    @staticmethod
+    def __ordered(pool,records,options,window):
+        """
+        Soumet les prédictions à un groupe de processus en limitant le nombre de séquences en cours.
+
+        Args:
+            pool (concurrent.futures.Executor): Groupe de processus.
+            records (iterable): Couples (identifiant, séquence).
+            options (tuple): Arguments suivants de fold_record.
+            window (int): Nombre maximal de prédictions en cours.
+
+        Yields:
+            tuple: Résultats de fold_record, dans l'ordre des séquences.
+        """
+        pending=collections.deque()
+        for seqid,seq in records:
+            pending.append(pool.submit(Rna_cli.fold_record,seqid,seq,*options))
+            if len(pending)>=window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    @staticmethod
+    def __zip_strict(first,second):
+        """
+        Parcourt deux itérables de même longueur en parallèle.
+
+        Args:
+            first (iterable): Premier itérable.
+            second (iterable): Second itérable.
+
+        Yields:
+            tuple: Couples d'éléments.
+
+        Raises:
+            Exception: Si les deux itérables n'ont pas la même longueur.
+        """
+        missing=object()
+        for a,b in itertools.zip_longest(first,second,fillvalue=missing):
+            if a is missing or b is missing:
+                raise Exception("les deux fichiers n'ont pas le même nombre d'enregistrements")
+            yield a,b
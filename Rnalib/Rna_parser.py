@@ -8,7 +8,6 @@ Created on Tue Mar  7 17:09:47 2023
 from .Alphabet import Alphabet
 from .Rna_structure import Rna_structure
 from .Rna_seq import Rna_seq
-from .Predict_structure import Predict_structure
 
 import os
 
@@ -39,7 +38,7 @@ class Rna_parser:
         return outseq
     
     @staticmethod
-    def fasta_to_db(infasta: str,outdb: str,minloop=3,scores=None):
+    def fasta_to_db(infasta: str,outdb: str,minloop=3,scores=None,batch=True,batch_max_length=1000,metrics_hook=None,timeout=None):
         """
         Convertit un fichier FASTA au format dot-bracket en prédisant les structures d'ARN.
 
@@ -48,28 +47,50 @@ class Rna_parser:
             outdb (str): Le chemin vers le fichier dot-bracket de sortie.
             minloop (int, optionnel): La longueur minimale de la boucle pour la prédiction de structure. Par défaut à 3.
             scores (dict, optionnel): Un dictionnaire de scores de bases pour la prédiction de structure. Par défaut à None.
+            batch (bool, optionnel): Prédit les structures par lots vectorisés (Batch_predict) plutôt qu'une à une. Par défaut à True.
+            batch_max_length (int, optionnel): Longueur au-delà de laquelle une séquence est prédite seule
+                avec Predict_structure. Par défaut à 1000.
+            metrics_hook (callable, optionnel): Fonction appelée avec les métriques de chaque lot et de chaque
+                séquence prédite seule (voir Predict_structure.metrics et Predict_structure.add_metrics). Par défaut à None.
+            timeout (float, optionnel): Durée maximale de prédiction de chaque séquence prédite seule, en secondes.
+                Les séquences qui la dépassent ne sont pas écrites. Les lots ne contiennent que des séquences
+                d'au plus batch_max_length bases. Par défaut à None.
 
         Returns:
-            None
+            list: Identifiants des séquences abandonnées pour dépassement du temps limite.
         """
+        from .Predict_structure import Predict_structure
+        from .Batch_predict import Batch_predict
         fasta=Rna_parser.parse_fasta(infasta)
-        struct_list=[]
-        for id,datas in fasta.items():
-            rna_seq=Rna_seq(datas['description'],datas['seq'])
-            struct_list.append(Predict_structure(rna_seq,minloop,skipPredAll=True,bases_scores=scores))
+        rna_list=[Rna_seq(datas['description'],datas['seq']) for datas in fasta.values()]
+        struct_list=[None]*len(rna_list)
+        short=[idx for idx,rna_seq in enumerate(rna_list) if batch and len(rna_seq.seq)<=batch_max_length]
+        if short:
+            for idx,s in zip(short,Batch_predict([rna_list[idx] for idx in short],minloop,bases_scores=scores,metrics_hook=metrics_hook).structures):
+                struct_list[idx]=s
+        skipped=[]
+        for idx,rna_seq in enumerate(rna_list):
+            if struct_list[idx] is None:
+                try:
+                    struct_list[idx]=Predict_structure(rna_seq,minloop,skipPredAll=True,bases_scores=scores,metrics_hook=metrics_hook,timeout=timeout).structure
+                except TimeoutError:
+                    skipped.append(rna_seq.id)
             
         with open(outdb,"w") as outdb_file:
             for s in struct_list:
-                outdb_file.write(">{}\n{}\n{}\n".format(s.rna.id,s.rna.seq,s.structure.dotpar))
+                if s is not None:
+                    outdb_file.write(">{}\n{}\n{}\n".format(s.rna.id,s.rna.seq,s.dotpar))
+        return skipped
     
     @staticmethod
-    def parse_dotbrackets_file(filename: str,minimal_loop_length=3):
+    def parse_dotbrackets_file(filename: str,minimal_loop_length=3,pseudoknots=False):
         """
         Analyse un fichier de dot-bracket et retourne un dictionnaire de structures d'ARN.
 
         Args:
             filename (str): Le chemin vers le fichier de dot-bracket.
             minimal_loop_length (int, optionnel): La longueur minimale de la boucle pour la validation des épingles à cheveux. Par défaut à 3.
+            pseudoknots (bool, optionnel): Accepte les pseudonoeuds notés '[]', '{}' ou '<>'. Par défaut à False.
 
         Returns:
             dict: Un dictionnaire où les clés sont les IDs de séquence et les valeurs sont des objets de structure d'ARN.
@@ -77,7 +98,7 @@ class Rna_parser:
         Raises:
             Exception: Si le fichier n'existe pas ou s'il y a des erreurs de format dans les séquences.
         """
-        dotpar_alphabet=Alphabet.dotpar()
+        dotpar_alphabet=Alphabet.dotpar()+(Alphabet.brackets() if pseudoknots else "")
         rna_alphabet=Alphabet.rna()
         rnastruct_list={}
         out_error=[]
@@ -117,13 +138,14 @@ class Rna_parser:
         return rnastruct_list
     
     @staticmethod
-    def parse_connect_file(filename:str ,minimal_loop_length=3):
+    def parse_connect_file(filename:str ,minimal_loop_length=3,pseudoknots=False):
         """
         Analyse un fichier au format connect et retourne un objet de structure d'ARN.
 
         Args:
             filename (str): Le chemin vers le fichier au format connect.
             minimal_loop_length (int, optionnel): La longueur minimale de la boucle pour la validation de structure. Par défaut à 3.
+            pseudoknots (bool, optionnel): Accepte les paires qui se croisent (notées '[]', '{}' ou '<>'). Par défaut à False.
 
         Returns:
             Rna_structure: Un objet de structure d'ARN.
@@ -131,28 +153,133 @@ class Rna_parser:
         Raises:
             Exception: S'il y a des erreurs de format dans le fichier connect.
         """
-        seq=""
-        fold=[]
-        fold_set=set()
         with open(filename,"r") as inct:
-            for line in inct:
-                tmp=line.strip().split()
-                if len(tmp)==3 and int(tmp[2])>0:
-                    pos=int(tmp[0])-1
-                    pos_link=int(tmp[2])-1
-                    fold.append((pos,pos_link))
-                    fold_set.add((min(pos,pos_link),max(pos,pos_link)))
-                seq+=tmp[1].upper()
-        if not Rna_parser.__check_connect_format(seq,fold,fold_set,minimal_loop_length):
-            raise Exception("Erreur dans la verification du format connect")
-        rna=Rna_seq(filename,seq)
-        return Rna_structure(rna,fold=fold_set)
+            for struct in Rna_parser.iter_connect(inct,minimal_loop_length,seqid=filename,pseudoknots=pseudoknots):
+                return struct
+        raise Exception("Erreur dans la verification du format connect")
+
+    @staticmethod
+    def iter_fasta(handle):
+        """
+        Lit un flux FASTA un enregistrement à la fois.
+
+        Args:
+            handle (file): Flux texte ouvert (fichier, sys.stdin).
+
+        Yields:
+            Rna_seq: Séquence de chaque enregistrement, identifiée par sa ligne de description.
+
+        Raises:
+            Exception: Si une séquence n'est pas un ARN ou ADNc.
+        """
+        description=None
+        seq=[]
+        for line in handle:
+            line=line.strip()
+            if line.startswith(">"):
+                if description is not None:
+                    yield Rna_seq(description,"".join(seq))
+                description=line[1:]
+                seq=[]
+            elif line and description is not None:
+                seq.append(line.upper())
+        if description is not None:
+            yield Rna_seq(description,"".join(seq))
+
+    @staticmethod
+    def iter_dotbrackets(handle,minimal_loop_length=3,pseudoknots=False):
+        """
+        Lit un flux dot-bracket (identifiant, séquence, structure) un enregistrement à la fois.
+
+        Args:
+            handle (file): Flux texte ouvert (fichier, sys.stdin).
+            minimal_loop_length (int, optionnel): La longueur minimale de la boucle pour la validation des épingles à cheveux. Par défaut à 3.
+            pseudoknots (bool, optionnel): Accepte les pseudonoeuds notés '[]', '{}' ou '<>'. Par défaut à False.
+
+        Yields:
+            Rna_structure: Structure de chaque enregistrement.
+
+        Raises:
+            Exception: S'il y a une erreur de format dans un enregistrement.
+        """
+        dotpar_alphabet=Alphabet.dotpar()+(Alphabet.brackets() if pseudoknots else "")
+        rna_alphabet=Alphabet.rna()
+        record=[]
+        for line in handle:
+            line=line.strip()
+            if not line:
+                continue
+            record.append(line)
+            if len(record)<3:
+                continue
+            line_id,seq,dotpar=record[0],record[1].upper(),record[2]
+            record=[]
+            if not line_id.startswith(">") or not all(b in rna_alphabet for b in seq) or not all(b in dotpar_alphabet for b in dotpar):
+                raise Exception("Erreur(s) de format parenthésé:\n\t=> Erreurs dans la séquence {}".format(line_id))
+            struct=Rna_structure(Rna_seq(line_id[1:],seq),dotpar=dotpar)
+            if not struct.check_structure() or not struct.check_hairpin(minimal_loop_length):
+                raise Exception("Erreur(s) de format parenthésé:\n\t=> Erreurs dans la séquence {}".format(line_id[1:]))
+            yield struct
+        if record:
+            raise Exception("Erreur(s) de format parenthésé:\n\t=> Enregistrement incomplet {}".format(record[0]))
+
+    @staticmethod
+    def iter_connect(handle,minimal_loop_length=3,seqid="ct",pseudoknots=False):
+        """
+        Lit un flux au format connect un enregistrement à la fois.
+
+        Un enregistrement commence par une ligne d'en-tête facultative 'longueur titre'
+        suivie d'une ligne par base, à 3 colonnes (position, base, partenaire) ou
+        aux 6 colonnes habituelles (le partenaire est alors en 5e colonne). Sans
+        en-tête, un nouvel enregistrement commence quand la position revient à 1.
+
+        Args:
+            handle (file): Flux texte ouvert (fichier, sys.stdin).
+            minimal_loop_length (int, optionnel): La longueur minimale de la boucle pour la validation de structure. Par défaut à 3.
+            seqid (str, optionnel): Identifiant des enregistrements sans en-tête. Par défaut à 'ct'.
+            pseudoknots (bool, optionnel): Accepte les paires qui se croisent (notées '[]', '{}' ou '<>'). Par défaut à False.
+
+        Yields:
+            Rna_structure: Structure de chaque enregistrement.
+
+        Raises:
+            Exception: S'il y a des erreurs de format dans un enregistrement.
+        """
+        title=None
+        expected=None
+        lines=[]
+        for line in handle:
+            tmp=line.split()
+            if not tmp:
+                continue
+            if expected is None and Rna_parser.__is_connect_header(tmp):
+                if lines:
+                    yield Rna_parser.__connect_record(lines,seqid,minimal_loop_length,pseudoknots)
+                    lines=[]
+                expected=int(tmp[0])
+                title=" ".join(tmp[1:]) or seqid
+                if expected==0:
+                    yield Rna_parser.__connect_record([],title,minimal_loop_length,pseudoknots)
+                    expected=None
+                continue
+            if expected is None and lines and tmp[0]=="1":
+                yield Rna_parser.__connect_record(lines,seqid,minimal_loop_length,pseudoknots)
+                lines=[]
+            lines.append(tmp)
+            if expected is not None and len(lines)==expected:
+                yield Rna_parser.__connect_record(lines,title,minimal_loop_length,pseudoknots)
+                lines=[]
+                expected=None
+        if expected is not None:
+            raise Exception("Erreur de format connect: l'enregistrement '{}' est incomplet".format(title))
+        if lines:
+            yield Rna_parser.__connect_record(lines,seqid,minimal_loop_length,pseudoknots)
         
     #================
     #Méthodes privées
     #================ 
     
-    def __check_connect_format(seq: str,fold: list,fold_set: set,minimal_loop_length: int):
+    def __check_connect_format(seq: str,fold: list,fold_set: set,minimal_loop_length: int,pseudoknots=False):
         """
         Vérifie le format d'un fichier connect.
     
@@ -161,6 +288,7 @@ class Rna_parser:
             fold (list): Liste des paires de positions de liaison.
             fold_set (set): Ensemble des paires de positions de liaison.
             minimal_loop_length (int): Longueur minimale de la boucle.
+            pseudoknots (bool, optionnel): Accepte les paires qui se croisent. Par défaut à False.
     
         Returns:
             bool: Retourne True si le format est correct, sinon lève une exception.
@@ -176,7 +304,7 @@ class Rna_parser:
         open_pos=sorted([v[0] for v in fold])
         close_pos=sorted([v[1] for v in fold])
         
-        crossings=Rna_parser.__check_connect_croisements(fold_set)
+        crossings=[] if pseudoknots else Rna_parser.__check_connect_croisements(fold_set)
         
         if len(crossings)>0:
             out_error.append("\t=>il y a des croisements entre les positions")
@@ -194,6 +322,55 @@ class Rna_parser:
         
         return True
     
+    @staticmethod
+    def __is_connect_header(tmp: list):
+        """
+        Indique si une ligne découpée d'un fichier connect est une ligne d'en-tête.
+
+        Args:
+            tmp (list): Colonnes de la ligne.
+
+        Returns:
+            bool: True pour une ligne 'longueur titre'.
+        """
+        if not tmp[0].isdigit():
+            return False
+        return len(tmp) not in (3,6) or len(tmp[1])!=1 or not tmp[2].isdigit()
+
+    @staticmethod
+    def __connect_record(lines: list,seqid: str,minimal_loop_length: int,pseudoknots=False):
+        """
+        Construit la structure d'un enregistrement connect.
+
+        Args:
+            lines (list): Colonnes des lignes de l'enregistrement.
+            seqid (str): Identifiant de la séquence.
+            minimal_loop_length (int): Longueur minimale de la boucle.
+            pseudoknots (bool, optionnel): Accepte les paires qui se croisent. Par défaut à False.
+
+        Returns:
+            Rna_structure: Structure de l'enregistrement.
+
+        Raises:
+            Exception: S'il y a des erreurs de format dans l'enregistrement.
+        """
+        seq=[]
+        fold=[]
+        fold_set=set()
+        for tmp in lines:
+            link=tmp[4] if len(tmp)>=6 else tmp[2] if len(tmp)==3 else "0"
+            if int(link)>0:
+                pos=int(tmp[0])-1
+                pos_link=int(link)-1
+                fold.append((pos,pos_link))
+                fold_set.add((min(pos,pos_link),max(pos,pos_link)))
+            seq.append(tmp[1].upper())
+        seq="".join(seq)
+        if not Rna_parser.__check_connect_format(seq,fold,fold_set,minimal_loop_length,pseudoknots):
+            raise Exception("Erreur dans la verification du format connect")
+        rna=Rna_seq(seqid,seq)
+        return Rna_structure(rna,fold=fold_set)
+
     def __check_connect_croisements(fold_set: set):
         """
         Vérifie les croisements dans les paires de positions de liaison.
@@ -17,7 +17,11 @@ class Rna_seq:
         Identifiant de la séquence.
     __seq : str
         Séquence d'ARN en majuscules.
+    __codes : bytes
+        Codes des bases (Alphabet.encode_rna_bytes), calculés au premier accès.
     """
+    __slots__=("__id","__seq","__codes")
+
     def __init__(self,seqid: str,inrna: str):
         """
         Initialise une nouvelle instance de la classe Rna_seq.
@@ -31,6 +35,7 @@ class Rna_seq:
         """
         self.__id=seqid
         self.__seq=inrna.upper()
+        self.__codes=None
         self.__check_rna()
 
     #===================
@@ -75,6 +80,35 @@ class Rna_seq:
             L'identifiant de la séquence.
         """
         return self.__id
+
+    @property
+    def encoded(self):
+        """
+        Retourne les codes des bases, un octet par base.
+
+        Les codes sont calculés une seule fois puis conservés dans l'objet.
+
+        Returns:
+        ---------
+        bytes
+            Codes des bases (indice dans Alphabet.rna()).
+        """
+        if self.__codes is None:
+            self.__codes=Alphabet.encode_rna_bytes(self.__seq)
+        return self.__codes
+
+    @property
+    def codes(self):
+        """
+        Retourne les codes des bases sous forme de tableau numpy, sans copie.
+
+        Returns:
+        ---------
+        numpy.ndarray
+            Tableau uint8 en lecture seule, identique à Alphabet.encode_rna(seq).
+        """
+        import numpy as np
+        return np.frombuffer(self.encoded,dtype=np.uint8)
     
     #===================
     #Méthodes privées
@@ -92,6 +126,5 @@ class Rna_seq:
             Si la séquence contient des bases non valides pour l'ARN.
         """
         self.__seq = self.seq.replace("T","U")
-        for b in self.seq:
-            if b not in Alphabet.rna():
-                raise Exception("La séquence n'est pas un ARN ou ADNc")
\ No newline at end of file
+        if not self.__seq.isascii() or self.__seq.encode("ascii").translate(None,Alphabet.rna().encode("ascii")):
+            raise Exception("La séquence n'est pas un ARN ou ADNc")
\ No newline at end of file
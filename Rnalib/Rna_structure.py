@@ -6,9 +6,11 @@ Created on Tue Mar  7 17:11:36 2023
 @author: Mathieu Genete
 """
 import re
+import sys
 from .Tree import Tree
 from .Rna_seq import Rna_seq
 from .Scores import Scores
+from .Alphabet import Alphabet
 
 class Rna_structure:
     """
@@ -21,16 +23,23 @@ class Rna_structure:
     __fold : list
         Liste des paires de bases formant la structure.
     __dotpar : str
-        Représentation en notation dot-parenthèse de la structure.
+        Représentation en notation dot-parenthèse de la structure. Les paires
+        qui croisent des paires '()' (pseudonoeuds) sont notées '[]', puis
+        '{}' et '<>' (Alphabet.brackets()).
     __scores : Scores
         Scores associés aux paires de bases.
     __arbre : Tree
         Arbre représentant la structure.
     __score : int
         Score total de la structure.
+    __cut : int
+        Position du début du second brin pour un dimère (None pour un monomère).
+    __partners : list
+        Table des paires: partenaire de chaque position, -1 si non appariée
+        (calculée au premier accès).
     """
     
-    def __init__(self,rnaSeq: Rna_seq,fold=None,scores=None,dotpar=None):
+    def __init__(self,rnaSeq: Rna_seq,fold=None,scores=None,dotpar=None,cut=None):
         """
         Initialise une nouvelle instance de Rna_structure.
         
@@ -43,7 +52,11 @@ class Rna_structure:
         scores : Scores, optionnel
             Scores associés aux paires de bases.
         dotpar : str, optionnel
-            Représentation en notation dot-parenthèse de la structure.
+            Représentation en notation dot-parenthèse de la structure. Un '&'
+            sépare les deux brins d'un dimère, les pseudonoeuds sont notés
+            avec '[]', '{}' et '<>'.
+        cut : int, optionnel
+            Position du début du second brin dans rnaSeq pour un dimère.
         
         Exceptions:
         -----------
@@ -61,6 +74,11 @@ class Rna_structure:
             raise Exception("'{}' n'est pas un objet Score()".format(scores))
             
         self.__rna=rnaSeq
+        if dotpar is not None and "&" in dotpar:
+            cut=dotpar.index("&")
+            dotpar=dotpar.replace("&","")
+        self.__cut=cut
+        self.__partners=None
         if (fold is None and dotpar is None) or (fold is not None and dotpar is not None):
             raise Exception("une structure RNA_structure requière soit un fold ou soit un dotpar")
         elif fold is None:
@@ -77,16 +95,11 @@ class Rna_structure:
         
         if self.check_structure():
             #self.__arbre_s=self.__arbre_s(self.__dotpar)
-            fold_dict={k:v for k,v in sorted(self.__fold)}
-            self.__arbre=self.__construct_tree(Tree((-1,-1)),fold_dict,0,len(self.__rna.seq))
-        
-        rna=self.__rna.seq
-        self.__score=0
-        if self.__dotpar and self.__dot_par_to_bp(self.__dotpar):
-            for i,j in self.__dot_par_to_bp(self.__dotpar):
-                pair=(rna[i],rna[j])
-                if pair in self.__scores.pairs:
-                    self.__score+=self.__scores.pairs[pair]
+            self.__arbre=self.__construct_tree(Tree((-1,-1)),self.__nested_partners(),0,len(self.__rna.seq))
+        
+        codes=self.__rna.encoded
+        table=self.__scores.code_table
+        self.__score=sum(table[codes[i]][codes[j]] for i,j in self.__fold)
 
     #===================
     #Getters Setters
@@ -99,7 +112,7 @@ class Rna_structure:
     @property
     def dotpar(self):
         """Retourne la représentation en notation dot-parenthèse de la structure."""
-        return self.__dotpar
+        return self.__split_strands(self.__dotpar)
     
     @property
     def fold(self):
@@ -115,17 +128,65 @@ class Rna_structure:
     def arbre(self):
         """Retourne l'arbre représentant la structure."""
         return self.__arbre
+    
+    @property
+    def cut(self):
+        """Retourne la position du début du second brin (None pour un monomère)."""
+        return self.__cut
+
+    @property
+    def partners(self):
+        """
+        Retourne la table des paires, construite une seule fois en un passage sur la structure.
+        
+        Retourne:
+        ---------
+        list
+            Partenaire de chaque position, -1 pour une position non appariée.
+        """
+        if self.__partners is None:
+            self.__partners=self.__dot_par_to_partners(self.__dotpar)
+        return self.__partners
+
+    @property
+    def pseudoknotted(self):
+        """
+        Indique si la structure contient des paires qui se croisent.
+        
+        Retourne:
+        ---------
+        bool
+            True si des paires sont notées avec '[]', '{}' ou '<>'.
+        """
+        return any(c in self.__dotpar for c in Alphabet.brackets()[2:])
 
     #===================
     #Méthodes magiques
     #=================== 
     def __str__(self):
         """Retourne la représentation en notation dot-parenthèse de la structure."""
-        return self.__dotpar
-    
+        return self.__split_strands(self.__dotpar)
+
     #===================
     #Méthodes publiques
     #===================    
+    def partner(self,i: int):
+        """
+        Retourne le partenaire d'une position.
+        
+        Paramètres:
+        -----------
+        i : int
+            Position dans la séquence.
+        
+        Retourne:
+        ---------
+        int
+            Position appariée à i, ou None si i n'est pas appariée.
+        """
+        j=self.partners[i]
+        return None if j<0 else j
+    
     def structure_to_ct(self,filename=None):
         """
         Convertit la structure au format connect (CT).
@@ -140,16 +201,9 @@ class Rna_structure:
         str
             La table CT sous forme de chaîne de caractères si filename est None.
         """
-        dotpar=self.__dotpar
         rna_seq=self.__rna.seq
-        outct=self.__dot_par_to_bp(dotpar)
-        third_col=[0]*len(dotpar)
-        for i,j in outct:
-            third_col[i]=j+1
-            third_col[j]=i+1
-        txtCT=""
-        for i in range(0,len(rna_seq)):
-            txtCT+="{}\t{}\t{}\n".format(i+1,rna_seq[i],third_col[i])
+        partners=self.partners
+        txtCT="".join("{}\t{}\t{}\n".format(i+1,rna_seq[i],partners[i]+1) for i in range(0,len(rna_seq)))
             
         if filename is not None:
             with open(filename,"w") as foutCT:
@@ -206,20 +260,88 @@ class Rna_structure:
             La structure compactée en notation dot-parenthèse.
         """
         struct=list(self.__dotpar)
-        fold_dict={i:j for i,j in self.__fold}
+        partners=self.partners
+        opening=Alphabet.brackets()[0::2]
         for i in range(0,len(struct)-1):
-            if struct[i]=="(" and struct[i+1]=="(":
-                if fold_dict[i]-fold_dict[i+1]==1:
+            if struct[i] in opening and struct[i+1]==struct[i]:
+                if partners[i]-partners[i+1]==1:
                     struct[i]=""
-                    struct[fold_dict[i]]=""
+                    struct[partners[i]]=""
         output="".join(struct)
         
         output= re.sub(r"\.+",".",output)
         return output
     
-    def dot_par_to_latex(self,dotb=None,print_struct=True,numbers_shift=1):
+    def loop_decomposition(self):
+        """
+        Décompose la structure en hélices et en boucles.
+        
+        Chaque élément est un tuple (type, i, j, longueur, gauche, droite,
+        branches, tige):
+        - 'helix': hélice de paires empilées, (i,j) sa paire externe,
+          longueur et tige égales au nombre de paires;
+        - 'hairpin': boucle terminale fermée par (i,j), longueur = bases non appariées;
+        - 'bulge' et 'interior': boucle entre (i,j) et une seule paire interne,
+          gauche et droite = bases non appariées de chaque côté (l'un des deux
+          est nul pour un renflement), longueur = gauche + droite;
+        - 'multiloop': jonction fermée par (i,j), branches = nombre d'hélices
+          qui s'y rejoignent (3 pour une jonction à trois voies), longueur =
+          bases non appariées;
+        - 'exterior': boucle externe (i=-1, j=n), branches = hélices de premier niveau.
+        Pour les boucles, tige est le nombre de paires de l'hélice qui se
+        termine par la paire fermante (i,j). Les deux brins d'un dimère sont
+        décomposés comme une seule séquence; les paires d'un pseudonoeud
+        (hors '()') sont comptées comme des bases non appariées.
+        
+        Retourne:
+        ---------
+        list
+            Liste de tuples, les hélices puis les boucles dans l'ordre des paires fermantes.
+        """
+        n=len(self.__dotpar)
+        partner=self.__nested_partners()
+        pairs=[(i,j) for i,j in enumerate(partner) if j>i]
+        #stem[i]: nombre de paires empilées se terminant par la paire ouverte en i
+        stem=[0]*n
+        helices=[]
+        for i,j in pairs:
+            if i>0 and j<n-1 and partner[i-1]==j+1:
+                stem[i]=stem[i-1]+1
+                continue
+            stem[i]=1
+            length=1
+            while i+length<j-length and partner[i+length]==j-length:
+                length+=1
+            helices.append(("helix",i,j,length,0,0,0,length))
+        loops=[]
+        for i,j in [(-1,n)]+pairs:
+            inner=[]
+            unpaired=0
+            k=i+1
+            while k<j:
+                if partner[k]>k:
+                    inner.append((k,partner[k]))
+                    k=partner[k]+1
+                else:
+                    unpaired+=1
+                    k+=1
+            if i<0:
+                loops.append(("exterior",i,j,unpaired,0,0,len(inner),0))
+            elif not inner:
+                loops.append(("hairpin",i,j,unpaired,0,0,0,stem[i]))
+            elif len(inner)==1:
+                left=inner[0][0]-i-1
+                right=j-inner[0][1]-1
+                if left or right:
+                    kind="interior" if left and right else "bulge"
+                    loops.append((kind,i,j,left+right,left,right,1,stem[i]))
+            else:
+                loops.append(("multiloop",i,j,unpaired,0,0,len(inner)+1,stem[i]))
+        return helices+loops
+    
+    def dot_par_to_latex(self,dotb=None,print_struct=True,numbers_shift=1,output=None):
         """
-        Convertit la structure en notation dot-parenthèse en code LaTeX.
+        Convertit la structure en notation dot-parenthèse en code LaTeX (package forest).
         
         Paramètres:
         -----------
@@ -227,34 +349,43 @@ class Rna_structure:
             Structure en notation dot-parenthèse. Si None, utilise la structure de l'objet.
         print_struct : bool, optionnel
             Si True, imprime la structure. Sinon, imprime les positions des paires de bases.
+            Les bases d'un pseudonoeud (hors '()') sont des feuilles, comme les bases non appariées.
         numbers_shift : int, optionnel
             Décalage des numéros de positions.
+        output : str ou fichier, optionnel
+            Chemin du fichier ou objet fichier (buffer) dans lequel écrire le code.
+            Si None, le code est écrit sur la sortie standard.
+        
+        Retourne:
+        ---------
+        str
+            Le code LaTeX.
         """
         if dotb is None:
             dotb=self.__dotpar
-        outstr=""
-        for i in range(0,len(dotb)):
-            rslt=self.__search_link(dotb,i)
-            rslt=(rslt[0]+numbers_shift,rslt[1]+numbers_shift)
-            if dotb[i]=="(":
-                if print_struct:
-                    outstr+="[.,green "
-                else:
-                    outstr+="[{$"+str(rslt)+"$},green "
-            elif dotb[i]==".":
-                if print_struct:
-                    outstr+="[.,blue]"
-                else:
-                    outstr+="[{$"+str(rslt)+"$},blue]"
-            elif dotb[i]==")":
-                outstr+="]"
-        print("\\begin{forest}")
-        if print_struct:
-            print("for tree={circle,fill,l sep=30pt}")
+            partners=self.__nested_partners()
+        else:
+            partners=self.__nested_partners(dotb)
+        nodes=[]
+        for i,car in enumerate(dotb):
+            j=partners[i] if partners[i]>i else i
+            rslt=(i+numbers_shift,j+numbers_shift)
+            if car=="(":
+                nodes.append("[.,green " if print_struct else "[{$"+str(rslt)+"$},green ")
+            elif car==")":
+                nodes.append("]")
+            else:
+                nodes.append("[.,blue]" if print_struct else "[{$"+str(rslt)+"$},blue]")
+        header="for tree={circle,fill,l sep=30pt}" if print_struct else "for tree={l sep=30pt}"
+        latex="\\begin{forest}\n"+header+"\n["+"".join(nodes)+"]\n\\end{forest}\n"
+        if output is None:
+            sys.stdout.write(latex)
+        elif isinstance(output,str):
+            with open(output,"w") as latexfile:
+                latexfile.write(latex)
         else:
-            print("for tree={l sep=30pt}")
-        print("["+outstr+"]")
-        print("\\end{forest}")
+            output.write(latex)
+        return latex
         
     def print_struct(self,sepsize=0,print_pos=False):
         """
@@ -267,8 +398,8 @@ class Rna_structure:
         print_pos : bool, optionnel
             Si True, affiche les positions des bases.
         """
-        seq=self.__rna.seq
-        dotpar=self.__dotpar
+        seq=self.__split_strands(self.__rna.seq)
+        dotpar=self.__split_strands(self.__dotpar)
         sep=" "*sepsize
         print(f"id: {self.__rna.id}")
         if print_pos:
@@ -295,35 +426,135 @@ class Rna_structure:
         tuple
             Liste triée des paires de bases sous forme de tuples.
         """
-        open_parens = []
         bps = []
-        if self.__parens_count(struc):        
-            for i, x in enumerate(struc):
-                if x == '(':
-                    open_parens.append(i)
-                elif x == ')':
-                    if len(open_parens) > 0:
-                        bps.append((open_parens.pop(), i))
+        if self.__parens_count(struc):
+            bps = [(i, j) for i, j in enumerate(self.__dot_par_to_partners(struc)) if j > i]
 
-        return tuple(sorted(bps))
+        return tuple(bps)
+    
+    def __dot_par_to_partners(self,struc: str):
+        """
+        Construit la table des paires d'une structure en un passage, avec une pile par type de crochet.
+        
+        Paramètres:
+        -----------
+        struc : str
+            Structure en notation dot-parenthèse.
+        
+        Retourne:
+        ---------
+        list
+            Partenaire de chaque position, -1 si non appariée.
+        """
+        brackets=Alphabet.brackets()
+        partners=[-1]*len(struc)
+        open_parens={c:[] for c in brackets[0::2]}
+        closing={brackets[t+1]:open_parens[brackets[t]] for t in range(0,len(brackets),2)}
+        for i,x in enumerate(struc):
+            if x in open_parens:
+                open_parens[x].append(i)
+            elif x in closing and closing[x]:
+                j=closing[x].pop()
+                partners[i]=j
+                partners[j]=i
+        return partners
+    
+    def __nested_partners(self,struc=None):
+        """
+        Retourne la table des paires réduite aux paires '()', les pseudonoeuds étant vus comme non appariés.
+        
+        Paramètres:
+        -----------
+        struc : str, optionnel
+            Structure en notation dot-parenthèse. Si None, utilise la structure de l'objet.
+        
+        Retourne:
+        ---------
+        list
+            Partenaire de chaque position, -1 si non appariée ou dans un pseudonoeud.
+        """
+        if struc is None:
+            if not self.pseudoknotted:
+                return self.partners
+            struc,partners=self.__dotpar,self.partners
+        else:
+            partners=self.__dot_par_to_partners(struc)
+        return [j if c in "()" else -1 for j,c in zip(partners,struc)]
+    
+    def __split_strands(self,txt: str):
+        """
+        Insère le séparateur '&' entre les deux brins d'un dimère.
+        
+        Paramètres:
+        -----------
+        txt : str
+            Séquence ou structure couvrant les deux brins.
+        
+        Retourne:
+        ---------
+        str
+            Le texte avec un '&' à la position du second brin, ou inchangé pour un monomère.
+        """
+        if self.__cut is None:
+            return txt
+        return txt[:self.__cut]+"&"+txt[self.__cut:]
     
     def __fold_to_dotpar(self):
         """
         Convertit une liste de paires de bases en notation dot-parenthèse.
         
+        Retourne:
+        ---------
+        str
+            Structure en notation dot-parenthèse (voir pairs_to_dotpar).
+        """
+        return Rna_structure.pairs_to_dotpar(self.__fold,len(self.__rna.seq))
+    
+    @staticmethod
+    def pairs_to_dotpar(fold,length: int):
+        """
+        Convertit une liste de paires de bases en notation dot-parenthèse.
+        
+        Les paires qui se croisent sont réparties sur les niveaux de
+        Alphabet.brackets(), chaque paire prenant le premier niveau où elle
+        ne croise aucune autre paire.
+        
+        Paramètres:
+        -----------
+        fold : list
+            Paires de bases (i,j).
+        length : int
+            Longueur de la séquence.
+        
         Retourne:
         ---------
         str
             Structure en notation dot-parenthèse.
+        
+        Exceptions:
+        -----------
+        Exception
+            Si les paires demandent plus de niveaux que Alphabet.brackets().
         """
-        rna=self.__rna.seq
-        fold=self.__fold
-        out_dot=['.']*len(rna)
-        for i,j in fold:
-            out_dot[i]="("
-            out_dot[j]=")"
-        dotpar_txt="".join(out_dot)
-        return dotpar_txt
+        brackets=Alphabet.brackets()
+        out_dot=['.']*length
+        #chaque paire reçoit le premier niveau de crochets où elle ne croise aucune paire
+        levels=[]
+        for i,j in sorted((min(bp),max(bp)) for bp in fold):
+            for level,opened in enumerate(levels):
+                while opened and opened[-1]<i:
+                    opened.pop()
+                if not opened or j<opened[-1]:
+                    break
+            else:
+                level=len(levels)
+                if 2*level>=len(brackets):
+                    raise Exception("la structure demande plus de {} niveaux de crochets".format(len(brackets)//2))
+                levels.append([])
+            levels[level].append(j)
+            out_dot[i]=brackets[2*level]
+            out_dot[j]=brackets[2*level+1]
+        return "".join(out_dot)
             
     def __parens_count(self,dotpar: str):
         """
@@ -339,9 +570,11 @@ class Rna_structure:
         bool
             True si le nombre de parenthèses ouvrantes et fermantes est identique, False sinon.
         """
-        if not dotpar.count('(') == dotpar.count(')'):
-            print("Erreur dans la structure: {}".format(dotpar))
-            return False
+        brackets=Alphabet.brackets()
+        for t in range(0,len(brackets),2):
+            if not dotpar.count(brackets[t]) == dotpar.count(brackets[t+1]):
+                print("Erreur dans la structure: {}".format(dotpar))
+                return False
         return True
     
     def __base_pairs_check(self):
@@ -362,29 +595,6 @@ class Rna_structure:
                 return False
         return True
     
-    def __search_link(self,rnastruct: str,i: int):
-        """
-        Trouve la paire de base correspondante pour une parenthèse ouvrante.
-        
-        Paramètres:
-        -----------
-        rnastruct : str
-            Structure en notation dot-parenthèse.
-        i : int
-            Position de la parenthèse ouvrante.
-        
-        Retourne:
-        ---------
-        tuple
-            Indices de la paire de base correspondante.
-        """
-        j=i+1
-        while j<=len(rnastruct):
-            if j-i>=1 and rnastruct[i]=="(" and rnastruct[i:j].count("(")==rnastruct[i:j].count(")") :
-                return(i,j-1)
-            j+=1
-        return (i,i)
-
     def __arbre_s(self,structure: str,start=0,end=0,tree=None):
         """
         Construit un arbre représentant la structure ARN.
@@ -409,30 +619,18 @@ class Rna_structure:
             start=0
             end=len(structure)
             tree=Tree((-1,-1))
-        while start<end:
-            start+=1
-            car=structure[start-1]
-            if car=='.':
-                tree.add_child(Tree((start-1,start-1)))
-            if car=='(':
-                sub_struct=self.__search_link(structure,start-1)
-                subtree=Tree(sub_struct)
-                tree.add_child(subtree)
-                self.__arbre_s(structure,sub_struct[0]+1,sub_struct[1],subtree)
-                self.__arbre_s(structure,sub_struct[1],end,tree)
-                break
-        return tree
+        return self.__construct_tree(tree,self.__dot_par_to_partners(structure),start,end)
     
-    def __construct_tree(self,tree: Tree,fold_dict: dict,start=0,end=0):
+    def __construct_tree(self,tree: Tree,partners: list,start=0,end=0):
         """
-        Construit un arbre à partir d'un dictionnaire de paires de bases (folds).
+        Construit un arbre à partir de la table des paires.
         
         Paramètres:
         -----------
         tree : Tree
             Arbre à compléter.
-        fold_dict : dict
-            Dictionnaire des paires de bases (fold).
+        partners : list
+            Partenaire de chaque position, -1 si non appariée.
         start : int, optionnel
             Position de départ pour la construction de l'arbre.
         end : int, optionnel
@@ -443,14 +641,19 @@ class Rna_structure:
         Tree
             Arbre représentant la structure ARN.
         """
-        while start<end:
-            if start not in fold_dict.keys():
-                tree.add_child(Tree((start,start)))
-                start+=1
-            else:
-                sub_struct=(start,fold_dict[start])
-                subtree=Tree(sub_struct)
-                tree.add_child(subtree)
-                self.__construct_tree(subtree,fold_dict,sub_struct[0]+1,sub_struct[1])
-                start=sub_struct[1]+1
+        #pile explicite: la profondeur d'imbrication n'est pas limitée par la récursion
+        pending=[(tree,start,end)]
+        while pending:
+            node,start,end=pending.pop()
+            while start<end:
+                if start>=len(partners) or partners[start]<=start:
+                    node.add_child(Tree((start,start)))
+                    start+=1
+                else:
+                    sub_struct=(start,partners[start])
+                    subtree=Tree(sub_struct)
+                    node.add_child(subtree)
+                    pending.append((node,sub_struct[1]+1,end))
+                    pending.append((subtree,sub_struct[0]+1,sub_struct[1]))
+                    break
         return tree
\ No newline at end of file
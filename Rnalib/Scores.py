@@ -5,6 +5,7 @@ Created on Tue Mar  7 17:16:16 2023
 
 @author: Mathieu Genete
 """
+from .Alphabet import Alphabet
 
 class Scores:
     """
@@ -88,6 +89,38 @@ class Scores:
             Dictionnaire des scores avec les paires triées.
         """
         return {"".join(sorted(v)):self.__pairs[v] for v in self.__pairs.keys()}
+    
+    @property
+    def pair_table(self):
+        """
+        Retourne la table des scores indexée par les codes de Alphabet.encode_rna().
+        
+        La dernière ligne et la dernière colonne correspondent aux positions
+        qui ne peuvent pas s'apparier (liens, gaps, bases inconnues).
+        
+        Retourne:
+        ---------
+        numpy.ndarray
+            Matrice d'entiers de taille (5,5).
+        """
+        import numpy as np
+        return np.array(self.code_table,dtype=np.int64)
+
+    @property
+    def code_table(self):
+        """
+        Retourne la table des scores indexée par les codes des bases, sans numpy.
+
+        table[c1][c2] donne le score de la paire de codes (c1,c2) de
+        Rna_seq.encoded; le code len(Alphabet.rna()) ne s'apparie jamais.
+
+        Retourne:
+        ---------
+        tuple
+            Tuple de tuples d'entiers de taille (5,5).
+        """
+        rna=Alphabet.rna()
+        return tuple(tuple(self.__pairs.get((b1,b2),0) for b2 in rna)+(0,) for b1 in rna)+((0,)*(len(rna)+1),)
 
     #===================
     #Méthodes magiques
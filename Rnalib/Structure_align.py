@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 16:40:55 2026
+
+@author: Mathieu Genete
+"""
+import numpy as np
+from .Rna_seq import Rna_seq
+from .Rna_structure import Rna_structure
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+class Structure_align:
+    """
+    Alignement de deux ARN selon leurs séquences et leurs structures.
+
+    Les structures sont fixées (par exemple celles de parse_dotbrackets_file
+    ou de Predict_structure): c'est une version simplifiée de l'alignement de
+    Sankoff où seules les paires '()' des deux structures peuvent être
+    alignées. Une paire (i,j) du premier ARN est soit alignée avec une paire
+    (k,l) du second (i avec k, j avec l, bonus arc_match), soit rompue: ses
+    deux bases sont alors alignées comme des bases non appariées, chacune avec
+    la pénalité arc_break. Les bases alignées reçoivent match ou mismatch, les
+    bases face à un gap reçoivent gap.
+
+    Le score d'un couple de paires est le meilleur alignement de leurs
+    intérieurs, où une paire intérieure peut être alignée avec une paire
+    intérieure (score du couple, déjà calculé car les paires sont traitées
+    de la plus courte à la plus longue). Pour une paire du premier ARN,
+    l'intérieur est aligné ligne par ligne avec l'intérieur de toutes les
+    paires candidates du second ARN à la fois (opérations numpy sur un
+    tableau (paires, colonnes)); les gaps d'une ligne sont propagés par un
+    maximum cumulé. La séquence entière est traitée comme l'intérieur d'une
+    paire virtuelle (-1, n).
+
+    Avec band, deux paires (i,j) et (k,l) ne sont alignées que si |i-k| et
+    |j-l| sont au plus band, et deux bases x et y que si |x-y| est au plus
+    band (band est porté au moins à la différence des longueurs).
+
+    Attributs:
+        __structure1 (Rna_structure): Premier ARN.
+        __structure2 (Rna_structure): Second ARN.
+        __options (dict): Paramètres de score et bande.
+        __score (float): Score de l'alignement.
+        __columns (list): Colonnes de l'alignement (position ou None de chaque ARN).
+        __matched_pairs (list): Couples de paires alignées.
+        __align_time (float): Temps du calcul.
+    """
+    def __init__(self,structure1: Rna_structure,structure2: Rna_structure,match=2,mismatch=-1,gap=-2,arc_match=3,arc_break=-1,band=None):
+        """
+        Initialise une instance de Structure_align et aligne les deux structures.
+
+        Args:
+            structure1 (Rna_structure): Premier ARN.
+            structure2 (Rna_structure): Second ARN.
+            match (float, optionnel): Score de deux bases identiques alignées. Par défaut à 2.
+            mismatch (float, optionnel): Score de deux bases différentes alignées. Par défaut à -1.
+            gap (float, optionnel): Score d'une base face à un gap. Par défaut à -2.
+            arc_match (float, optionnel): Bonus de deux paires alignées. Par défaut à 3.
+            arc_break (float, optionnel): Score ajouté pour chaque base d'une paire rompue. Par défaut à -1.
+            band (int, optionnel): Décalage maximal entre positions alignées. Par défaut à None (sans limite).
+
+        Raises:
+            Exception: Si structure1 ou structure2 n'est pas un objet Rna_structure.
+        """
+        for st in (structure1,structure2):
+            if not isinstance(st,Rna_structure):
+                raise Exception("'{}' n'est pas un objet Rna_structure".format(st))
+        self.__structure1=structure1
+        self.__structure2=structure2
+        self.__options={"match":match,"mismatch":mismatch,"gap":gap,"arc_match":arc_match,"arc_break":arc_break,"band":band}
+        self.__score=0.0
+        self.__columns=[]
+        self.__matched_pairs=[]
+        self.__align_time=0
+
+        self.align()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def structure1(self):
+        """
+        Retourne le premier ARN.
+
+        Returns:
+            Rna_structure: Premier ARN.
+        """
+        return self.__structure1
+
+    @property
+    def structure2(self):
+        """
+        Retourne le second ARN.
+
+        Returns:
+            Rna_structure: Second ARN.
+        """
+        return self.__structure2
+
+    @property
+    def score(self):
+        """
+        Retourne le score de l'alignement.
+
+        Returns:
+            float: Score optimal.
+        """
+        return self.__score
+
+    @property
+    def columns(self):
+        """
+        Retourne les colonnes de l'alignement.
+
+        Returns:
+            list: Couples (x, y) de positions alignées, None face à un gap.
+        """
+        return self.__columns
+
+    @property
+    def alignment(self):
+        """
+        Retourne les deux séquences alignées.
+
+        Returns:
+            tuple: Séquences avec gaps '-', de même longueur.
+        """
+        return self.__gapped(self.__structure1.rna.seq,self.__structure2.rna.seq)
+
+    @property
+    def aligned_structures(self):
+        """
+        Retourne les deux structures alignées.
+
+        Returns:
+            tuple: Structures dot-bracket avec gaps '-', de même longueur.
+        """
+        return self.__gapped(self.__structure1.dotpar.replace("&",""),self.__structure2.dotpar.replace("&",""))
+
+    @property
+    def matched_pairs(self):
+        """
+        Retourne les paires alignées.
+
+        Returns:
+            list: Couples ((i,j),(k,l)) d'une paire du premier ARN et de la paire alignée du second.
+        """
+        return self.__matched_pairs
+
+    @property
+    def align_time(self):
+        """
+        Retourne le temps du calcul.
+
+        Returns:
+            float: Temps en secondes.
+        """
+        return self.__align_time
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def align(self):
+        """
+        Calcule le score des couples de paires puis retrace l'alignement optimal.
+        """
+        start_time=time.time()
+        A=Structure_align.__prepare(self.__structure1)
+        B=Structure_align.__prepare(self.__structure2)
+        options=self.__options
+        arc_scores=Structure_align.__arc_scores(A,B,options)
+        self.__score=float(arc_scores[-1,-1])
+        self.__columns,matched=Structure_align.__traceback(A,B,arc_scores,options)
+        self.__matched_pairs=[(A["arcs"][a],B["arcs"][b]) for a,b in matched]
+        self.__align_time=time.time()-start_time
+
+    @staticmethod
+    def align_score(seq1,dotpar1,seq2,dotpar2,**options):
+        """
+        Retourne le score d'alignement de deux ARN donnés par leurs séquences et leurs structures, sans retracer l'alignement.
+
+        Args:
+            seq1 (str): Séquence du premier ARN.
+            dotpar1 (str): Structure du premier ARN.
+            seq2 (str): Séquence du second ARN.
+            dotpar2 (str): Structure du second ARN.
+            **options: Paramètres de score et band (voir Structure_align).
+
+        Returns:
+            float: Score optimal.
+        """
+        options={**Structure_align.__defaults(),**options}
+        A=Structure_align.__prepare_text(seq1,dotpar1)
+        B=Structure_align.__prepare_text(seq2,dotpar2)
+        return float(Structure_align.__arc_scores(A,B,options)[-1,-1])
+
+    @staticmethod
+    def all_vs_all(structures,workers=None,chunksize=16,**options):
+        """
+        Aligne toutes les paires d'une collection de structures, en parallèle si workers est supérieur à 1.
+
+        Args:
+            structures (dict ou list): {identifiant: Rna_structure} comme celui de Rna_parser.parse_dotbrackets_file, ou liste de Rna_structure.
+            workers (int, optionnel): Nombre de processus. Par défaut à None (aucun).
+            chunksize (int, optionnel): Nombre d'alignements envoyés à la fois à un processus. Par défaut à 16.
+            **options: Paramètres de score et band (voir Structure_align).
+
+        Returns:
+            tuple: Identifiants et matrice symétrique des scores (numpy.ndarray), la diagonale contenant le score de chaque ARN avec lui-même.
+        """
+        if isinstance(structures,dict):
+            ids=list(structures)
+            structures=list(structures.values())
+        else:
+            structures=list(structures)
+            ids=[st.rna.id for st in structures]
+        records=[(st.rna.seq,st.dotpar.replace("&","")) for st in structures]
+        count=len(records)
+        pairs=[(x,y) for x in range(count) for y in range(x,count)]
+        args=[records[x]+records[y]+(options,) for x,y in pairs]
+        if workers is not None and workers>1 and len(args)>1:
+            with ProcessPoolExecutor(min(workers,len(args))) as pool:
+                scores=list(pool.map(Structure_align._align_record,args,chunksize=chunksize))
+        else:
+            scores=[Structure_align._align_record(a) for a in args]
+        matrix=np.zeros((count,count))
+        for (x,y),score in zip(pairs,scores):
+            matrix[x,y]=matrix[y,x]=score
+        return ids,matrix
+
+    @staticmethod
+    def _align_record(record):
+        """
+        Aligne un couple (seq1, dotpar1, seq2, dotpar2, options) pour all_vs_all.
+
+        Args:
+            record (tuple): Séquences, structures et options.
+
+        Returns:
+            float: Score optimal.
+        """
+        seq1,dotpar1,seq2,dotpar2,options=record
+        return Structure_align.align_score(seq1,dotpar1,seq2,dotpar2,**options)
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    @staticmethod
+    def __defaults():
+        """
+        Retourne les paramètres par défaut.
+
+        Returns:
+            dict: Paramètres de score et bande.
+        """
+        return {"match":2,"mismatch":-1,"gap":-2,"arc_match":3,"arc_break":-1,"band":None}
+
+    @staticmethod
+    def __prepare(structure: Rna_structure):
+        """
+        Prépare une structure pour l'alignement.
+
+        Args:
+            structure (Rna_structure): Structure à aligner.
+
+        Returns:
+            dict: Voir __prepare_text.
+        """
+        return Structure_align.__prepare_text(structure.rna.seq,structure.dotpar.replace("&",""))
+
+    @staticmethod
+    def __prepare_text(seq: str,dotpar: str):
+        """
+        Extrait les paires '()' d'une structure, de la plus courte à la plus longue, suivies de la paire virtuelle (-1, n).
+
+        Args:
+            seq (str): Séquence.
+            dotpar (str): Structure en notation dot-bracket.
+
+        Returns:
+            dict: 'seq' (codes des bases), 'paired' (positions appariées), 'arcs' (paires), 'right' (indice de la
+                paire fermée à chaque position, -1 sinon).
+        """
+        n=len(seq)
+        stack=[]
+        arcs=[]
+        for pos,c in enumerate(dotpar):
+            if c=="(":
+                stack.append(pos)
+            elif c==")" and stack:
+                arcs.append((stack.pop(),pos))
+        arcs.sort(key=lambda bp:(bp[1]-bp[0],bp[0]))
+        arcs.append((-1,n))
+        paired=np.zeros(n,dtype=bool)
+        right=np.full(n+1,-1,dtype=np.int64)
+        for index,(i,j) in enumerate(arcs[:-1]):
+            paired[i]=paired[j]=True
+            right[j]=index
+        return {"seq":np.frombuffer(seq.encode("ascii"),dtype=np.uint8),"paired":paired,"arcs":arcs,"right":right}
+
+    @staticmethod
+    def __arc_scores(A,B,options):
+        """
+        Calcule le score de tous les couples de paires compatibles avec la bande.
+
+        Args:
+            A (dict): Premier ARN préparé.
+            B (dict): Second ARN préparé.
+            options (dict): Paramètres de score et bande.
+
+        Returns:
+            numpy.ndarray: Scores (paires de A, paires de B), -inf pour les couples non alignables;
+                la dernière case est le score de l'alignement des séquences entières.
+        """
+        arcs_a,arcs_b=A["arcs"],B["arcs"]
+        scores=np.full((len(arcs_a),len(arcs_b)),-np.inf)
+        band=Structure_align.__band(A,B,options)
+        bi=np.array([k for k,_ in arcs_b[:-1]],dtype=np.int64)
+        bj=np.array([l for _,l in arcs_b[:-1]],dtype=np.int64)
+        for a,(i,j) in enumerate(arcs_a):
+            if a==len(arcs_a)-1:
+                candidates=np.array([len(arcs_b)-1])
+            else:
+                candidates=np.flatnonzero((np.abs(bi-i)<=band)&(np.abs(bj-j)<=band))
+                if len(candidates)==0:
+                    continue
+            D=Structure_align.__interior(A,B,a,candidates,scores,options)
+            widths=np.array([arcs_b[b][1]-arcs_b[b][0]-1 for b in candidates])
+            inner=D[-1,np.arange(len(candidates)),widths]
+            if a<len(arcs_a)-1:
+                k=bi[candidates]
+                l=bj[candidates]
+                inner=inner+options["arc_match"]+Structure_align.__base_score(A["seq"][i],B["seq"][k],options) \
+                      +Structure_align.__base_score(A["seq"][j],B["seq"][l],options)
+            scores[a,candidates]=inner
+        return scores
+
+    @staticmethod
+    def __interior(A,B,a,candidates,scores,options):
+        """
+        Aligne l'intérieur d'une paire de A avec l'intérieur de plusieurs paires de B à la fois.
+
+        Args:
+            A (dict): Premier ARN préparé.
+            B (dict): Second ARN préparé.
+            a (int): Indice de la paire de A.
+            candidates (numpy.ndarray): Indices des paires de B.
+            scores (numpy.ndarray): Scores des couples de paires plus courtes.
+            options (dict): Paramètres de score et bande.
+
+        Returns:
+            numpy.ndarray: Matrices (lignes, paires, colonnes): D[r,c,t] est le meilleur score des r premières
+                bases de l'intérieur de a et des t premières bases de l'intérieur de la paire candidates[c].
+        """
+        i,j=A["arcs"][a]
+        arcs_b=B["arcs"]
+        band=Structure_align.__band(A,B,options)
+        gap=options["gap"]
+        brk=options["arc_break"]
+        rows=j-i-1
+        count=len(candidates)
+        starts=np.array([arcs_b[b][0] for b in candidates],dtype=np.int64)
+        widths=np.array([arcs_b[b][1]-arcs_b[b][0]-1 for b in candidates],dtype=np.int64)
+        W=int(widths.max())+1
+        t=np.arange(W)
+        y=starts[:,None]+t[None,:]
+        inside=(t[None,:]<=widths[:,None])
+        yc=np.clip(y,0,max(len(B["seq"])-1,0))
+        if len(B["seq"])==0:
+            seq_b=np.zeros((count,W),dtype=np.uint8)
+            paired_b=np.zeros((count,W),dtype=bool)
+        else:
+            seq_b=B["seq"][yc]
+            paired_b=B["paired"][yc]
+        #coût cumulé des gaps face aux bases de B (colonne 0: avant l'intérieur)
+        column_gap=np.where(t[None,:]>0,gap+np.where(paired_b,brk,0),0.0)
+        cumul=np.cumsum(column_gap,axis=1)
+        #paires de B intérieures à chaque candidate: (candidate, colonne avant l'ouverture, colonne de fermeture, paire)
+        y0=np.array([k for k,_ in arcs_b[:-1]],dtype=np.int64)
+        y1=np.array([l for _,l in arcs_b[:-1]],dtype=np.int64)
+        inner_c,inner_b=np.nonzero((starts[:,None]<y0[None,:])&(y1[None,:]<(starts+widths+1)[:,None]))
+        inner_open=y0[inner_b]-1-starts[inner_c]
+        inner_close=y1[inner_b]-starts[inner_c]
+
+        D=np.full((rows+1,count,W),-np.inf)
+        valid=inside&((np.abs(y-i)<=band)|(t[None,:]==0))
+        D[0]=np.where(valid,cumul,-np.inf)
+        for r in range(1,rows+1):
+            x=i+r
+            base=A["seq"][x]
+            penalty=brk if A["paired"][x] else 0
+            valid=inside&((np.abs(y-x)<=band)|(t[None,:]==0))
+            T=D[r-1]+gap+penalty
+            diagonal=D[r-1,:,:-1]+np.where(seq_b[:,1:]==base,options["match"],options["mismatch"])+penalty+np.where(paired_b[:,1:],brk,0)
+            T[:,1:]=np.maximum(T[:,1:],diagonal)
+            #x ferme une paire intérieure de a: alignement avec une paire intérieure de chaque candidate
+            arc=A["right"][x]
+            if arc>=0 and A["arcs"][arc][0]>i and len(inner_c):
+                value=scores[arc,inner_b]
+                ok=np.isfinite(value)
+                if ok.any():
+                    r0=A["arcs"][arc][0]-i
+                    arrival=D[r0-1,inner_c[ok],inner_open[ok]]+value[ok]
+                    np.maximum.at(T,(inner_c[ok],inner_close[ok]),arrival)
+            T[~valid]=-np.inf
+            D[r]=np.maximum.accumulate(T-cumul,axis=1)+cumul
+            D[r][~valid]=-np.inf
+        return D
+
+    @staticmethod
+    def __traceback(A,B,arc_scores,options):
+        """
+        Retrace l'alignement optimal, en recalculant l'intérieur de chaque couple de paires alignées.
+
+        Args:
+            A (dict): Premier ARN préparé.
+            B (dict): Second ARN préparé.
+            arc_scores (numpy.ndarray): Scores des couples de paires.
+            options (dict): Paramètres de score et bande.
+
+        Returns:
+            tuple: Colonnes de l'alignement et couples (indice de paire de A, indice de paire de B) alignés.
+        """
+        columns=[]
+        matched=[]
+        work=[("arc",len(A["arcs"])-1,len(B["arcs"])-1)]
+        while work:
+            item=work.pop()
+            if item[0]=="col":
+                columns.append(item[1:])
+                continue
+            _,a,b=item
+            i,j=A["arcs"][a]
+            k,l=B["arcs"][b]
+            items=Structure_align.__trace_interior(A,B,a,b,arc_scores,options)
+            if a<len(A["arcs"])-1:
+                matched.append((a,b))
+                items=[("col",i,k)]+items+[("col",j,l)]
+            work.extend(reversed(items))
+        return columns,matched
+
+    @staticmethod
+    def __trace_interior(A,B,a,b,arc_scores,options):
+        """
+        Retrace l'alignement des intérieurs d'un couple de paires.
+
+        Args:
+            A (dict): Premier ARN préparé.
+            B (dict): Second ARN préparé.
+            a (int): Indice de la paire de A.
+            b (int): Indice de la paire de B.
+            arc_scores (numpy.ndarray): Scores des couples de paires.
+            options (dict): Paramètres de score et bande.
+
+        Returns:
+            list: Éléments ('col', x, y) et ('arc', a', b') dans l'ordre de l'alignement.
+        """
+        i,j=A["arcs"][a]
+        k,l=B["arcs"][b]
+        D=Structure_align.__interior(A,B,a,np.array([b]),arc_scores,options)[:,0,:]
+        gap=options["gap"]
+        brk=options["arc_break"]
+        items=[]
+        r,t=j-i-1,l-k-1
+        while r>0 or t>0:
+            value=D[r,t]
+            x,y=i+r,k+t
+            pen_x=brk if r>0 and A["paired"][x] else 0
+            pen_y=brk if t>0 and B["paired"][y] else 0
+            if r>0 and t>0:
+                same=options["match"] if A["seq"][x]==B["seq"][y] else options["mismatch"]
+                if np.isclose(value,D[r-1,t-1]+same+pen_x+pen_y):
+                    items.append(("col",x,y))
+                    r,t=r-1,t-1
+                    continue
+            if r>0 and np.isclose(value,D[r-1,t]+gap+pen_x):
+                items.append(("col",x,None))
+                r-=1
+                continue
+            arc_a,arc_b=A["right"][x] if r>0 else -1,B["right"][y] if t>0 else -1
+            if arc_a>=0 and arc_b>=0 and A["arcs"][arc_a][0]>i and B["arcs"][arc_b][0]>k:
+                r0=A["arcs"][arc_a][0]-i
+                t0=B["arcs"][arc_b][0]-k
+                if np.isclose(value,D[r0-1,t0-1]+arc_scores[arc_a,arc_b]):
+                    items.append(("arc",arc_a,arc_b))
+                    r,t=r0-1,t0-1
+                    continue
+            items.append(("col",None,y))
+            t-=1
+        items.reverse()
+        return items
+
+    @staticmethod
+    def __band(A,B,options):
+        """
+        Retourne la bande effective: au moins la différence des longueurs.
+
+        Args:
+            A (dict): Premier ARN préparé.
+            B (dict): Second ARN préparé.
+            options (dict): Paramètres de score et bande.
+
+        Returns:
+            float: Décalage maximal entre positions alignées.
+        """
+        if options["band"] is None:
+            return np.inf
+        return max(int(options["band"]),abs(len(A["seq"])-len(B["seq"])))
+
+    @staticmethod
+    def __base_score(x,y,options):
+        """
+        Retourne le score de deux bases alignées.
+
+        Args:
+            x (int ou numpy.ndarray): Code ASCII de la première base.
+            y (int ou numpy.ndarray): Code ASCII de la seconde base.
+            options (dict): Paramètres de score.
+
+        Returns:
+            float ou numpy.ndarray: match si les bases sont identiques, mismatch sinon.
+        """
+        return np.where(x==y,options["match"],options["mismatch"])
+
+    def __gapped(self,text1,text2):
+        """
+        Applique les colonnes de l'alignement à deux textes de la longueur des séquences.
+
+        Args:
+            text1 (str): Texte du premier ARN.
+            text2 (str): Texte du second ARN.
+
+        Returns:
+            tuple: Textes avec gaps '-'.
+        """
+        return ("".join("-" if x is None else text1[x] for x,_ in self.__columns),
+                "".join("-" if y is None else text2[y] for _,y in self.__columns))
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:02:18 2026
+
+@author: Mathieu Genete
+"""
+from .Alphabet import Alphabet
+from .Rna_seq import Rna_seq
+from .Rna_structure import Rna_structure
+from array import array
+import os
+import struct
+
+class Structure_db:
+    """
+    Collection de structures indexée, en accès direct par identifiant.
+
+    Les structures sont stockées soit au format dot-bracket habituel (3 lignes par
+    enregistrement), soit au format binaire compact (séquence codée sur 2 bits par
+    base, structure sous forme de table des paires (i,j)). Un index
+    '<fichier>.idx' associe à chaque identifiant la position et la longueur de son
+    enregistrement: il est construit une fois, enregistré à côté du fichier et
+    complété lors des ajouts. La lecture d'une structure est un simple
+    déplacement dans le fichier et l'objet Rna_structure n'est construit qu'à
+    l'accès.
+
+    Format binaire: en-tête b'RNADB1\\n' puis, pour chaque enregistrement, la
+    longueur de l'identifiant (uint16), la longueur de la séquence et le nombre de
+    paires (uint32), l'identifiant en UTF-8, la séquence (4 bases par octet) et
+    les paires (uint16 si la séquence fait moins de 65536 bases, sinon uint32).
+
+    Attributs:
+        __filename (str): Chemin du fichier des structures.
+        __binary (bool): Indicateur du format binaire.
+        __minimal_loop_length (int): Longueur minimale de la boucle vérifiée à la lecture.
+        __file (file): Fichier ouvert en lecture et ajout.
+        __ids (list): Identifiants dans l'ordre du fichier.
+        __rows (dict): Rang de chaque identifiant dans __ids.
+        __offsets (array): Position de chaque enregistrement.
+        __lengths (array): Longueur en octets de chaque enregistrement.
+        __indexed_size (int): Taille du fichier couverte par l'index.
+    """
+    MAGIC=b"RNADB1\n"
+    INDEX_HEADER="#rnalib-db-index"
+    __HEAD=struct.Struct("<HII")
+
+    def __init__(self,filename: str,binary=None,minimal_loop_length=3):
+        """
+        Ouvre ou crée une collection de structures et charge son index.
+
+        L'index est construit s'il n'existe pas, complété si le fichier a été
+        allongé depuis, et reconstruit s'il ne correspond plus au fichier.
+
+        Args:
+            filename (str): Chemin du fichier des structures.
+            binary (bool, optionnel): Format binaire. Par défaut à None: déduit du contenu du fichier
+                s'il existe, sinon de l'extension ('.rdb' pour le format binaire).
+            minimal_loop_length (int, optionnel): Longueur minimale de la boucle vérifiée à la lecture. Par défaut à 3.
+
+        Raises:
+            Exception: Si binary ne correspond pas au contenu du fichier ou si un identifiant est en double.
+        """
+        self.__filename=filename
+        self.__minimal_loop_length=int(minimal_loop_length)
+        exists=os.path.exists(filename) and os.path.getsize(filename)>0
+        if exists:
+            with open(filename,"rb") as infile:
+                detected=infile.read(len(Structure_db.MAGIC))==Structure_db.MAGIC
+            if binary is not None and bool(binary)!=detected:
+                raise Exception("le fichier '{}' n'est pas au format {}".format(filename,"binaire" if binary else "dot-bracket"))
+            self.__binary=detected
+        else:
+            self.__binary=bool(binary) if binary is not None else filename.endswith(".rdb")
+        self.__file=open(filename,"a+b")
+        if not exists and self.__binary:
+            self.__file.write(Structure_db.MAGIC)
+            self.__file.flush()
+        self.__ids=[]
+        self.__rows={}
+        self.__offsets=array("q")
+        self.__lengths=array("q")
+        self.__indexed_size=len(Structure_db.MAGIC) if self.__binary else 0
+        self.__load_index()
+
+    #===================
+    #Getters Setters
+    #===================
+
+    @property
+    def filename(self):
+        """
+        Retourne le chemin du fichier des structures.
+
+        Returns:
+            str: Chemin du fichier.
+        """
+        return self.__filename
+
+    @property
+    def index_file(self):
+        """
+        Retourne le chemin de l'index.
+
+        Returns:
+            str: Chemin du fichier '<fichier>.idx'.
+        """
+        return self.__filename+".idx"
+
+    @property
+    def binary(self):
+        """
+        Indique si la collection est au format binaire.
+
+        Returns:
+            bool: True pour le format binaire.
+        """
+        return self.__binary
+
+    @property
+    def ids(self):
+        """
+        Retourne les identifiants dans l'ordre du fichier.
+
+        Returns:
+            list: Identifiants des structures.
+        """
+        return list(self.__ids)
+
+    #===================
+    #Méthodes magiques
+    #===================
+
+    def __len__(self):
+        """
+        Retourne le nombre de structures.
+
+        Returns:
+            int: Nombre d'enregistrements indexés.
+        """
+        return len(self.__ids)
+
+    def __contains__(self,seqid):
+        """
+        Indique si un identifiant est présent.
+
+        Returns:
+            bool: True si l'identifiant est indexé.
+        """
+        return seqid in self.__rows
+
+    def __iter__(self):
+        """
+        Parcourt les identifiants dans l'ordre du fichier.
+
+        Returns:
+            iterator: Identifiants des structures.
+        """
+        return iter(list(self.__ids))
+
+    def __getitem__(self,seqid):
+        """
+        Retourne la structure d'un identifiant, construite à l'accès.
+
+        Args:
+            seqid (str): Identifiant de la structure.
+
+        Returns:
+            Rna_structure: Structure de l'enregistrement.
+
+        Raises:
+            KeyError: Si l'identifiant est absent.
+            Exception: Si l'enregistrement n'est pas une structure valide.
+        """
+        seqid,seq,fold=self.__read(seqid)
+        rna=Rna_seq(seqid,seq)
+        if self.__binary:
+            st=Rna_structure(rna,fold=fold)
+        else:
+            st=Rna_structure(rna,dotpar=fold)
+        if not st.check_structure() or not st.check_hairpin(self.__minimal_loop_length):
+            raise Exception("Erreur(s) de format parenthésé:\n\t=> Erreurs dans la séquence {}".format(seqid))
+        return st
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    #===================
+    #Méthodes publiques
+    #===================
+
+    def get(self,seqid,default=None):
+        """
+        Retourne la structure d'un identifiant, ou default s'il est absent.
+
+        Args:
+            seqid (str): Identifiant de la structure.
+            default (optionnel): Valeur retournée si l'identifiant est absent. Par défaut à None.
+
+        Returns:
+            Rna_structure: Structure de l'enregistrement, ou default.
+        """
+        if seqid not in self.__rows:
+            return default
+        return self[seqid]
+
+    def record(self,seqid):
+        """
+        Retourne un enregistrement sans construire de Rna_structure.
+
+        Args:
+            seqid (str): Identifiant de la structure.
+
+        Returns:
+            tuple: (identifiant, séquence, structure en notation dot-bracket).
+
+        Raises:
+            KeyError: Si l'identifiant est absent.
+        """
+        seqid,seq,fold=self.__read(seqid)
+        if self.__binary:
+            fold=Rna_structure.pairs_to_dotpar(fold,len(seq))
+        return seqid,seq,fold
+
+    def items(self):
+        """
+        Parcourt les structures dans l'ordre du fichier, construites une à une.
+
+        Yields:
+            tuple: (identifiant, Rna_structure).
+        """
+        for seqid in list(self.__ids):
+            yield seqid,self[seqid]
+
+    def append(self,structure):
+        """
+        Ajoute une structure à la fin du fichier et à l'index.
+
+        Args:
+            structure (Rna_structure ou tuple): Structure, ou triplet (identifiant, séquence, structure dot-bracket).
+
+        Raises:
+            Exception: Si l'identifiant est déjà présent ou contient un saut de ligne.
+        """
+        self.extend([structure])
+
+    def extend(self,structures):
+        """
+        Ajoute plusieurs structures à la fin du fichier et à l'index.
+
+        Args:
+            structures (iterable): Structures (Rna_structure ou triplets (identifiant, séquence, structure dot-bracket)).
+
+        Raises:
+            Exception: Si un identifiant est déjà présent ou contient un saut de ligne.
+        """
+        self.__file.seek(0,os.SEEK_END)
+        offset=self.__file.tell()
+        if offset!=self.__indexed_size:
+            #fichier allongé par un autre programme depuis l'ouverture
+            self.__index_tail()
+        added=[]
+        added_ids=set()
+        chunks=[]
+        if not self.__binary and offset>0:
+            self.__file.seek(offset-1)
+            if self.__file.read(1)!=b"\n":
+                #dernière ligne du fichier sans saut de ligne
+                chunks.append(b"\n")
+                offset+=1
+        for st in structures:
+            if isinstance(st,Rna_structure):
+                seqid,seq,fold=st.rna.id,st.rna.seq,st.fold if self.__binary else st.dotpar
+            else:
+                seqid,seq,dotpar=st
+                seq=Rna_seq(seqid,seq).seq
+                fold=Rna_structure(Rna_seq(seqid,seq),dotpar=dotpar).fold if self.__binary else dotpar
+            seqid=str(seqid)
+            if "\n" in seqid or "\t" in seqid:
+                raise Exception("l'identifiant '{}' contient un saut de ligne ou une tabulation".format(seqid))
+            if seqid in self.__rows or seqid in added_ids:
+                raise Exception("l'identifiant '{}' est déjà présent".format(seqid))
+            added_ids.add(seqid)
+            if self.__binary:
+                data=self.__encode(seqid,seq,fold)
+            else:
+                data=">{}\n{}\n{}\n".format(seqid,seq,fold).encode()
+            added.append((seqid,offset,len(data)))
+            chunks.append(data)
+            offset+=len(data)
+        self.__file.write(b"".join(chunks))
+        self.__file.flush()
+        for seqid,start,length in added:
+            self.__add(seqid,start,length)
+        self.__indexed_size=offset
+        self.__save_index(added)
+
+    def close(self):
+        """
+        Ferme le fichier des structures.
+        """
+        self.__file.close()
+
+    @staticmethod
+    def from_dotbrackets(indb: str,outfile: str,binary=None,minimal_loop_length=3,chunk=10000):
+        """
+        Crée une collection indexée à partir d'un fichier dot-bracket lu en flux.
+
+        Args:
+            indb (str): Fichier dot-bracket d'entrée.
+            outfile (str): Fichier de la collection (créé ou complété).
+            binary (bool, optionnel): Format binaire (voir __init__). Par défaut à None.
+            minimal_loop_length (int, optionnel): Longueur minimale de la boucle. Par défaut à 3.
+            chunk (int, optionnel): Nombre d'enregistrements écrits à la fois. Par défaut à 10000.
+
+        Returns:
+            Structure_db: Collection ouverte.
+        """
+        from .Rna_parser import Rna_parser
+        db=Structure_db(outfile,binary,minimal_loop_length)
+        block=[]
+        with open(indb) as handle:
+            for st in Rna_parser.iter_dotbrackets(handle,minimal_loop_length):
+                block.append(st)
+                if len(block)>=chunk:
+                    db.extend(block)
+                    block=[]
+        db.extend(block)
+        return db
+
+    #===================
+    #Méthodes privées
+    #===================
+
+    def __add(self,seqid,offset,length):
+        """
+        Ajoute un enregistrement à l'index en mémoire.
+
+        Args:
+            seqid (str): Identifiant.
+            offset (int): Position de l'enregistrement.
+            length (int): Longueur de l'enregistrement en octets.
+
+        Raises:
+            Exception: Si l'identifiant est déjà présent.
+        """
+        if seqid in self.__rows:
+            raise Exception("l'identifiant '{}' est en double dans '{}'".format(seqid,self.__filename))
+        self.__rows[seqid]=len(self.__ids)
+        self.__ids.append(seqid)
+        self.__offsets.append(offset)
+        self.__lengths.append(length)
+
+    def __read(self,seqid):
+        """
+        Lit un enregistrement.
+
+        Args:
+            seqid (str): Identifiant.
+
+        Returns:
+            tuple: (identifiant, séquence, structure dot-bracket ou liste des paires).
+
+        Raises:
+            KeyError: Si l'identifiant est absent.
+        """
+        row=self.__rows[seqid]
+        self.__file.seek(self.__offsets[row])
+        data=self.__file.read(self.__lengths[row])
+        if self.__binary:
+            return self.__decode(data)
+        lines=[line for line in data.decode().split("\n") if line.strip()]
+        return lines[0][1:].strip(),lines[1].strip().upper(),lines[2].strip()
+
+    def __load_index(self):
+        """
+        Charge l'index enregistré, le complète ou le reconstruit.
+        """
+        size=os.path.getsize(self.__filename)
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as idx:
+                header=idx.readline().rstrip("\n").split("\t")
+                if len(header)==3 and header[0]==Structure_db.INDEX_HEADER and int(header[1])==int(self.__binary) and int(header[2])<=size:
+                    for line in idx:
+                        #l'identifiant peut contenir des tabulations, pas la position ni la longueur
+                        seqid,offset,length=line.rstrip("\n").rsplit("\t",2)
+                        self.__add(seqid,int(offset),int(length))
+                    self.__indexed_size=int(header[2])
+                    if self.__indexed_size==size:
+                        return
+                    self.__index_tail()
+                    self.__save_index()
+                    return
+            #index d'un autre fichier ou d'une version tronquée: reconstruit
+            self.__ids=[]
+            self.__rows={}
+            self.__offsets=array("q")
+            self.__lengths=array("q")
+            self.__indexed_size=len(Structure_db.MAGIC) if self.__binary else 0
+        self.__index_tail()
+        self.__save_index()
+
+    def __index_tail(self):
+        """
+        Indexe les enregistrements situés après la partie du fichier déjà indexée.
+
+        Raises:
+            Exception: Si un enregistrement est incomplet ou mal formé, ou si un identifiant contient un saut de ligne.
+        """
+        self.__file.seek(self.__indexed_size)
+        if self.__binary:
+            head_size=Structure_db.__HEAD.size
+            while True:
+                offset=self.__file.tell()
+                head=self.__file.read(head_size)
+                if not head:
+                    break
+                if len(head)<head_size:
+                    raise Exception("enregistrement incomplet à la position {} de '{}'".format(offset,self.__filename))
+                id_len,seq_len,npairs=Structure_db.__HEAD.unpack(head)
+                seqid=self.__file.read(id_len).decode()
+                if "\n" in seqid:
+                    raise Exception("l'identifiant à la position {} de '{}' contient un saut de ligne".format(offset,self.__filename))
+                length=head_size+id_len+(seq_len+3)//4+npairs*2*(2 if seq_len<65536 else 4)
+                self.__file.seek(offset+length)
+                self.__add(seqid,offset,length)
+        else:
+            start=None
+            lines=0
+            offset=self.__indexed_size
+            seqid=None
+            for line in self.__file:
+                if line.strip():
+                    if lines==0:
+                        if not line.startswith(b">"):
+                            raise Exception("Erreur(s) de format parenthésé:\n\t=> ligne d'identifiant attendue à la position {}".format(offset))
+                        start=offset
+                        seqid=line[1:].strip().decode()
+                    lines+=1
+                    if lines==3:
+                        self.__add(seqid,start,offset+len(line)-start)
+                        lines=0
+                offset+=len(line)
+            if lines:
+                raise Exception("Erreur(s) de format parenthésé:\n\t=> Enregistrement incomplet {}".format(seqid))
+        self.__file.seek(0,os.SEEK_END)
+        self.__indexed_size=self.__file.tell()
+
+    def __save_index(self,added=None):
+        """
+        Enregistre l'index, en ajoutant seulement les nouvelles lignes après un ajout.
+
+        Args:
+            added (list, optionnel): Triplets (identifiant, position, longueur) ajoutés depuis le dernier enregistrement.
+                Par défaut à None (index réécrit en entier).
+        """
+        #la taille indexée est écrite sur 20 chiffres: l'en-tête garde la même longueur
+        header="{}\t{}\t{:020d}\n".format(Structure_db.INDEX_HEADER,int(self.__binary),self.__indexed_size)
+        if added is not None and os.path.exists(self.index_file):
+            with open(self.index_file,"r+") as idx:
+                idx.write(header)
+                idx.seek(0,os.SEEK_END)
+                idx.write("".join("{}\t{}\t{}\n".format(*row) for row in added))
+            return
+        tmp=self.index_file+".tmp"
+        with open(tmp,"w") as idx:
+            idx.write(header)
+            for seqid,offset,length in zip(self.__ids,self.__offsets,self.__lengths):
+                idx.write("{}\t{}\t{}\n".format(seqid,offset,length))
+        os.replace(tmp,self.index_file)
+
+    def __encode(self,seqid,seq,fold):
+        """
+        Code un enregistrement au format binaire.
+
+        Args:
+            seqid (str): Identifiant.
+            seq (str): Séquence d'ARN.
+            fold (list): Paires (i,j).
+
+        Returns:
+            bytes: Enregistrement codé.
+        """
+        import numpy as np
+        ident=seqid.encode()
+        codes=Alphabet.encode_rna(seq)
+        padded=np.zeros(((len(codes)+3)//4)*4,dtype=np.uint8)
+        padded[:len(codes)]=codes
+        packed=(padded[0::4]|(padded[1::4]<<2)|(padded[2::4]<<4)|(padded[3::4]<<6)).astype(np.uint8)
+        pairs=np.array(sorted((min(i,j),max(i,j)) for i,j in fold),dtype=np.uint16 if len(seq)<65536 else np.uint32).reshape(-1,2)
+        return Structure_db.__HEAD.pack(len(ident),len(seq),len(pairs))+ident+packed.tobytes()+pairs.astype(pairs.dtype.newbyteorder("<")).tobytes()
+
+    def __decode(self,data):
+        """
+        Décode un enregistrement binaire.
+
+        Args:
+            data (bytes): Enregistrement codé.
+
+        Returns:
+            tuple: (identifiant, séquence, liste des paires (i,j)).
+        """
+        import numpy as np
+        head_size=Structure_db.__HEAD.size
+        id_len,seq_len,npairs=Structure_db.__HEAD.unpack_from(data)
+        seqid=data[head_size:head_size+id_len].decode()
+        start=head_size+id_len
+        packed=np.frombuffer(data,dtype=np.uint8,count=(seq_len+3)//4,offset=start)
+        codes=np.stack([packed&3,(packed>>2)&3,(packed>>4)&3,packed>>6],axis=1).reshape(-1)[:seq_len]
+        bases=np.frombuffer(Alphabet.rna().encode(),dtype=np.uint8)
+        seq=bases[codes].tobytes().decode()
+        dtype=np.dtype("<u2") if seq_len<65536 else np.dtype("<u4")
+        pairs=np.frombuffer(data,dtype=dtype,count=2*npairs,offset=start+(seq_len+3)//4).reshape(-1,2)
+        return seqid,seq,[(int(i),int(j)) for i,j in pairs]
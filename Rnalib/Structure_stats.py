@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 21:15:08 2026
+
+@author: Mathieu Genete
+"""
+from .Alphabet import Alphabet
+import numpy as np
+import os
+
+class Structure_stats:
+    """
+    Statistiques calculées en une passe vectorisée sur de nombreuses structures.
+
+    Les séquences et les structures sont concaténées en deux tableaux d'octets.
+    Pour chaque type de crochets de Alphabet.brackets(), la profondeur
+    d'imbrication est une somme cumulée et les paires sont retrouvées en triant
+    les crochets par structure, niveau et position (une ouvrante est suivie de
+    sa fermante au même niveau), puis toutes les statistiques sont des
+    comptages par structure (np.bincount). Les paires d'un pseudonoeud
+    ('[]', '{}', '<>') sont donc comptées comme les autres.
+
+    Champs du tableau (Structure_stats.DTYPE):
+    - id, length, pairs;
+    - gc_pairs, au_pairs, gu_pairs: composition des paires (les autres paires
+      ne sont comptées que dans pairs);
+    - helices: nombre d'hélices (paires empilées maximales), mean_helix_length;
+    - max_depth: profondeur d'imbrication maximale des paires '()';
+    - shape: forme compactée, identique à Rna_structure.compact_struct().
+    """
+    DTYPE=np.dtype([("id",object),("length",np.int32),("pairs",np.int32),("gc_pairs",np.int32),("au_pairs",np.int32),
+                    ("gu_pairs",np.int32),("helices",np.int32),("mean_helix_length",np.float64),("max_depth",np.int32),
+                    ("shape",object)])
+
+    @staticmethod
+    def compute(structures):
+        """
+        Calcule les statistiques d'objets Rna_structure.
+
+        Args:
+            structures (iterable): Objets Rna_structure, ou dictionnaire {identifiant: Rna_structure}.
+
+        Returns:
+            numpy.ndarray: Tableau structuré (Structure_stats.DTYPE), une ligne par structure.
+        """
+        if isinstance(structures,dict):
+            structures=structures.values()
+        ids=[]
+        seqs=[]
+        dotpars=[]
+        for st in structures:
+            ids.append(st.rna.id)
+            seqs.append(st.rna.seq)
+            dotpars.append(st.dotpar.replace("&",""))
+        return Structure_stats.from_arrays(ids,seqs,dotpars)
+
+    @staticmethod
+    def from_dotbrackets(filename: str):
+        """
+        Calcule les statistiques d'un fichier dot-bracket sans construire les objets Rna_structure.
+
+        Args:
+            filename (str): Chemin du fichier (enregistrements '>id', séquence, structure).
+
+        Returns:
+            numpy.ndarray: Tableau structuré (Structure_stats.DTYPE), dans l'ordre du fichier.
+
+        Raises:
+            Exception: Si le fichier n'existe pas ou si un enregistrement est incomplet.
+        """
+        if not os.path.exists(filename):
+            raise Exception(f"Le fichier '{filename}' n'existe pas")
+        with open(filename,"r") as dbfile:
+            lines=[line.strip() for line in dbfile if line.strip()]
+        if len(lines)%3 or not all(line.startswith(">") for line in lines[0::3]):
+            raise Exception("le fichier '{}' n'est pas une suite d'enregistrements '>id', séquence, structure".format(filename))
+        return Structure_stats.from_arrays([line[1:] for line in lines[0::3]],[s.upper().replace("T","U") for s in lines[1::3]],
+                                           [d.replace("&","") for d in lines[2::3]])
+
+    @staticmethod
+    def from_arrays(ids,seqs,dotpars):
+        """
+        Calcule les statistiques de structures données par leurs séquences et leurs notations dot-bracket.
+
+        Args:
+            ids (list): Identifiants.
+            seqs (list): Séquences d'ARN.
+            dotpars (list): Structures en notation dot-bracket, de même longueur que les séquences.
+
+        Returns:
+            numpy.ndarray: Tableau structuré (Structure_stats.DTYPE), une ligne par structure.
+
+        Raises:
+            Exception: Si une séquence et sa structure n'ont pas la même longueur, ou si une structure est mal parenthésée.
+        """
+        count=len(ids)
+        lengths=np.fromiter((len(d) for d in dotpars),dtype=np.int64,count=count)
+        seq_lengths=np.fromiter((len(s) for s in seqs),dtype=np.int64,count=count)
+        if not np.array_equal(lengths,seq_lengths):
+            bad=int(np.flatnonzero(lengths!=seq_lengths)[0])
+            raise Exception("la séquence et la structure de '{}' n'ont pas la même longueur".format(ids[bad]))
+        table=np.zeros(count,dtype=Structure_stats.DTYPE)
+        table["id"]=ids
+        table["length"]=lengths
+        if count==0:
+            return table
+        starts=np.concatenate(([0],np.cumsum(lengths)[:-1]))
+        brackets=np.frombuffer("".join(dotpars).encode("ascii","replace"),dtype=np.uint8)
+        bases=np.frombuffer("".join(seqs).encode("ascii","replace"),dtype=np.uint8)
+        record=np.repeat(np.arange(count),lengths)
+        symbols=Alphabet.brackets()
+        ends=np.concatenate((starts[1:],[len(brackets)]))-1
+        nonempty=lengths>0
+        opens=[]
+        closes=[]
+        for t in range(0,len(symbols),2):
+            #profondeur de ce type de crochets après chaque position, remise à zéro au début de chaque structure
+            type_open=brackets==ord(symbols[t])
+            type_close=brackets==ord(symbols[t+1])
+            step=type_open.astype(np.int64)-type_close
+            total=np.cumsum(step)
+            depth=total-np.repeat(np.concatenate(([0],total))[starts],lengths)
+            lowest=np.zeros(count,dtype=np.int64)
+            if len(brackets):
+                lowest[nonempty]=np.minimum.reduceat(depth,starts[nonempty])
+                if t==0:
+                    table["max_depth"][nonempty]=np.maximum.reduceat(depth,starts[nonempty])
+            final=np.where(nonempty,depth[np.maximum(ends,0)] if len(brackets) else 0,0)
+            broken=(lowest<0)|(final!=0)
+            if broken.any():
+                raise Exception("structure(s) mal parenthésée(s): {}".format(", ".join(str(ids[k]) for k in np.flatnonzero(broken)[:10])))
+
+            #appariement: au même niveau d'une structure, chaque ouvrante précède sa fermante
+            positions=np.flatnonzero(type_open|type_close)
+            level=np.where(type_open[positions],depth[positions],depth[positions]+1)
+            ordered=positions[np.lexsort((positions,level,record[positions]))]
+            opens.append(ordered[0::2])
+            closes.append(ordered[1::2])
+        opens=np.concatenate(opens)
+        closes=np.concatenate(closes)
+        order=np.argsort(opens,kind="stable")
+        opens=opens[order]
+        closes=closes[order]
+        partner=np.full(len(brackets),-1,dtype=np.int64)
+        partner[opens]=closes
+        partner[closes]=opens
+        pair_record=record[opens]
+        table["pairs"]=np.bincount(pair_record,minlength=count)
+
+        b1=bases[opens]
+        b2=bases[closes]
+        G,C,A,U=(ord(b) for b in "GCAU")
+        table["gc_pairs"]=np.bincount(pair_record,weights=((b1==G)&(b2==C))|((b1==C)&(b2==G)),minlength=count)
+        table["au_pairs"]=np.bincount(pair_record,weights=((b1==A)&(b2==U))|((b1==U)&(b2==A)),minlength=count)
+        table["gu_pairs"]=np.bincount(pair_record,weights=((b1==G)&(b2==U))|((b1==U)&(b2==G)),minlength=count)
+
+        #(i,j) est empilée sur (i-1,j+1), dans la même structure
+        previous=np.maximum(opens-1,0)
+        stacked=(opens>starts[pair_record])&(brackets[previous]==brackets[opens])&(partner[previous]==closes+1)
+        helices=table["pairs"]-np.bincount(pair_record,weights=stacked,minlength=count).astype(np.int64)
+        table["helices"]=helices
+        table["mean_helix_length"]=np.divide(table["pairs"],helices,out=np.zeros(count),where=helices>0)
+
+        #forme compactée: chaque hélice est réduite à sa paire interne, chaque suite de '.' à un seul '.'
+        inner=(brackets[opens+1]==brackets[opens])&(partner[opens+1]==closes-1)
+        keep=np.ones(len(brackets),dtype=bool)
+        keep[opens[inner]]=False
+        keep[closes[inner]]=False
+        kept=np.flatnonzero(keep)
+        dots=brackets[kept]==ord(".")
+        repeated=np.concatenate(([False],dots[1:]&dots[:-1]&(record[kept][1:]==record[kept][:-1])))
+        kept=kept[~repeated]
+        shape_lengths=np.bincount(record[kept],minlength=count)
+        shape_starts=np.concatenate(([0],np.cumsum(shape_lengths)[:-1]))
+        text=brackets[kept].tobytes().decode("ascii")
+        table["shape"]=[text[s:s+l] for s,l in zip(shape_starts.tolist(),shape_lengths.tolist())]
+        return table
+
+    @staticmethod
+    def to_arrow(table):
+        """
+        Convertit un tableau de statistiques en table Arrow (pyarrow doit être installé).
+
+        Args:
+            table (numpy.ndarray): Tableau retourné par compute(), from_dotbrackets() ou from_arrays().
+
+        Returns:
+            pyarrow.Table: Table Arrow de mêmes colonnes.
+
+        Raises:
+            Exception: Si pyarrow n'est pas installé.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise Exception("pyarrow n'est pas installé")
+        return pa.table({name:table[name].tolist() if table.dtype[name]==object else table[name] for name in table.dtype.names})
@@ -14,9 +14,49 @@ __copyright__ = 'Copyright 2023 Mathieu GENETE'
 
 
 from .Alphabet import Alphabet
-from .Predict_structure import Predict_structure
 from .Rna_parser import Rna_parser
 from .Rna_seq import Rna_seq
 from .Rna_structure import Rna_structure
 from .Scores import Scores
-from .Tree import Tree
\ No newline at end of file
+from .Structure_db import Structure_db
+from .Tree import Tree
+
+import sys as _sys
+import types as _types
+
+#classes importées au premier accès (numpy, numba, asyncio), avec leur module
+_lazy_classes = {'Alignment_fold': 'Alignment_fold', 'Batch_predict': 'Batch_predict',
+                 'Cofold_structure': 'Cofold_structure', 'Disk_matrix': 'Disk_matrix', 'Fold_client': 'Fold_service',
+                 'Fold_service': 'Fold_service', 'Inverse_fold': 'Inverse_fold', 'Motif_index': 'Motif_index',
+                 'Mutation_scan': 'Mutation_scan', 'Nussinov_kernels': 'Nussinov_kernels',
+                 'Predict_structure': 'Predict_structure', 'Pseudoknot_fold': 'Pseudoknot_fold',
+                 'Structure_align': 'Structure_align', 'Structure_stats': 'Structure_stats'}
+
+__all__ = ['Alphabet', 'Rna_parser', 'Rna_seq', 'Rna_structure', 'Scores', 'Structure_db', 'Tree'] + sorted(_lazy_classes)
+
+
+class _Lazy_package(_types.ModuleType):
+    """
+    Paquet Rnalib dont les classes de calcul sont importées au premier accès.
+
+    L'import d'un sous-module lie normalement son nom au module dans le paquet:
+    pour les modules de calcul, c'est la classe du même nom qui est liée.
+    """
+    def __getattr__(self, name):
+        if name in _lazy_classes:
+            import importlib
+            value = getattr(importlib.import_module('.' + _lazy_classes[name], self.__name__), name)
+            super().__setattr__(name, value)
+            return value
+        raise AttributeError("module '{}' has no attribute '{}'".format(self.__name__, name))
+
+    def __setattr__(self, name, value):
+        if name in _lazy_classes and isinstance(value, _types.ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_lazy_classes))
+
+
+_sys.modules[__name__].__class__ = _Lazy_package
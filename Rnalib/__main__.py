@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:02:44 2026
+
+@author: Mathieu Genete
+
+Point d'entrée de la ligne de commande: python -m Rnalib <fold|convert|compare|stats> ...
+"""
+import sys
+from .Rna_cli import Rna_cli
+
+sys.exit(Rna_cli.main())
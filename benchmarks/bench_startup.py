@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:31:07 2026
+
+@author: Mathieu Genete
+
+Mesure le coût de démarrage de Rnalib dans un interpréteur neuf.
+
+Chaque scénario est lancé --repeat fois dans un nouveau processus. Le meilleur
+temps, diminué du démarrage d'un interpréteur vide, est comparé au budget
+(--budget, en millisecondes) : le script se termine avec le code 1 si un
+scénario le dépasse.
+
+usage: python benchmarks/bench_startup.py [--repeat 20] [--budget 50] [--out fichier.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT=os.path.join(os.path.dirname(os.path.abspath(__file__)),"..")
+
+SCENARIOS={"import":"import Rnalib",
+           "parse_db":"import Rnalib\nRnalib.Rna_parser.parse_dotbrackets_file('in.db')",
+           "parse_ct":"import Rnalib\nRnalib.Rna_parser.parse_connect_file('in.ct')"}
+
+def best_time(code,repeat,cwd):
+    env=dict(os.environ,PYTHONPATH=ROOT)
+    times=[]
+    for _ in range(repeat):
+        start=time.perf_counter()
+        subprocess.run([sys.executable,"-c",code],cwd=cwd,env=env,check=True)
+        times.append(time.perf_counter()-start)
+    return min(times)
+
+def loaded_modules(code,cwd):
+    script=code+"\nimport sys\nprint(' '.join(m for m in ('numpy','pandas','numba') if m in sys.modules))"
+    out=subprocess.run([sys.executable,"-c",script],cwd=cwd,env=dict(os.environ,PYTHONPATH=ROOT),
+                       check=True,capture_output=True,text=True).stdout
+    return out.split()
+
+def main():
+    parser=argparse.ArgumentParser(description="Coût de démarrage de Rnalib")
+    parser.add_argument("--repeat",type=int,default=20,help="nombre de lancements (le meilleur temps est conservé)")
+    parser.add_argument("--budget",type=float,default=50.0,help="coût maximal d'un scénario, en millisecondes")
+    parser.add_argument("--out",default=None,help="fichier JSON de sortie")
+    args=parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp,"in.db"),"w") as out:
+            out.write(">a\nGGGAAAUCCCGGGAAAUCCC\n(((....)))(((....)))\n")
+        subprocess.run([sys.executable,"-c","import Rnalib\nRnalib.Rna_parser.parse_dotbrackets_file('in.db')['a'].structure_to_ct('in.ct')"],
+                       cwd=tmp,env=dict(os.environ,PYTHONPATH=ROOT),check=True)
+        interpreter=best_time("pass",args.repeat,tmp)
+        print("{:<10} {:8.1f} ms".format("python",interpreter*1000))
+        results=[]
+        over=[]
+        for name,code in SCENARIOS.items():
+            cost=(best_time(code,args.repeat,tmp)-interpreter)*1000
+            modules=loaded_modules(code,tmp)
+            flag=""
+            if cost>args.budget:
+                flag="  <= hors budget"
+                over.append(name)
+            results.append({"name":name,"milliseconds":cost,"heavy_modules":modules})
+            print("{:<10} {:8.1f} ms  {}{}".format(name,cost," ".join(modules) or "-",flag))
+
+    report={"benchmark":"startup","python":platform.python_version(),"platform":platform.platform(),
+            "interpreter_ms":interpreter*1000,"budget_ms":args.budget,"results":results}
+    if args.out:
+        with open(args.out,"w") as out:
+            json.dump(report,out,indent=2)
+    if over:
+        print("{} scénario(s) au-delà de {:.0f} ms".format(len(over),args.budget))
+        sys.exit(1)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:52:10 2026
+
+@author: Mathieu Genete
+
+Suite de mesures des chemins critiques de Rnalib sur des entrées synthétiques.
+
+Chaque mesure conserve le meilleur temps sur --repeat répétitions. Les résultats
+sont écrits en JSON (--out) et peuvent être comparés à ceux d'un autre commit
+(--compare) : le script se termine avec le code 1 si une mesure est plus lente
+que la référence au-delà de --tolerance.
+
+usage: python benchmarks/bench_suite.py [--groups fill,traceback,enumeration,parsing,structure,store]
+                                        [--lengths 50,100,200,500,1000,2000,5000] [--quick]
+                                        [--out fichier.json] [--compare reference.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+import Rnalib
+
+GROUPS=["fill","traceback","enumeration","parsing","structure","store"]
+
+def random_seq(rng,size):
+    return "".join(rng.choice("ACGU") for _ in range(size))
+
+def best_time(func,repeat):
+    times=[]
+    for _ in range(repeat):
+        start=time.perf_counter()
+        func()
+        times.append(time.perf_counter()-start)
+    return min(times)
+
+def bench_fill(args,rng):
+    results=[]
+    table=Rnalib.Scores().pair_table
+    for length in args.lengths:
+        seq=random_seq(rng,length)
+        codes=Rnalib.Alphabet.encode_rna(seq)
+        for backend in Rnalib.Nussinov_kernels.available_backends():
+            if backend=="python":
+                if length>args.python_max:
+                    continue
+                rna=Rnalib.Rna_seq("bench",seq)
+                func=lambda: Rnalib.Predict_structure(rna,args.minloop,skipPredAll=True,backend="python")
+            else:
+                if backend=="numba":
+                    #compilation hors mesure
+                    Rnalib.Nussinov_kernels.fill(codes[:10],table,args.minloop,backend)
+                func=lambda: Rnalib.Nussinov_kernels.fill(codes,table,args.minloop,backend)
+            results.append({"name":"fill","params":{"backend":backend,"length":length},"seconds":best_time(func,args.repeat)})
+    return results
+
+def bench_traceback(args,rng):
+    results=[]
+    table=Rnalib.Scores().pair_table
+    for length in args.lengths:
+        seq=random_seq(rng,length)
+        codes=Rnalib.Alphabet.encode_rna(seq)
+        M,case,split=Rnalib.Nussinov_kernels.fill(codes,table,args.minloop,"tiled",pointers=True)
+        runs={"stack":lambda: Rnalib.Nussinov_kernels.traceback_stack(M,codes,table,args.minloop),
+              "pointers":lambda: Rnalib.Nussinov_kernels.traceback_pointers(case,split)}
+        for method,func in runs.items():
+            results.append({"name":"traceback","params":{"method":method,"length":length},"seconds":best_time(func,args.repeat)})
+    return results
+
+def bench_enumeration(args,rng):
+    results=[]
+    #séquences dégénérées : nombreuses structures co-optimales
+    for copies in args.degenerate:
+        rna=Rnalib.Rna_seq("degenere","GGGAAAUCCC"*copies)
+        count=[0]
+        def func():
+            a=Rnalib.Predict_structure(rna,args.minloop,backend="python")
+            count[0]=a.structures_nbr
+        seconds=best_time(func,args.repeat)
+        results.append({"name":"enumeration","params":{"length":len(rna.seq)},"seconds":seconds,"structures":count[0]})
+    return results
+
+def bench_parsing(args,rng):
+    results=[]
+    records=args.records
+    with tempfile.TemporaryDirectory() as tmp:
+        fasta=os.path.join(tmp,"bench.fasta")
+        dbfile=os.path.join(tmp,"bench.db")
+        ctfile=os.path.join(tmp,"bench.ct")
+        rnas=[Rnalib.Rna_seq("seq{}".format(k),random_seq(rng,rng.randint(50,300))) for k in range(records)]
+        with open(fasta,"w") as out:
+            for rna in rnas:
+                out.write(">{} synthetique\n".format(rna.id))
+                for start in range(0,len(rna.seq),60):
+                    out.write(rna.seq[start:start+60]+"\n")
+        structures=Rnalib.Batch_predict(rnas,args.minloop).structures
+        with open(dbfile,"w") as out:
+            for st in structures:
+                out.write(">{}\n{}\n{}\n".format(st.rna.id,st.rna.seq,st.dotpar))
+        big=Rnalib.Predict_structure(Rnalib.Rna_seq("ct",random_seq(rng,max(args.lengths))),args.minloop,skipPredAll=True,backend="tiled")
+        big.structure.structure_to_ct(ctfile)
+        runs=[("parse_fasta",records,lambda: Rnalib.Rna_parser.parse_fasta(fasta)),
+              ("parse_dotbrackets_file",records,lambda: Rnalib.Rna_parser.parse_dotbrackets_file(dbfile,args.minloop)),
+              ("parse_connect_file",len(big.rna.seq),lambda: Rnalib.Rna_parser.parse_connect_file(ctfile,args.minloop))]
+        for name,size,func in runs:
+            seconds=best_time(func,args.repeat)
+            results.append({"name":name,"params":{"size":size},"seconds":seconds,"throughput":size/seconds if seconds>0 else None})
+    return results
+
+def bench_structure(args,rng):
+    results=[]
+    table=Rnalib.Scores().pair_table
+    for length in args.lengths:
+        rna=Rnalib.Rna_seq("bench",random_seq(rng,length))
+        codes=Rnalib.Alphabet.encode_rna(rna.seq)
+        M=Rnalib.Nussinov_kernels.fill(codes,table,args.minloop,"tiled")
+        fold=Rnalib.Nussinov_kernels.traceback_stack(M,codes,table,args.minloop)
+        st=Rnalib.Rna_structure(rna,fold=fold)
+        runs={"Rna_structure":lambda: Rnalib.Rna_structure(rna,fold=fold),
+              "compact_tree":lambda: st.arbre.compact_tree(),
+              "tree_to_dotpar":lambda: st.arbre.tree_to_dotpar()}
+        for name,func in runs.items():
+            results.append({"name":name,"params":{"length":length},"seconds":best_time(func,args.repeat)})
+    return results
+
+def bench_store(args,rng):
+    results=[]
+    records=args.store_records
+    with tempfile.TemporaryDirectory() as tmp:
+        dbfile=os.path.join(tmp,"store.db")
+        with open(dbfile,"w") as out:
+            for k in range(records):
+                out.write(">seq{}\nGGGAAAUCCCGGGAAAUCCCAUAU\n(((....)))(((....)))....\n".format(k))
+        ids=["seq{}".format(rng.randrange(records)) for _ in range(1000)]
+        def build():
+            if os.path.exists(dbfile+".idx"):
+                os.remove(dbfile+".idx")
+            Rnalib.Structure_db(dbfile).close()
+        def lookups():
+            with Rnalib.Structure_db(dbfile) as db:
+                for seqid in ids:
+                    db[seqid]
+        runs=[("store_build_index",build),("store_load_index",lambda: Rnalib.Structure_db(dbfile).close()),
+              ("store_1000_lookups",lookups)]
+        for name,func in runs:
+            results.append({"name":name,"params":{"records":records},"seconds":best_time(func,args.repeat)})
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git","rev-parse","HEAD"],cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError,subprocess.CalledProcessError):
+        return None
+
+def key(result):
+    return result["name"]+" "+json.dumps(result["params"],sort_keys=True)
+
+def compare(report,reference_file,tolerance,min_seconds):
+    with open(reference_file) as ref:
+        reference={key(r):r for r in json.load(ref)["results"]}
+    regressions=[]
+    for result in report["results"]:
+        old=reference.get(key(result))
+        #les mesures trop courtes sont dominées par le bruit
+        if old is None or max(old["seconds"],result["seconds"])<min_seconds:
+            continue
+        ratio=result["seconds"]/old["seconds"]
+        flag=""
+        if ratio>1+tolerance:
+            flag="  <= régression"
+            regressions.append(key(result))
+        print("{:<60} {:9.4f}s -> {:9.4f}s  x{:5.2f}{}".format(key(result),old["seconds"],result["seconds"],ratio,flag))
+    return regressions
+
+def main():
+    parser=argparse.ArgumentParser(description="Mesures de performance de Rnalib")
+    parser.add_argument("--groups",default=",".join(GROUPS),help="groupes de mesures, séparés par des virgules")
+    parser.add_argument("--lengths",default="50,100,200,500,1000,2000,5000",help="longueurs des séquences synthétiques")
+    parser.add_argument("--python-max",type=int,default=500,help="longueur maximale mesurée avec le moteur 'python'")
+    parser.add_argument("--degenerate",default="2,3,4",help="nombres de copies de GGGAAAUCCC pour l'énumération")
+    parser.add_argument("--records",type=int,default=500,help="nombre d'enregistrements des fichiers analysés")
+    parser.add_argument("--store-records",type=int,default=100000,help="nombre d'enregistrements de la collection indexée")
+    parser.add_argument("--repeat",type=int,default=3,help="nombre de répétitions (le meilleur temps est conservé)")
+    parser.add_argument("--minloop",type=int,default=3)
+    parser.add_argument("--seed",type=int,default=1)
+    parser.add_argument("--quick",action="store_true",help="tailles réduites pour un contrôle rapide")
+    parser.add_argument("--out",default=None,help="fichier JSON de sortie")
+    parser.add_argument("--compare",default=None,help="fichier JSON de référence")
+    parser.add_argument("--tolerance",type=float,default=0.2,help="ralentissement toléré avant de signaler une régression")
+    parser.add_argument("--min-seconds",type=float,default=0.001,help="durée en dessous de laquelle une mesure n'est pas comparée")
+    args=parser.parse_args()
+
+    if args.quick:
+        args.lengths="50,100,200"
+        args.degenerate="2"
+        args.records=50
+        args.store_records=2000
+        args.repeat=1
+    args.lengths=[int(v) for v in args.lengths.split(",")]
+    args.degenerate=[int(v) for v in args.degenerate.split(",")]
+
+    benches={"fill":bench_fill,"traceback":bench_traceback,"enumeration":bench_enumeration,
+             "parsing":bench_parsing,"structure":bench_structure,"store":bench_store}
+    results=[]
+    for group in args.groups.split(","):
+        if group not in benches:
+            parser.error("groupe inconnu '{}' (choix: {})".format(group,", ".join(GROUPS)))
+        for result in benches[group](args,random.Random(args.seed)):
+            result["group"]=group
+            results.append(result)
+            print("{:<60} {:9.4f}s".format(key(result),result["seconds"]))
+
+    report={"benchmark":"suite","commit":git_commit(),"python":platform.python_version(),
+            "platform":platform.platform(),"cpu_count":os.cpu_count(),
+            "backends":Rnalib.Nussinov_kernels.available_backends(),"seed":args.seed,
+            "minloop":args.minloop,"repeat":args.repeat,"results":results}
+    if args.out:
+        with open(args.out,"w") as out:
+            json.dump(report,out,indent=2)
+    if args.compare:
+        regressions=compare(report,args.compare,args.tolerance,args.min_seconds)
+        if regressions:
+            print("{} régression(s) au-delà de {:.0%}".format(len(regressions),args.tolerance))
+            sys.exit(1)
+
+if __name__=="__main__":
+    main()
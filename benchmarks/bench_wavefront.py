@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:04:33 2026
+
+@author: Mathieu Genete
+
+Mesure l'accélération du remplissage 'wavefront' en fonction du nombre de threads.
+
+usage: python benchmarks/bench_wavefront.py [--length 3000] [--workers 1,2,4,8,16,32] [--repeat 3] [--out fichier.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),".."))
+import Rnalib
+
+def main():
+    parser=argparse.ArgumentParser(description="Accélération du remplissage par diagonales selon le nombre de threads")
+    parser.add_argument("--length",type=int,default=3000,help="longueur de la séquence synthétique")
+    parser.add_argument("--workers",default="1,2,4,8,16,32",help="nombres de threads testés, séparés par des virgules")
+    parser.add_argument("--repeat",type=int,default=3,help="nombre de répétitions (le meilleur temps est conservé)")
+    parser.add_argument("--minloop",type=int,default=3)
+    parser.add_argument("--seed",type=int,default=1)
+    parser.add_argument("--out",default=None,help="fichier JSON de sortie")
+    args=parser.parse_args()
+
+    rng=random.Random(args.seed)
+    seq="".join(rng.choice("ACGU") for _ in range(args.length))
+    codes=Rnalib.Alphabet.encode_rna(seq)
+    table=Rnalib.Scores().pair_table
+
+    results=[]
+    reference=None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        times=[]
+        for _ in range(args.repeat):
+            start=time.perf_counter()
+            Rnalib.Nussinov_kernels.fill_wavefront(codes,table,args.minloop,workers=workers)
+            times.append(time.perf_counter()-start)
+        best=min(times)
+        if reference is None:
+            reference=best
+        results.append({"workers":workers,"seconds":best,"speedup":reference/best})
+        print("threads={:>3}  temps={:8.3f}s  accélération={:5.2f}x".format(workers,best,reference/best))
+
+    report={"benchmark":"fill_wavefront","length":args.length,"minloop":args.minloop,
+            "cpu_count":os.cpu_count(),"results":results}
+    if args.out:
+        with open(args.out,"w") as out:
+            json.dump(report,out,indent=2)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 18:05:32 2026
+
+@author: Mathieu Genete
+
+Fonctions communes aux tests.
+"""
+import random
+import Rnalib
+
+def random_rna(rng,size,name=None):
+    """
+    Retourne une séquence d'ARN aléatoire.
+
+    Args:
+        rng (random.Random ou int): Générateur, ou graine d'un nouveau générateur.
+        size (int): Longueur de la séquence.
+        name (str, optionnel): Identifiant. Par défaut à 'seq_<size>'.
+
+    Returns:
+        Rna_seq: Séquence aléatoire.
+    """
+    if not isinstance(rng,random.Random):
+        rng=random.Random(rng)
+    return Rnalib.Rna_seq("seq_{}".format(size) if name is None else name,"".join(rng.choice("ACGU") for _ in range(size)))
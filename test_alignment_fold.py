@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 11:04:52 2026
+
+@author: Mathieu Genete
+
+Vérifie le repliement consensus d'un alignement multiple.
+"""
+import random
+import numpy as np
+import pytest
+import Rnalib
+
+ALIGNMENT=[("a","GGGGAAAACCCC"),("b","GCGGAAAACCGC"),("c","GGCG-AAACGCC")]
+
+def brute_scores(seqs,scores,covariation,min_pairing):
+    pairs=scores.pairs
+    length=len(seqs[0])
+    out=np.zeros((length,length))
+    for a in range(length):
+        for b in range(length):
+            values=[pairs.get((s[a],s[b]),0) for s in seqs]
+            paired=[s[a]+s[b] for s in seqs if s[a]+s[b] in scores.allowed_bp]
+            if len(paired)<min_pairing*len(seqs):
+                continue
+            diff=sum((p[0]!=q[0])+(p[1]!=q[1]) for k,p in enumerate(paired) for q in paired[k+1:])
+            out[a,b]=sum(values)/len(seqs)+(covariation*diff/(len(seqs)*(len(seqs)-1)/2) if len(seqs)>1 else 0)
+    return out
+
+def test_single_sequence_matches_prediction():
+    rng=random.Random(2)
+    for _ in range(20):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(5,60)))
+        aln=Rnalib.Alignment_fold({"s":seq},backend="numpy")
+        pred=Rnalib.Predict_structure(Rnalib.Rna_seq("s",seq),skipPredAll=True)
+        assert aln.structure.fold==pred.structure.fold
+        assert aln.score==pred.structure.score
+
+@pytest.mark.parametrize("covariation,min_pairing",[(1.0,0.5),(0.0,0.0),(2.5,1.0)])
+def test_column_pair_scores(covariation,min_pairing):
+    rng=random.Random(5)
+    seqs=["".join(rng.choice("ACGU-") for _ in range(25)) for _ in range(6)]
+    scores=Rnalib.Scores()
+    codes=np.array([Rnalib.Alphabet.encode_rna(s) for s in seqs])
+    values,types,counts=Rnalib.Alignment_fold.column_pair_scores(codes,scores.pair_table,covariation,min_pairing)
+    assert np.allclose(values,brute_scores(seqs,scores,covariation,min_pairing))
+    assert counts.shape==(len(types),25,25)
+
+def test_covariation_consensus_and_members(tmp_path):
+    fasta=tmp_path/"aln.fasta"
+    fasta.write_text("".join(">{} famille\n{}\n".format(seqid,seq.lower()) for seqid,seq in ALIGNMENT))
+    fold=Rnalib.Alignment_fold.from_fasta(str(fasta))
+    assert fold.ids==["a","b","c"]
+    assert fold.structure.dotpar=="((((....))))"
+    assert fold.structure.rna.seq=="GGGGAAAACCCC"
+    #GC, CG, GC: moyenne 3 et bonus (2+0+2)/3
+    assert fold.pair_scores[1,10]==pytest.approx(3+4/3)
+    assert fold.pair_scores[0,11]==pytest.approx(3)
+    member=fold.member_structure(2)
+    assert member.rna.seq=="GGCGAAACGCC" and member.dotpar=="((((...))))"
+    assert fold.member_structure(1).fold==fold.structure.fold
+
+def test_alignment_errors():
+    with pytest.raises(Exception,match="longueur"):
+        Rnalib.Alignment_fold([("a","GGGAAACCC"),("b","GGGAAACC")])
+    with pytest.raises(Exception,match="inattendu"):
+        Rnalib.Alignment_fold([("a","GGGAAACCN")])
+    with pytest.raises(Exception,match="aucune"):
+        Rnalib.Alignment_fold({})
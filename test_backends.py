@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:20:08 2026
+
+@author: Mathieu Genete
+
+Vérifie que les moteurs de calcul de Predict_structure donnent des résultats identiques.
+"""
+import importlib
+import random
+import numpy as np
+import pytest
+import Rnalib
+from conftest import random_rna
+
+BACKENDS=Rnalib.Nussinov_kernels.available_backends()
+
+def cases():
+    rng=random.Random(2026)
+    out=[]
+    for size in (1,2,5,12,30,57,90):
+        for minloop in (0,1,3):
+            out.append((random_rna(rng,size),minloop,Rnalib.Scores()))
+    out.append((random_rna(rng,40),3,Rnalib.Scores(GC=1,AU=1,GU=1)))
+    out.append((random_rna(rng,40),2,Rnalib.Scores(GC=5,AU=2,GU=0)))
+    return out
+
+@pytest.mark.parametrize("backend",[b for b in BACKENDS if b!="python"])
+@pytest.mark.parametrize("rna,minloop,scores",cases())
+def test_same_matrix_and_structure(backend,rna,minloop,scores):
+    ref=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,bases_scores=scores,backend="python")
+    other=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,bases_scores=scores,backend=backend)
+    assert np.array_equal(np.array(ref.matrix,dtype=np.int64).reshape(other.matrix.shape),other.matrix)
+    assert ref.structure.dotpar==other.structure.dotpar
+    assert ref.structure.score==other.structure.score
+
+@pytest.mark.parametrize("backend",BACKENDS)
+def test_same_optimal_structures(backend):
+    rna=Rnalib.Rna_seq("degenere","GGGAAAUCCCGGGAAAUCCC")
+    ref=Rnalib.Predict_structure(rna,3,backend="python")
+    other=Rnalib.Predict_structure(rna,3,backend=backend)
+    assert [s.dotpar for s in ref.all_structures]==[s.dotpar for s in other.all_structures]
+
+@pytest.mark.parametrize("backend",BACKENDS)
+@pytest.mark.parametrize("rna,minloop,scores",cases()[::3])
+def test_backpointers(backend,rna,minloop,scores):
+    ref=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,bases_scores=scores,backend="python")
+    other=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,bases_scores=scores,backend=backend,backpointers=True)
+    assert np.array_equal(np.array(ref.matrix,dtype=np.int64).reshape(np.shape(other.matrix)),np.array(other.matrix))
+    assert ref.structure.dotpar==other.structure.dotpar
+
+@pytest.mark.parametrize("backend",BACKENDS)
+def test_backpointers_all_structures(backend):
+    rna=Rnalib.Rna_seq("degenere","GGGAAAUCCCGGGAAAUCCC")
+    ref=Rnalib.Predict_structure(rna,3,backend="python")
+    other=Rnalib.Predict_structure(rna,3,backend=backend,backpointers=True)
+    assert [s.dotpar for s in ref.all_structures]==[s.dotpar for s in other.all_structures]
+
+@pytest.mark.parametrize("tile_size",[1,5,32])
+def test_tiled_pointers_small_tiles(tile_size):
+    rna=random_rna(random.Random(tile_size),120)
+    ref=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="python",backpointers=True)
+    other=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="tiled",tile_size=tile_size,backpointers=True)
+    for a,b in zip(ref.backpointers,other.backpointers):
+        assert np.array_equal(a,b)
+
+@pytest.mark.parametrize("tile_size",[1,4,13,32])
+@pytest.mark.parametrize("minloop",[0,3])
+def test_tiled_small_tiles(tile_size,minloop):
+    rna=random_rna(random.Random(tile_size),150)
+    ref=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,backend="python")
+    other=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,backend="tiled",tile_size=tile_size)
+    assert np.array_equal(np.array(ref.matrix),other.matrix)
+    assert ref.structure.dotpar==other.structure.dotpar
+
+@pytest.mark.parametrize("minloop",[0,3])
+def test_wavefront_many_blocks(minloop):
+    rna=random_rna(random.Random(minloop),140)
+    ref=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,backend="python")
+    codes=Rnalib.Alphabet.encode_rna(rna.seq)
+    table=Rnalib.Scores().pair_table
+    M=Rnalib.Nussinov_kernels.fill_wavefront(codes,table,minloop,workers=4,min_block=1)
+    assert np.array_equal(np.array(ref.matrix),M)
+
+def test_auto_without_numba(monkeypatch):
+    kernels=importlib.import_module("Rnalib.Nussinov_kernels")
+    monkeypatch.setattr(kernels,"numba_mod",False)
+    assert "numba" not in Rnalib.Nussinov_kernels.available_backends()
+    rna=Rnalib.Rna_seq("a","GGGAAAUCCCGGGAAAUCCC")
+    a=Rnalib.Predict_structure(rna,3,skipPredAll=True)
+    assert a.backend=="python"
+    assert isinstance(a.matrix,list)
+    with pytest.raises(Exception):
+        Rnalib.Predict_structure(rna,3,backend="numba")
+
+def test_unknown_backend():
+    with pytest.raises(Exception):
+        Rnalib.Predict_structure(Rnalib.Rna_seq("a","GGGAAACCC"),3,backend="fortran")
+
+@pytest.mark.parametrize("rna,minloop,scores",cases())
+@pytest.mark.parametrize("max_span",[0,4,11,1000])
+def test_banded(rna,minloop,scores,max_span):
+    #référence: matrice complète avec une table par position qui annule les paires trop éloignées
+    codes=rna.codes
+    size=len(codes)
+    positions=np.arange(size)
+    table=scores.pair_table[codes[:,None],codes[None,:]]
+    table[positions[None,:]-positions[:,None]>max_span]=0
+    M=Rnalib.Nussinov_kernels.fill(positions,table,minloop,"numpy")
+    B,F=Rnalib.Nussinov_kernels.fill_banded(codes,scores.pair_table,minloop,max_span)
+    assert B.shape==(size,max_span+1)
+    for j in range(size):
+        assert [B[j,j-i] for i in range(max(0,j-max_span),j+1)]==M[max(0,j-max_span):j+1,j].tolist()
+    assert F.tolist()==M[0].tolist()
+    fold=Rnalib.Nussinov_kernels.traceback_banded(B,F,codes,scores.pair_table,minloop)
+    assert sorted(fold)==sorted(Rnalib.Nussinov_kernels.traceback_stack(M,positions,table,minloop))
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:21:40 2026
+
+@author: Mathieu Genete
+
+Vérifie la prédiction par lots et la conversion FASTA vers dot-bracket.
+"""
+import random
+import pytest
+import Rnalib
+from conftest import random_rna
+
+@pytest.mark.parametrize("max_batch_bytes",[2**28,1])
+def test_batch_matches_predict_structure(max_batch_bytes):
+    rng=random.Random(7)
+    rnas=[random_rna(rng,rng.randint(1,80)) for _ in range(50)]
+    batch=Rnalib.Batch_predict(rnas,3,bucket_width=16,max_batch_bytes=max_batch_bytes)
+    for rna,st in zip(rnas,batch.structures):
+        assert st.dotpar==Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="python").structure.dotpar
+
+def test_fasta_to_db_long_records(tmp_path):
+    rng=random.Random(3)
+    rnas=[random_rna(rng,size) for size in (20,120,35,90)]
+    fasta=tmp_path/"in.fasta"
+    fasta.write_text("".join(">{}\n{}\n".format(r.id,r.seq) for r in rnas))
+    outdb=tmp_path/"out.db"
+    Rnalib.Rna_parser.fasta_to_db(str(fasta),str(outdb),batch_max_length=50)
+    lines=outdb.read_text().split("\n")
+    for k,rna in enumerate(rnas):
+        assert lines[3*k]==">"+rna.id
+        assert lines[3*k+2]==Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="python").structure.dotpar
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:02:47 2026
+
+@author: Mathieu Genete
+
+Vérifie la progression, les budgets et l'interruption des prédictions.
+"""
+import pytest
+import Rnalib
+
+BACKENDS=Rnalib.Nussinov_kernels.available_backends()
+DEGENERE=Rnalib.Rna_seq("degenere","GGGAAAUCCC"*3)
+
+@pytest.mark.parametrize("backend",BACKENDS)
+def test_fill_progress(backend):
+    calls=[]
+    Rnalib.Predict_structure(DEGENERE,3,skipPredAll=True,backend=backend,tile_size=8,
+                             progress=lambda phase,value: calls.append((phase,value)))
+    fractions=[v for phase,v in calls if phase=="fill"]
+    assert fractions==sorted(fractions)
+    assert fractions[-1]==pytest.approx(1.0)
+
+@pytest.mark.parametrize("backend",BACKENDS)
+def test_fill_timeout(backend):
+    with pytest.raises(TimeoutError):
+        Rnalib.Predict_structure(DEGENERE,3,skipPredAll=True,backend=backend,timeout=0)
+
+def test_max_structures():
+    full=Rnalib.Predict_structure(DEGENERE,3,backend="python")
+    assert full.complete and full.structures_nbr>3
+    seen=[]
+    part=Rnalib.Predict_structure(DEGENERE,3,backend="python",max_structures=3,
+                                  progress=lambda phase,value: seen.append(value) if phase=="enumeration" else None)
+    assert not part.complete
+    assert part.structures_nbr==3
+    assert seen==[1,2,3]
+    assert {s.dotpar for s in part.all_structures}<={s.dotpar for s in full.all_structures}
+
+def test_cancel_from_progress():
+    def cancel(phase,value):
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        Rnalib.Predict_structure(DEGENERE,3,backend="numpy",progress=cancel)
+
+def test_cooperative_cancel():
+    full=Rnalib.Predict_structure(DEGENERE,3,backend="python")
+    part=Rnalib.Predict_structure(DEGENERE,3,backend="python",
+                                  progress=lambda phase,value: not (phase=="enumeration" and value>=2))
+    assert not part.complete
+    assert part.structures_nbr==2
+    assert {s.dotpar for s in part.all_structures}<={s.dotpar for s in full.all_structures}
+    with pytest.raises(Exception,match="annulée"):
+        Rnalib.Predict_structure(DEGENERE,3,skipPredAll=True,backend="numpy",progress=lambda phase,value: False)
+
+def test_cancel_method():
+    holder=[]
+    def progress(phase,value):
+        if holder and phase=="enumeration" and value==1:
+            holder[0].cancel()
+    pred=Rnalib.Predict_structure(DEGENERE,3,backend="python",skipPredAll=True,progress=progress)
+    holder.append(pred)
+    pred.structures_prediction()
+    assert not pred.complete and pred.structures_nbr==1
+    #la demande est effacée au début de la prédiction suivante
+    holder.clear()
+    pred.structures_prediction()
+    assert pred.complete and pred.structures_nbr>3
+
+def test_fasta_to_db_timeout(tmp_path):
+    fasta=tmp_path/"in.fasta"
+    fasta.write_text(">court\nGGGAAAUCCC\n>long\n{}\n".format("GGGAAAUCCC"*5))
+    outdb=tmp_path/"out.db"
+    skipped=Rnalib.Rna_parser.fasta_to_db(str(fasta),str(outdb),batch_max_length=20,timeout=0)
+    assert skipped==["long"]
+    assert outdb.read_text().startswith(">court\n")
+    assert ">long" not in outdb.read_text()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:40:18 2026
+
+@author: Mathieu Genete
+
+Vérifie la ligne de commande (python -m Rnalib) et la lecture des fichiers enregistrement par enregistrement.
+"""
+import io
+import os
+import random
+import subprocess
+import sys
+import pytest
+import Rnalib
+from Rnalib.Rna_cli import Rna_cli
+
+ROOT=os.path.dirname(os.path.abspath(__file__))
+
+def random_fasta(seed,records):
+    rng=random.Random(seed)
+    return "".join(">seq{} description {}\n{}\n".format(k,k,"".join(rng.choice("ACGU") for _ in range(rng.randint(5,80))))
+                   for k in range(records))
+
+def run(args,stdin=""):
+    out=subprocess.run([sys.executable,"-m","Rnalib"]+args,input=stdin,capture_output=True,text=True,
+                       env=dict(os.environ,PYTHONPATH=ROOT))
+    return out.returncode,out.stdout,out.stderr
+
+def test_fold_same_as_predict_structure(tmp_path,capsys):
+    fasta=random_fasta(1,8)
+    (tmp_path/"in.fa").write_text(fasta)
+    assert Rna_cli.main(["fold",str(tmp_path/"in.fa"),"--minloop","2","--GC","2","--AU","2","--GU","0"])==0
+    expected=[]
+    for rna in Rnalib.Rna_parser.iter_fasta(io.StringIO(fasta)):
+        st=Rnalib.Predict_structure(rna,2,skipPredAll=True,bases_scores=Rnalib.Scores(2,2,0)).structure
+        expected.append(">{}\n{}\n{}\n".format(rna.id,rna.seq,st.dotpar))
+    assert capsys.readouterr().out=="".join(expected)
+
+def test_fold_stdin_workers():
+    fasta=random_fasta(2,12)
+    code,single,_=run(["fold"],fasta)
+    assert code==0
+    code,parallel,_=run(["fold","-","--workers","2"],fasta)
+    assert code==0
+    assert single==parallel
+    assert single.count(">")==12
+
+def test_fold_max_span(tmp_path,capsys):
+    fasta=random_fasta(3,6)
+    (tmp_path/"in.fa").write_text(fasta)
+    assert Rna_cli.main(["fold",str(tmp_path/"in.fa"),"--max-span","10","--minloop","1"])==0
+    lines=capsys.readouterr().out.splitlines()
+    for k in range(0,len(lines),3):
+        st=Rnalib.Rna_structure(Rnalib.Rna_seq("a",lines[k+1]),dotpar=lines[k+2])
+        assert all(j-i<=10 for i,j in st.fold)
+    #sans limite effective, même résultat que Predict_structure
+    seqid,seq,dotpar=Rna_cli.fold_record("a","GGGAAAUCCCGGGAAAUCCC",3,(3,2,1),"auto",1000)
+    assert dotpar==Rnalib.Predict_structure(Rnalib.Rna_seq("a",seq),3,skipPredAll=True).structure.dotpar
+
+def test_convert_round_trip():
+    fasta=random_fasta(4,5)
+    _,db,_=run(["fold"],fasta)
+    code,ct,_=run(["convert","--from","db","--to","ct"],db)
+    assert code==0
+    code,back,_=run(["convert","--from","ct","--to","db"],ct)
+    assert code==0
+    assert back==db
+    _,fa,_=run(["convert","--from","ct","--to","fasta"],ct)
+    assert fa.splitlines()==[line for k,line in enumerate(db.splitlines()) if k%3!=2]
+
+def test_compare_and_stats(tmp_path,capsys):
+    (tmp_path/"ref.db").write_text(">a\nGGGAAAUCCC\n(((....)))\n>b\nGGGAAAUCCC\n..........\n")
+    (tmp_path/"pred.db").write_text(">a\nGGGAAAUCCC\n((......))\n>b\nGGGAAAUCCC\n..........\n")
+    assert Rna_cli.main(["compare",str(tmp_path/"ref.db"),str(tmp_path/"pred.db")])==0
+    rows=[line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    assert rows[1]==["a","10","3","2","2","0","1","1","0.667","1.000","0.800","False"]
+    assert rows[2][-1]=="True"
+    assert Rna_cli.main(["stats",str(tmp_path/"ref.db")])==0
+    rows=[line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    assert rows[1]==["a","10","3","0.600","0.600","1","9","9"]
+
+def test_errors(tmp_path):
+    (tmp_path/"ref.db").write_text(">a\nGGGAAAUCCC\n(((....)))\n")
+    (tmp_path/"pred.db").write_text("")
+    assert Rna_cli.main(["compare",str(tmp_path/"ref.db"),str(tmp_path/"pred.db")])==1
+    code,_,err=run(["convert","--to","ct"],"")
+    assert code==1 and "--from" in err
+    code,_,err=run(["fold"],">x\nACGUN\n")
+    assert code==1
+
+def test_iter_connect_formats():
+    #en-têtes, 6 colonnes et enregistrements sans en-tête
+    text=("5 ENERGY = -1.0 premier\n"
+          "1 G 0 2 5 1\n2 A 1 3 0 2\n3 A 2 4 0 3\n4 A 3 5 0 4\n5 C 4 0 1 5\n"
+          "1\tG\t5\n2\tA\t0\n3\tA\t0\n4\tA\t0\n5\tC\t1\n")
+    structures=list(Rnalib.Rna_parser.iter_connect(io.StringIO(text),3,seqid="x"))
+    assert [s.rna.id for s in structures]==["ENERGY = -1.0 premier","x"]
+    assert [s.dotpar for s in structures]==["(...)","(...)"]
+    with pytest.raises(Exception):
+        list(Rnalib.Rna_parser.iter_connect(io.StringIO("5 court\n1 G 0\n"),3))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:05:12 2026
+
+@author: Mathieu Genete
+
+Vérifie le co-repliement de deux brins et le mode duplex.
+"""
+import random
+import numpy as np
+import pytest
+import Rnalib
+from conftest import random_rna
+
+def duplex_reference(seq1,seq2,scores,inter_penalty):
+    #meilleur ensemble de paires (i,j) sans croisement, i dans seq1 et j dans seq2
+    n,m=len(seq1),len(seq2)
+    D=[[0]*(m+1) for _ in range(n+1)]
+    for a in range(1,n+1):
+        for c in range(1,m+1):
+            p=max(scores.pairs.get((seq1[a-1],seq2[m-c]),0)-inter_penalty,0)
+            D[a][c]=max(D[a-1][c],D[a][c-1],D[a-1][c-1]+p)
+    return D[n][m]
+
+def nussinov_reference(seq,scores,minloop):
+    n=len(seq)
+    M=[[0]*n for _ in range(n)]
+    for j in range(n):
+        for i in range(j-minloop-1,-1,-1):
+            best=max(M[i][j-1],M[i+1][j-1]+scores.pairs.get((seq[i],seq[j]),0))
+            for k in range(i+1,j-minloop):
+                best=max(best,M[i][k-1]+scores.pairs.get((seq[k],seq[j]),0)+M[k+1][j-1])
+            M[i][j]=best
+    return M[0][n-1] if n else 0
+
+@pytest.mark.parametrize("inter_penalty",[0,1,2])
+def test_duplex_score(inter_penalty):
+    rng=random.Random(inter_penalty)
+    scores=Rnalib.Scores()
+    query=random_rna(rng,15,"query")
+    targets=[random_rna(rng,rng.randint(1,40),"t{}".format(k)) for k in range(20)]
+    duplexes=Rnalib.Cofold_structure.duplex_scan(query,targets,scores,inter_penalty,batch_size=7)
+    for target,st in zip(targets,duplexes):
+        ref=duplex_reference(query.seq,target.seq,scores,inter_penalty)
+        penalized=sum(max(scores.pairs[(st.rna.seq[i],st.rna.seq[j])]-inter_penalty,0) for i,j in st.fold)
+        assert penalized==ref
+        assert all(i<len(query.seq)<=j for i,j in st.fold)
+
+def test_duplex_matrix():
+    mirna=Rnalib.Rna_seq("miR","UGAGGUAGUAGG")
+    target=Rnalib.Rna_seq("cible","CCUACUACCUCA")
+    dimer=Rnalib.Cofold_structure(mirna,target,duplex=True)
+    assert dimer.matrix.shape==(len(mirna.seq)+1,len(target.seq)+1)
+    assert dimer.matrix[-1,-1]==dimer.score
+
+def test_dotpar_cut():
+    mirna=Rnalib.Rna_seq("miR","GGGAAA")
+    target=Rnalib.Rna_seq("cible","UUUCCCAA")
+    dimer=Rnalib.Cofold_structure(mirna,target,3)
+    dotpar=dimer.structure.dotpar
+    assert dotpar.index("&")==len(mirna.seq)
+    assert len(dotpar)==len(mirna.seq)+len(target.seq)+1
+    parsed=Rnalib.Rna_structure(dimer.structure.rna,dotpar=dotpar)
+    assert parsed.fold==dimer.structure.fold
+    assert parsed.cut==len(mirna.seq)
+
+@pytest.mark.parametrize("inter_penalty",[0,1])
+def test_cofold_dimer_coordinates(inter_penalty):
+    rng=random.Random(11)
+    rna1=random_rna(rng,25,"a")
+    rna2=random_rna(rng,30,"b")
+    scores=Rnalib.Scores()
+    dimer=Rnalib.Cofold_structure(rna1,rna2,3,linker_length=4,inter_penalty=inter_penalty,bases_scores=scores)
+    seq=rna1.seq+rna2.seq
+    assert dimer.structure.rna.seq==seq
+    for i,j in dimer.structure.fold:
+        assert (seq[i],seq[j]) in scores.pairs
+        assert j<len(seq)
+    if inter_penalty==0:
+        #sans pénalité le score est celui de la séquence liée par des positions non appariables
+        assert dimer.score==nussinov_reference(rna1.seq+"&&&&"+rna2.seq,scores,3)==dimer.structure.score
+    else:
+        assert dimer.score==dimer.structure.score-inter_penalty*len(dimer.inter_pairs)
+
+@pytest.mark.parametrize("inter_penalty",[1,2])
+def test_cofold_penalized_reference(inter_penalty):
+    #référence: un code par position, table des couples de positions pénalisée entre les brins
+    rng=random.Random(20+inter_penalty)
+    scores=Rnalib.Scores()
+    for _ in range(5):
+        rna1=random_rna(rng,rng.randint(1,30),"a")
+        rna2=random_rna(rng,rng.randint(1,30),"b")
+        bases=np.concatenate((rna1.codes,np.full(3,4,dtype=np.uint8),rna2.codes))
+        table=scores.pair_table[bases[:,None],bases[None,:]]
+        start2=len(rna1.seq)+3
+        table[:len(rna1.seq),start2:]=np.maximum(table[:len(rna1.seq),start2:]-inter_penalty,0)
+        positions=np.arange(len(bases))
+        M=Rnalib.Nussinov_kernels.fill(positions,table,3)
+        dimer=Rnalib.Cofold_structure(rna1,rna2,3,linker_length=3,inter_penalty=inter_penalty,bases_scores=scores)
+        assert np.array_equal(dimer.matrix,M)
+        assert dimer.score==int(M[0,-1])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:03:36 2026
+
+@author: Mathieu Genete
+
+Vérifie la matrice sur disque, ses points de reprise et le traceback lu dans le fichier.
+"""
+import importlib
+import numpy as np
+import pytest
+import Rnalib
+from conftest import random_rna
+
+@pytest.mark.parametrize("use_numba",[False,True])
+@pytest.mark.parametrize("size,minloop",[(1,3),(5,0),(60,0),(80,3),(300,3)])
+def test_same_matrix_and_structure(tmp_path,monkeypatch,use_numba,size,minloop):
+    kernels=importlib.import_module("Rnalib.Nussinov_kernels")
+    if use_numba and not kernels.numba_mod:
+        pytest.skip("numba non installé")
+    monkeypatch.setattr(kernels,"numba_mod",use_numba)
+    rna=random_rna(size,size)
+    ref=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,backend="numpy")
+    disk=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,matrix_file=str(tmp_path/"m.bin"))
+    assert isinstance(disk.matrix,Rnalib.Disk_matrix)
+    assert np.array_equal(ref.matrix,disk.matrix.to_array())
+    assert ref.structure.dotpar==disk.structure.dotpar
+
+def test_resume_after_interruption(tmp_path):
+    rna=random_rna(3,200)
+    path=str(tmp_path/"m.bin")
+    def stop(phase,value):
+        if value>0.5:
+            raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        Rnalib.Predict_structure(rna,3,skipPredAll=True,matrix_file=path,progress=stop)
+    codes=Rnalib.Alphabet.encode_rna(rna.seq)
+    table=Rnalib.Scores().pair_table
+    partial=Rnalib.Disk_matrix(path,codes,table,3)
+    assert 0<partial.last_column<199
+    with pytest.raises(Exception):
+        partial.traceback()
+    fractions=[]
+    resumed=Rnalib.Predict_structure(rna,3,skipPredAll=True,matrix_file=path,progress=lambda p,v: fractions.append(v))
+    assert fractions[0]>0.5
+    ref=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="numpy")
+    assert np.array_equal(ref.matrix,resumed.matrix.to_array())
+    assert ref.structure.dotpar==resumed.structure.dotpar
+    #seules les colonnes remplies après la reprise sont comptées
+    assert resumed.metrics["counters"]["cells"]==Rnalib.Nussinov_kernels.fill_counters(200,3,partial.last_column+1)["cells"]
+    assert 0<resumed.metrics["counters"]["cells"]<ref.metrics["counters"]["cells"]
+
+def test_other_sequence_restarts(tmp_path):
+    path=str(tmp_path/"m.bin")
+    Rnalib.Predict_structure(random_rna(1,50),3,skipPredAll=True,matrix_file=path)
+    rna=random_rna(2,50)
+    other=Rnalib.Predict_structure(rna,3,skipPredAll=True,matrix_file=path)
+    ref=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="numpy")
+    assert np.array_equal(ref.matrix,other.matrix.to_array())
+
+def test_all_structures_from_disk(tmp_path):
+    rna=Rnalib.Rna_seq("degenere","GGGAAAUCCCGGGAAAUCCC")
+    ref=Rnalib.Predict_structure(rna,3,backend="python")
+    disk=Rnalib.Predict_structure(rna,3,matrix_file=str(tmp_path/"m.bin"))
+    assert [s.dotpar for s in ref.all_structures]==[s.dotpar for s in disk.all_structures]
+    rec=Rnalib.Predict_structure(rna,3,skipPredAll=True,use_recurse=True,matrix_file=str(tmp_path/"m.bin"))
+    assert rec.structure.dotpar==ref.structure.dotpar
+    rows=disk.matrix.rows()
+    full=disk.matrix.to_array()
+    assert all(rows[i][j]==full[i,j] for i in range(len(rna.seq)) for j in range(len(rna.seq)))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 19:10:26 2026
+
+@author: Mathieu Genete
+
+Vérifie la mise à jour incrémentale de la matrice et la recherche de séquences (repliement inverse).
+"""
+import random
+import time
+import numpy as np
+import pytest
+import Rnalib
+
+TARGET="((((....))))....((((....))))"
+
+@pytest.mark.parametrize("backend",["numpy","numba"])
+def test_refill_matches_fill(backend):
+    if backend not in Rnalib.Nussinov_kernels.available_backends():
+        pytest.skip("numba non installé")
+    rng=random.Random(2)
+    table=Rnalib.Scores().pair_table
+    for _ in range(20):
+        n=rng.randint(1,50)
+        m=rng.choice([0,3])
+        codes=Rnalib.Alphabet.encode_rna("".join(rng.choice("ACGU") for _ in range(n))).copy()
+        M=Rnalib.Nussinov_kernels.fill(codes,table,m,backend)
+        lo=rng.randrange(n)
+        hi=min(n-1,lo+rng.choice([0,4,30]))
+        codes[lo]=rng.randrange(4)
+        codes[hi]=rng.randrange(4)
+        cells=Rnalib.Nussinov_kernels.refill(M,codes,table,m,lo,hi,backend)
+        assert np.array_equal(M,Rnalib.Nussinov_kernels.fill(codes,table,m,backend))
+        assert cells<=(hi+1)*(n-lo)
+
+def test_target_validation():
+    assert Rnalib.Inverse_fold.target_pairs("((....)).",3)==[(0,7),(1,6)]
+    for bad in ["((....)","(....))","((..))","(.x..)"]:
+        with pytest.raises(Exception):
+            Rnalib.Inverse_fold.target_pairs(bad,3)
+
+def test_design_folds_to_target():
+    design=Rnalib.Inverse_fold(TARGET,3,starts=2,seed=5,backend="numpy")
+    assert design.solved and design.best.dotpar==TARGET
+    for d in design.designs:
+        if d["solved"]:
+            pred=Rnalib.Predict_structure(Rnalib.Rna_seq("d",d["seq"]),3,skipPredAll=True,backend="numpy")
+            assert pred.structure.dotpar==TARGET
+        for i,j in Rnalib.Inverse_fold.target_pairs(TARGET):
+            assert d["seq"][i]+d["seq"][j] in Rnalib.Scores().allowed_bp
+
+def test_seed_and_processes():
+    a=Rnalib.Inverse_fold(TARGET,3,starts=3,seed=9,backend="numpy",max_steps=50)
+    b=Rnalib.Inverse_fold(TARGET,3,starts=3,seed=9,backend="numpy",max_steps=50,workers=2)
+    key=lambda d:[(x["seq"],x["steps"],x["cells"]) for x in d.designs]
+    assert key(a)==key(b)
+
+def test_time_budget():
+    target="(((((.....)))))...((((((....))))))..((((...))))"*2
+    tic=time.perf_counter()
+    design=Rnalib.Inverse_fold(target,3,starts=2,seed=1,backend="numpy",time_budget=0.3,max_steps=10**9)
+    assert time.perf_counter()-tic<5
+    assert all(d["steps"]<10**9 for d in design.designs)
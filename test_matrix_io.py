@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:48:12 2026
+
+@author: Mathieu Genete
+
+Vérifie l'export binaire de la matrice des scores et l'export CSV par blocs.
+"""
+import numpy as np
+import pytest
+import Rnalib
+from conftest import random_rna
+
+def naive_csv(a,sep):
+    lines=[sep.join([" "]+[v for v in a.rna.seq])]
+    for i in range(len(a.rna.seq)):
+        lines.append(sep.join([a.rna.seq[i]]+[str(v) for v in np.asarray(a.matrix)[i]]))
+    return "\n".join(lines)+"\n"
+
+def predictions(tmp_path,rna,minloop):
+    yield Rnalib.Predict_structure(rna,minloop,skipPredAll=True,backend="python")
+    yield Rnalib.Predict_structure(rna,minloop,skipPredAll=True,backend="numpy")
+    yield Rnalib.Predict_structure(rna,minloop,skipPredAll=True,matrix_file=str(tmp_path/"m.bin"))
+
+@pytest.mark.parametrize("size,minloop",[(1,3),(7,0),(90,3)])
+def test_npz_round_trip(tmp_path,size,minloop):
+    rna=random_rna(size,size)
+    scores=Rnalib.Scores(GC=5,AU=2,GU=0)
+    for k,a in enumerate(predictions(tmp_path,rna,minloop)):
+        out=str(tmp_path/"m{}.npz".format(k))
+        a.export_matrix(out)
+        loaded,M,infos=Rnalib.Predict_structure.load_matrix(out)
+        assert (loaded.id,loaded.seq)==(rna.id,rna.seq)
+        assert np.array_equal(M,np.asarray(a.matrix))
+        assert infos["minloop"]==minloop
+        assert infos["backend"]==a.backend
+        assert infos["scores"]==a.scores.scores
+        _,packed,_=Rnalib.Predict_structure.load_matrix(out,packed=True)
+        assert len(packed)==size*(size+1)//2
+    a=Rnalib.Predict_structure(rna,minloop,skipPredAll=True,bases_scores=scores,backend="numpy")
+    a.export_matrix(str(tmp_path/"s.npz"))
+    assert Rnalib.Predict_structure.load_matrix(str(tmp_path/"s.npz"))[2]["scores"]==scores.scores
+
+@pytest.mark.parametrize("sep",[",",";"])
+def test_csv_same_as_naive(tmp_path,sep):
+    rna=random_rna(4,70)
+    for k,a in enumerate(predictions(tmp_path,rna,3)):
+        out=tmp_path/"m{}.csv".format(k)
+        a.export_matrixt_to_csv(str(out),sep=sep,chunk_rows=16)
+        assert out.read_text()==naive_csv(a,sep)
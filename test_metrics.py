@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:24:03 2026
+
+@author: Mathieu Genete
+
+Vérifie les métriques par phase de Predict_structure et leur agrégation.
+"""
+import pytest
+import Rnalib
+
+PHASES={"encoding","fill","traceback","enumeration","structure"}
+
+@pytest.mark.parametrize("backend",Rnalib.Nussinov_kernels.available_backends())
+def test_metrics_counters(backend):
+    received=[]
+    rna=Rnalib.Rna_seq("degenere","GGGAAAUCCCGGGAAAUCCC")
+    a=Rnalib.Predict_structure(rna,3,backend=backend,metrics_hook=received.append)
+    assert received==[a.metrics]
+    assert set(a.metrics["phases"])==PHASES
+    counters=a.metrics["counters"]
+    #cases (i,j) avec j-i>3 pour 20 bases
+    assert counters["cells"]==sum(20-d for d in range(4,20))
+    assert counters["split_points"]==sum((20-d)*(d-4) for d in range(4,20))
+    assert counters["traceback_steps"]>=len(a.structure.fold)
+    assert counters["branches"]>=a.structures_nbr
+    assert counters["matrix_bytes"]>0
+
+def test_metrics_aggregation(tmp_path):
+    fasta=tmp_path/"in.fasta"
+    fasta.write_text(">a\nGGGAAAUCCC\n>b\nGGGGAAAACCCCAUGCAUGC\n>c\nGGGAAAUCCCGGGAAAUCCCGG\n")
+    total={}
+    Rnalib.Rna_parser.fasta_to_db(str(fasta),str(tmp_path/"out.db"),batch_max_length=20,
+                                  metrics_hook=lambda m: Rnalib.Predict_structure.add_metrics(total,m))
+    assert total["predictions"]==3
+    assert set(total["phases"])==PHASES
+    assert total["counters"]["traceback_steps"]>0
+
+def test_batch_counters_use_real_lengths():
+    rnas=[Rnalib.Rna_seq("s{}".format(k),"GGGAAAUCCC"[:size]) for k,size in enumerate((10,7,9))]
+    received=[]
+    Rnalib.Batch_predict(rnas,3,bucket_width=8,metrics_hook=received.append)
+    cells=sum(m["counters"]["cells"] for m in received)
+    splits=sum(m["counters"]["split_points"] for m in received)
+    singles=[Rnalib.Predict_structure(rna,3,skipPredAll=True).metrics["counters"] for rna in rnas]
+    assert cells==sum(c["cells"] for c in singles)
+    assert splits==sum(c["split_points"] for c in singles)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 20:41:37 2026
+
+@author: Mathieu Genete
+
+Vérifie la décomposition en boucles et les requêtes de l'index des motifs.
+"""
+import numpy as np
+import pytest
+import Rnalib
+
+SEQ="GGGGAAGGAAACCAAGGAAGGAAAACCCCAAACCCCAA"
+DOTPAR="((((..((...))..((..((....))))...))))."
+
+def structure(seqid,seq,dotpar):
+    return Rnalib.Rna_structure(Rnalib.Rna_seq(seqid,seq),dotpar=dotpar)
+
+def test_loop_decomposition():
+    loops=structure("a",SEQ,DOTPAR).loop_decomposition()
+    assert loops==[("helix",0,35,4,0,0,0,4),("helix",6,12,2,0,0,0,2),("helix",15,28,2,0,0,0,2),
+                   ("helix",19,26,2,0,0,0,2),("exterior",-1,37,1,0,0,1,0),("multiloop",3,32,7,0,0,3,4),
+                   ("hairpin",7,11,3,0,0,0,2),("bulge",16,27,2,2,0,1,2),("hairpin",20,25,4,0,0,0,2)]
+    interior=structure("b","GGGAAGGGAAAACCCAAACCC","(((..(((....)))...)))").loop_decomposition()
+    assert ("interior",2,18,5,2,3,1,3) in interior
+    assert structure("c","ACGU","....").loop_decomposition()==[("exterior",-1,4,4,0,0,0,0)]
+
+def test_queries_and_persistence(tmp_path):
+    sts=[structure("a",SEQ,DOTPAR),
+         structure("b","GGGGGAAAACCCCC","(((((....)))))"),
+         structure("c","GGGGGAAAAAAAAAACCCCC","(((((..........)))))")]
+    index=Rnalib.Motif_index(sts)
+    assert index.ids==["a","b","c"]
+    assert index.structures("hairpin",stem=(5,None),length=(4,8)).tolist()==[1]
+    assert index.structures("multiloop",branches=3).tolist()==[0]
+    assert index.count("helix").tolist()==[4,1,1]
+    assert index.count(("bulge","interior")).tolist()==[1,0,0]
+    rows=index.rows(index.select("hairpin",length=(9,None)))
+    assert rows==[("c","hairpin",4,15,10,0,0,0,5)]
+    with pytest.raises(Exception):
+        index.select("pseudoknot")
+    with pytest.raises(Exception):
+        index.select("hairpin",width=3)
+    index.save(str(tmp_path/"motifs.npz"))
+    loaded=Rnalib.Motif_index.load(str(tmp_path/"motifs.npz"))
+    assert loaded.ids==index.ids
+    for name in Rnalib.Motif_index.COLUMNS:
+        assert np.array_equal(loaded.columns[name],index.columns[name])
+
+def test_from_dotbrackets(tmp_path):
+    path=tmp_path/"s.db"
+    path.write_text(">a\n{}\n{}\n>b\nGGGGGAAAACCCCC\n(((((....)))))\n".format(SEQ,DOTPAR))
+    index=Rnalib.Motif_index.from_dotbrackets(str(path))
+    assert index.ids==["a","b"]
+    index.extend([structure("c","GGGGGAAAAAAAAAACCCCC","(((((..........)))))")])
+    assert index.structures("hairpin",stem=5).tolist()==[1,2]
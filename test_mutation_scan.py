@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 17:48:30 2026
+
+@author: Mathieu Genete
+
+Vérifie le balayage des mutants ponctuels par comparaison au repliement de chaque mutant.
+"""
+import random
+import numpy as np
+import pytest
+import Rnalib
+
+def fold_score(seq,minloop):
+    return Rnalib.Predict_structure(Rnalib.Rna_seq("m",seq),minloop,skipPredAll=True,backend="numpy").structure.score
+
+@pytest.mark.parametrize("minloop",[0,3])
+def test_scores_match_refolding(minloop):
+    rng=random.Random(11+minloop)
+    for _ in range(8):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(1,30)))
+        scan=Rnalib.Mutation_scan(Rnalib.Rna_seq("a",seq),minloop,backend="numpy")
+        assert len(scan.result)==3*len(seq)
+        assert scan.wild_type.score==fold_score(seq,minloop)
+        wild=set(scan.wild_type.fold)
+        for idx,row in enumerate(scan.result):
+            pos=int(row["position"])
+            assert row["wild"]==seq[pos] and row["mutant"]!=seq[pos]
+            mutant=seq[:pos]+row["mutant"]+seq[pos+1:]
+            assert row["score"]==fold_score(mutant,minloop)
+            assert row["delta"]==row["score"]-scan.wild_type.score
+            st=scan.mutant_structure(idx)
+            assert st.rna.seq==mutant and st.score==row["score"]
+            assert row["distance"]==len(set(st.fold)^wild)
+
+def test_workers_and_without_structures():
+    seq="".join(random.Random(4).choice("ACGU") for _ in range(80))
+    rna=Rnalib.Rna_seq("a",seq)
+    ref=Rnalib.Mutation_scan(rna,3,backend="numpy")
+    par=Rnalib.Mutation_scan(rna,3,backend="numpy",workers=3)
+    assert np.array_equal(ref.result,par.result) and ref.structures==par.structures
+    light=Rnalib.Mutation_scan(rna,3,backend="numpy",structures=False)
+    assert np.array_equal(light.result["score"],ref.result["score"])
+    assert (light.result["distance"]==-1).all() and light.structures==[]
+    with pytest.raises(Exception):
+        light.mutant_structure(0)
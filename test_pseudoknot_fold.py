@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 15:18:09 2026
+
+@author: Mathieu Genete
+
+Vérifie la notation des pseudonoeuds, les fichiers CT qui en contiennent et le repliement avec pseudonoeuds de type H.
+"""
+import functools
+import random
+import pytest
+import Rnalib
+
+HTYPE="GGGCGAAAUCCGCAAACGCGGAAAAAAGCCCUUUGCGCAAA"
+
+def reference(seq,m=3,min_stem=3,max_span=None,penalty=0):
+    """Même grammaire, par énumération naïve des couples de tiges et récursion mémorisée."""
+    table=Rnalib.Scores().pair_table
+    codes=Rnalib.Rna_seq("r",seq).codes.tolist()
+    n=len(seq)
+    max_span=n if max_span is None else max_span
+    def p(i,j):
+        return int(table[codes[i],codes[j]]) if j-i>m else 0
+    @functools.lru_cache(None)
+    def nested(i,j):
+        if j-i<=m:
+            return 0
+        best=max(nested(i,j-1),p(i,j)+nested(i+1,j-1) if p(i,j)>0 else 0)
+        for k in range(i+1,j-m):
+            if p(k,j)>0:
+                best=max(best,nested(i,k-1)+p(k,j)+nested(k+1,j-1))
+        return best
+    stems=[]
+    for i in range(n):
+        for j in range(i+1,min(n,i+max_span+1)):
+            a=0
+            while j-a-(i+a)>m and p(i+a,j-a)>0:
+                a+=1
+                if a>=min_stem:
+                    stems.append((i,j,a,sum(p(i+t,j-t) for t in range(a))))
+    knots={}
+    for i,j,a,s1 in stems:
+        for k,l,b,s2 in stems:
+            if k>=i+a and k+b<=j-a+1 and l-b>=j and l-i<=max_span:
+                value=s1+s2+nested(i+a,k-1)+nested(k+b,j-a)+nested(j+1,l-b)-penalty
+                if value>0:
+                    knots[(i,l)]=max(knots.get((i,l),0),value)
+    @functools.lru_cache(None)
+    def full(i,j):
+        if j-i<=m:
+            return 0
+        best=max(full(i,j-1),p(i,j)+full(i+1,j-1) if p(i,j)>0 else 0)
+        for k in range(i+1,j-m):
+            if p(k,j)>0:
+                best=max(best,full(i,k-1)+p(k,j)+full(k+1,j-1))
+        for k in range(i,j):
+            if (k,j) in knots:
+                best=max(best,(full(i,k-1) if k>i else 0)+knots[(k,j)])
+        return best
+    return full(0,n-1) if n else 0
+
+def test_bracket_levels_and_partners():
+    rna=Rnalib.Rna_seq("h",HTYPE)
+    fold=[(0,30),(1,29),(2,28),(3,27),(10,36),(11,35),(12,34)]
+    st=Rnalib.Rna_structure(rna,fold=fold)
+    assert st.dotpar=="(((("+"."*6+"[[["+"."*14+"))))"+"..."+"]]]"+"."*4
+    assert st.pseudoknotted
+    assert st.partner(10)==36 and st.partner(0)==30
+    again=Rnalib.Rna_structure(rna,dotpar=st.dotpar)
+    assert again.fold==st.fold and again.score==st.score
+    assert again.compact_struct()=="(.[.).]."
+    #les pseudonoeuds sont des feuilles de l'arbre et des bases non appariées des boucles
+    assert again.arbre.tree_to_dotpar()=="(((("+"."*23+"))))"+"."*10
+    assert ("hairpin",3,27,23,0,0,0,4) in again.loop_decomposition()
+    assert not Rnalib.Rna_structure(rna,dotpar="."*len(HTYPE)).pseudoknotted
+
+def test_connect_round_trip(tmp_path):
+    rna=Rnalib.Rna_seq("h",HTYPE)
+    st=Rnalib.Rna_structure(rna,fold=[(0,30),(1,29),(2,28),(3,27),(10,36),(11,35),(12,34)])
+    ct=tmp_path/"pk.ct"
+    st.structure_to_ct(str(ct))
+    with pytest.raises(Exception,match="croisements"):
+        Rnalib.Rna_parser.parse_connect_file(str(ct))
+    back=Rnalib.Rna_parser.parse_connect_file(str(ct),pseudoknots=True)
+    assert back.fold==st.fold and back.dotpar==st.dotpar
+    db=tmp_path/"pk.db"
+    db.write_text(">h\n{}\n{}\n".format(HTYPE,st.dotpar))
+    with pytest.raises(Exception):
+        Rnalib.Rna_parser.parse_dotbrackets_file(str(db))
+    assert Rnalib.Rna_parser.parse_dotbrackets_file(str(db),pseudoknots=True)["h"].fold==st.fold
+
+def test_htype_prediction():
+    fold=Rnalib.Pseudoknot_fold(Rnalib.Rna_seq("h",HTYPE))
+    assert fold.pseudoknots==[(0,30,4,10,36,6)]
+    assert fold.structure.pseudoknotted
+    assert fold.score==fold.structure.score
+    nested=Rnalib.Predict_structure(Rnalib.Rna_seq("h",HTYPE),skipPredAll=True)
+    assert fold.score>nested.structure.score
+
+@pytest.mark.parametrize("min_stem,max_span,penalty",[(2,None,0),(3,None,2),(2,20,1)])
+def test_matches_reference(min_stem,max_span,penalty):
+    rng=random.Random(min_stem*100+penalty)
+    knotted=0
+    for _ in range(12):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(8,34)))
+        fold=Rnalib.Pseudoknot_fold(Rnalib.Rna_seq("s",seq),min_stem=min_stem,max_span=max_span,penalty=penalty)
+        assert fold.score==reference(seq,3,min_stem,max_span,penalty)
+        assert fold.structure.score-penalty*len(fold.pseudoknots)==fold.score
+        assert (fold.matrix>=fold.nested_matrix).all()
+        knotted+=bool(fold.pseudoknots)
+    assert knotted>0
+
+def test_without_candidates_matches_nussinov():
+    seq="".join(random.Random(9).choice("ACGU") for _ in range(80))
+    fold=Rnalib.Pseudoknot_fold(Rnalib.Rna_seq("s",seq),min_stem=40)
+    assert len(fold.stems)==0 and fold.pseudoknots==[]
+    assert fold.structure.fold==Rnalib.Predict_structure(Rnalib.Rna_seq("s",seq),skipPredAll=True).structure.fold
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:02:41 2026
+
+@author: Mathieu Genete
+
+Vérifie le codage des séquences et les scores calculés à partir des codes.
+"""
+import pickle
+import random
+import numpy as np
+import pytest
+import Rnalib
+
+def test_validation_and_dna():
+    rna=Rnalib.Rna_seq("a","acgTT")
+    assert rna.seq=="ACGUU"
+    for bad in ["ACGN","AC GU","ACGé"]:
+        with pytest.raises(Exception,match="ARN ou ADNc"):
+            Rnalib.Rna_seq("b",bad)
+
+def test_codes_match_alphabet():
+    seq="".join(random.Random(3).choice("ACGU") for _ in range(500))
+    rna=Rnalib.Rna_seq("a",seq)
+    assert rna.encoded==Rnalib.Alphabet.encode_rna(seq).tobytes()
+    assert rna.encoded is rna.encoded
+    assert rna.codes.dtype==np.uint8 and not rna.codes.flags.writeable
+    assert np.array_equal(Rnalib.Alphabet.encode_rna("AC&GU-"),[0,1,4,2,3,4])
+
+def test_slots_and_pickle():
+    rna=Rnalib.Rna_seq("a","GGGAAAUCC")
+    assert not hasattr(rna,"__dict__")
+    rna.encoded
+    copy=pickle.loads(pickle.dumps(rna))
+    assert (copy.id,copy.seq,copy.encoded)==("a","GGGAAAUCC",rna.encoded)
+
+@pytest.mark.parametrize("scores",[(3,2,1),(1,1,0),(5,0,2)])
+def test_code_table_scores(scores):
+    sc=Rnalib.Scores(*scores)
+    rna=Rnalib.Alphabet.rna()
+    for b1 in rna:
+        for b2 in rna:
+            assert sc.code_table[rna.index(b1)][rna.index(b2)]==sc.pairs.get((b1,b2),0)
+    assert np.array_equal(sc.pair_table,np.array(sc.code_table))
+    st=Rnalib.Rna_structure(Rnalib.Rna_seq("a","GGGAAAUCCCAGUAAAACUG"),dotpar="(((....))).((....)).",scores=sc)
+    expected=sum(sc.pairs.get((st.rna.seq[i],st.rna.seq[j]),0) for i,j in st.fold)
+    assert st.score==expected
+
+def test_python_backend_uses_codes():
+    rng=random.Random(5)
+    for _ in range(10):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(5,60)))
+        rna=Rnalib.Rna_seq("a",seq)
+        py=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="python").structure
+        ref=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="numpy").structure
+        assert (py.dotpar,py.score)==(ref.dotpar,ref.score)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:12:37 2026
+
+@author: Mathieu Genete
+
+Vérifie la table des paires de Rna_structure et l'export LaTeX.
+"""
+import io
+import random
+import contextlib
+import Rnalib
+
+LATEX=("\\begin{forest}\nfor tree={circle,fill,l sep=30pt}\n"
+       "[[.,green [.,green [.,blue][.,blue][.,blue]]][.,blue]]\n\\end{forest}\n")
+
+def structure():
+    return Rnalib.Rna_structure(Rnalib.Rna_seq("a","GGAAACCA"),dotpar="((...)).")
+
+def test_partners_match_fold():
+    for seed in range(20):
+        seq="".join(random.Random(seed).choice("ACGU") for _ in range(60))
+        st=Rnalib.Predict_structure(Rnalib.Rna_seq("r",seq)).structure
+        partners=st.partners
+        assert st.partners is partners
+        assert sorted((i,j) for i,j in enumerate(partners) if j>i)==[tuple(bp) for bp in st.fold]
+        assert all(partners[j]==i for i,j in enumerate(partners) if j>=0)
+        assert [st.partner(i) for i in range(len(seq))]==[None if j<0 else j for j in partners]
+
+def test_latex_output():
+    st=structure()
+    buf=io.StringIO()
+    assert st.dot_par_to_latex(output=buf)==LATEX
+    assert buf.getvalue()==LATEX
+    stdout=io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        st.dot_par_to_latex()
+    assert stdout.getvalue()==LATEX
+    positions=st.dot_par_to_latex(dotb="(...)",print_struct=False,numbers_shift=0,output=io.StringIO())
+    assert "[{$(0, 4)$},green [{$(1, 1)$},blue]" in positions
+
+def test_latex_file_and_ct(tmp_path):
+    st=structure()
+    path=tmp_path/"struct.tex"
+    st.dot_par_to_latex(output=str(path))
+    assert path.read_text()==LATEX
+    assert st.structure_to_ct().splitlines()[:2]==["1\tG\t7","2\tG\t6"]
+
+def test_deep_nesting():
+    n=3000
+    st=Rnalib.Rna_structure(Rnalib.Rna_seq("d","G"*n+"AAAA"+"C"*n),dotpar="("*n+"...."+")"*n)
+    assert st.partner(0)==2*n+3 and st.partner(n) is None
+    assert len(st.arbre.childs)==1
+    assert st.compact_struct()=="(.)"
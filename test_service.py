@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:05:52 2026
+
+@author: Mathieu Genete
+
+Vérifie le service local de prédiction: regroupement des requêtes, temps limite et métriques.
+"""
+import random
+import pytest
+import Rnalib
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    svc=Rnalib.Fold_service(socket_path=str(tmp_path_factory.mktemp("svc")/"rnalib.sock"),workers=1,batch_max_length=100,batch_window=0.02)
+    svc.start()
+    yield svc
+    svc.close()
+
+def reference(seq,minloop=3,scores=None):
+    return Rnalib.Predict_structure(Rnalib.Rna_seq("a",seq),minloop,skipPredAll=True,bases_scores=scores,backend="python").structure
+
+def test_batched_requests(service):
+    rng=random.Random(5)
+    seqs=["".join(rng.choice("ACGU") for _ in range(rng.randint(1,90))) for _ in range(120)]
+    before=service.metrics["batches"]
+    with Rnalib.Fold_client(service.address) as client:
+        responses=client.fold_many(seqs)
+    assert all(r["ok"] for r in responses)
+    for seq,r in zip(seqs,responses):
+        st=reference(seq)
+        assert (r["dotpar"],r["score"])==(st.dotpar,st.score)
+    #les requêtes envoyées ensemble partagent quelques lots
+    assert service.metrics["batches"]-before<len(seqs)//10
+
+def test_parameters_and_long_sequences(service):
+    rng=random.Random(6)
+    long="".join(rng.choice("ACGU") for _ in range(150))
+    scores=Rnalib.Scores(GC=1,AU=1,GU=0)
+    with Rnalib.Fold_client(service.address) as client:
+        r=client.fold("GGGAAAUCCCGGGAAAUCCC",minloop=1,scores=scores)
+        assert r["dotpar"]==reference("GGGAAAUCCCGGGAAAUCCC",1,scores).dotpar
+        r=client.fold(long,"long")
+        assert (r["id"],r["dotpar"])==("long",reference(long).dotpar)
+
+def test_errors_and_timeout(service):
+    rng=random.Random(7)
+    with Rnalib.Fold_client(service.address) as client:
+        r=client.fold("ACGUN")
+        assert not r["ok"] and "ARN" in r["error"]
+        before=service.metrics["timeouts"]
+        r=client.fold("".join(rng.choice("ACGU") for _ in range(3000)),timeout=0.01)
+        assert not r["ok"]
+        assert service.metrics["timeouts"]==before+1
+        #le service répond toujours après un dépassement
+        assert client.fold("GGGAAAUCCC")["dotpar"]=="(((....)))"
+
+def test_metrics(service):
+    with Rnalib.Fold_client(service.address) as client:
+        client.fold("GGGAAAUCCC")
+        metrics=client.metrics()
+    assert metrics["queue_depth"]==0
+    assert metrics["requests"]>=metrics["completed"]>0
+    assert metrics["latency"]["count"]>0
+    assert 0<metrics["latency"]["p50"]<=metrics["latency"]["p95"]<=metrics["latency"]["max"]
+
+def test_tcp():
+    svc=Rnalib.Fold_service(workers=1)
+    host,port=svc.start()
+    try:
+        assert port>0
+        with Rnalib.Fold_client((host,port)) as client:
+            assert client.fold("GGGAAAUCCC")["dotpar"]=="(((....)))"
+    finally:
+        svc.close()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:14:51 2026
+
+@author: Mathieu Genete
+
+Vérifie que l'import de Rnalib et l'analyse des fichiers n'importent pas numpy, pandas ni numba.
+"""
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT=os.path.dirname(os.path.abspath(__file__))
+
+def loaded_modules(tmp_path,code):
+    script="import sys\n"+code+"\nprint(' '.join(m for m in ('numpy','pandas','numba') if m in sys.modules))\n"
+    out=subprocess.run([sys.executable,"-c",script],cwd=str(tmp_path),env=dict(os.environ,PYTHONPATH=ROOT),
+                       check=True,capture_output=True,text=True).stdout.split()
+    return set(out)
+
+def test_import_is_light(tmp_path):
+    assert loaded_modules(tmp_path,"import Rnalib")==set()
+
+def test_parsing_is_light(tmp_path):
+    with open(tmp_path/"in.db","w") as out:
+        out.write(">a\nGGGAAAUCCC\n(((....)))\n")
+    code=("import Rnalib\n"
+          "s=Rnalib.Rna_parser.parse_dotbrackets_file('in.db')['a']\n"
+          "s.structure_to_ct('out.ct')\n"
+          "Rnalib.Rna_parser.parse_connect_file('out.ct')\n")
+    assert loaded_modules(tmp_path,code)==set()
+
+def test_engines_load_on_access(tmp_path):
+    loaded=loaded_modules(tmp_path,"import Rnalib\nRnalib.Predict_structure(Rnalib.Rna_seq('a','GGGAAAUCCC'),3,backend='numpy')")
+    assert "numpy" in loaded
+    assert "numba" not in loaded
+    assert "pandas" not in loaded
+
+def test_lazy_names():
+    import Rnalib
+    from Rnalib.Predict_structure import Predict_structure
+    assert Rnalib.Predict_structure is Predict_structure
+    assert isinstance(Rnalib.Disk_matrix,type)
+    assert set(Rnalib.__all__)<=set(dir(Rnalib))
+    with pytest.raises(AttributeError):
+        Rnalib.Unknown
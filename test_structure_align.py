@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 16:40:55 2026
+
+@author: Mathieu Genete
+
+Vérifie l'alignement de deux ARN selon leurs séquences et leurs structures.
+"""
+import functools
+import random
+import numpy as np
+import pytest
+import Rnalib
+
+OPTIONS={"match":2,"mismatch":-1,"gap":-2,"arc_match":3,"arc_break":-1}
+
+def reference(seq1,dot1,seq2,dot2,match=2,mismatch=-1,gap=-2,arc_match=3,arc_break=-1):
+    """Même modèle, par récursion mémorisée sur les couples de paires et alignement naïf des intérieurs."""
+    def partners(dot):
+        stack,out=[],[-1]*len(dot)
+        for pos,c in enumerate(dot):
+            if c=="(":
+                stack.append(pos)
+            elif c==")":
+                k=stack.pop()
+                out[k],out[pos]=pos,k
+        return out
+    p1,p2=partners(dot1),partners(dot2)
+    brk1=[arc_break if v>=0 else 0 for v in p1]
+    brk2=[arc_break if v>=0 else 0 for v in p2]
+    def same(x,y):
+        return match if seq1[x]==seq2[y] else mismatch
+    @functools.lru_cache(None)
+    def interior(i,j,k,l):
+        D={}
+        for x in range(i,j):
+            for y in range(k,l):
+                if x==i and y==k:
+                    D[x,y]=0
+                    continue
+                best=-np.inf
+                if x>i:
+                    best=max(best,D[x-1,y]+gap+brk1[x])
+                if y>k:
+                    best=max(best,D[x,y-1]+gap+brk2[y])
+                if x>i and y>k:
+                    best=max(best,D[x-1,y-1]+same(x,y)+brk1[x]+brk2[y])
+                    x0,y0=p1[x],p2[y]
+                    if i<x0<x and k<y0<y:
+                        best=max(best,D[x0-1,y0-1]+interior(x0,x,y0,y)+arc_match+same(x0,y0)+same(x,y))
+                D[x,y]=best
+        return D[j-1,l-1]
+    return interior(-1,len(seq1),-1,len(seq2))
+
+def random_structure(rng,name,length):
+    seq="".join(rng.choice("ACGU") for _ in range(length))
+    return Rnalib.Predict_structure(Rnalib.Rna_seq(name,seq),skipPredAll=True).structure
+
+def rescore(al):
+    """Recalcule le score à partir des colonnes et des paires alignées."""
+    seq1,seq2=al.structure1.rna.seq,al.structure2.rna.seq
+    dot1,dot2=al.structure1.dotpar,al.structure2.dotpar
+    matched=set()
+    for (i,j),(k,l) in al.matched_pairs:
+        matched|={(i,k),(j,l)}
+    total=OPTIONS["arc_match"]*len(al.matched_pairs)
+    for x,y in al.columns:
+        if x is not None and y is not None:
+            total+=OPTIONS["match"] if seq1[x]==seq2[y] else OPTIONS["mismatch"]
+        else:
+            total+=OPTIONS["gap"]
+        if (x,y) not in matched:
+            total+=OPTIONS["arc_break"]*((x is not None and dot1[x]!=".")+(y is not None and dot2[y]!="."))
+    return total
+
+def test_identical_and_swapped_domains():
+    a=Rnalib.Rna_structure(Rnalib.Rna_seq("a","GGGGAAAACCCCAGGGAAACCC"),dotpar="((((....)))).(((...)))")
+    b=Rnalib.Rna_structure(Rnalib.Rna_seq("b","GGGAAACCCAGGGGAAAACCCC"),dotpar="(((...))).((((....))))")
+    self_al=Rnalib.Structure_align(a,a)
+    assert self_al.score==22*2+7*3
+    assert self_al.alignment==(a.rna.seq,a.rna.seq)
+    al=Rnalib.Structure_align(a,b)
+    assert len(al.matched_pairs)==6
+    first,second=al.aligned_structures
+    assert len(first)==len(second)==len(al.columns)
+    assert first.replace("-","")==a.dotpar and second.replace("-","")==b.dotpar
+    assert al.score==rescore(al)==reference(a.rna.seq,a.dotpar,b.rna.seq,b.dotpar)
+
+def test_matches_reference():
+    rng=random.Random(4)
+    for _ in range(15):
+        a=random_structure(rng,"a",rng.randint(0,30))
+        b=random_structure(rng,"b",rng.randint(0,30))
+        al=Rnalib.Structure_align(a,b)
+        assert al.score==reference(a.rna.seq,a.dotpar,b.rna.seq,b.dotpar)
+        assert al.score==rescore(al)
+        assert "".join(al.alignment[0]).replace("-","")==a.rna.seq
+
+def test_unstructured_is_needleman_wunsch():
+    a=Rnalib.Rna_structure(Rnalib.Rna_seq("a","GAUUACA"),dotpar="."*7)
+    b=Rnalib.Rna_structure(Rnalib.Rna_seq("b","GCAUGCU"),dotpar="."*7)
+    al=Rnalib.Structure_align(a,b,match=1,mismatch=-1,gap=-1)
+    assert al.score==reference(a.rna.seq,a.dotpar,b.rna.seq,b.dotpar,match=1,mismatch=-1,gap=-1)
+    assert al.matched_pairs==[]
+    assert [x for x,_ in al.columns if x is not None]==list(range(7))
+    assert [y for _,y in al.columns if y is not None]==list(range(7))
+
+def test_band():
+    rng=random.Random(8)
+    a=random_structure(rng,"a",60)
+    b=random_structure(rng,"b",50)
+    full=Rnalib.Structure_align(a,b)
+    assert Rnalib.Structure_align(a,b,band=60).score==full.score
+    narrow=Rnalib.Structure_align(a,b,band=3)
+    assert narrow.score<=full.score and narrow.score==rescore(narrow)
+    assert all(abs(x-y)<=10 for x,y in narrow.columns if x is not None and y is not None)
+
+def test_all_vs_all(tmp_path):
+    rng=random.Random(12)
+    structures=[random_structure(rng,"s{}".format(n),rng.randint(15,30)) for n in range(4)]
+    db=tmp_path/"family.db"
+    db.write_text("".join(">{}\n{}\n{}\n".format(st.rna.id,st.rna.seq,st.dotpar) for st in structures))
+    family=Rnalib.Rna_parser.parse_dotbrackets_file(str(db))
+    ids,matrix=Rnalib.Structure_align.all_vs_all(family,band=20)
+    assert ids==["s0","s1","s2","s3"]
+    assert (matrix==matrix.T).all()
+    assert matrix[1,2]==Rnalib.Structure_align(structures[1],structures[2],band=20).score
+    _,parallel=Rnalib.Structure_align.all_vs_all(structures,workers=2,band=20)
+    assert (parallel==matrix).all()
+    with pytest.raises(Exception,match="Rna_structure"):
+        Rnalib.Structure_align("GGGAAACCC",structures[0])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:48:09 2026
+
+@author: Mathieu Genete
+
+Vérifie la collection indexée de structures (formats dot-bracket et binaire).
+"""
+import os
+import random
+import struct
+import pytest
+import Rnalib
+
+def structures(seed,count):
+    rng=random.Random(seed)
+    out=[]
+    for k in range(count):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(1,120)))
+        out.append(Rnalib.Predict_structure(Rnalib.Rna_seq("rec{}".format(k),seq),3,skipPredAll=True,backend="numpy").structure)
+    return out
+
+def write_db(path,sts):
+    with open(path,"w") as out:
+        for st in sts:
+            out.write(">{}\n{}\n{}\n".format(st.rna.id,st.rna.seq,st.dotpar))
+
+@pytest.mark.parametrize("binary",[False,True])
+def test_lookup_append_reopen(tmp_path,binary):
+    sts=structures(1,80)
+    path=str(tmp_path/("s.rdb" if binary else "s.db"))
+    with Rnalib.Structure_db(path) as db:
+        assert db.binary==binary
+        db.extend(sts[:50])
+        db.append(sts[50])
+        db.append((sts[51].rna.id,sts[51].rna.seq,sts[51].dotpar))
+    with Rnalib.Structure_db(path) as db:
+        db.extend(sts[52:])
+        assert len(db)==len(sts)
+        assert db.ids==[st.rna.id for st in sts]
+    with Rnalib.Structure_db(path) as db:
+        for st in random.Random(2).sample(sts,30):
+            assert db[st.rna.id].dotpar==st.dotpar
+            assert db.record(st.rna.id)==(st.rna.id,st.rna.seq,st.dotpar)
+        assert "absent" not in db and db.get("absent") is None
+        with pytest.raises(KeyError):
+            db["absent"]
+        with pytest.raises(Exception):
+            db.append(sts[0])
+
+def test_existing_file_and_external_append(tmp_path):
+    sts=structures(3,40)
+    path=str(tmp_path/"s.db")
+    write_db(path,sts[:30])
+    with Rnalib.Structure_db(path) as db:
+        assert len(db)==30
+    assert os.path.exists(path+".idx")
+    #ajout par un autre programme, sans saut de ligne final
+    with open(path,"a") as out:
+        out.write("\n>{}\n{}\n{}".format(sts[30].rna.id,sts[30].rna.seq,sts[30].dotpar))
+    with Rnalib.Structure_db(path) as db:
+        assert db[sts[30].rna.id].dotpar==sts[30].dotpar
+        db.extend(sts[31:])
+    with open(path) as handle:
+        parsed=list(Rnalib.Rna_parser.iter_dotbrackets(handle))
+    assert [(p.rna.id,p.dotpar) for p in parsed]==[(st.rna.id,st.dotpar) for st in sts]
+    #index d'un fichier tronqué: reconstruit
+    write_db(path,sts[:5])
+    with Rnalib.Structure_db(path) as db:
+        assert db.ids==[st.rna.id for st in sts[:5]]
+
+def test_from_dotbrackets_binary(tmp_path):
+    sts=structures(4,60)
+    write_db(str(tmp_path/"in.db"),sts)
+    with Rnalib.Structure_db.from_dotbrackets(str(tmp_path/"in.db"),str(tmp_path/"out.rdb"),chunk=7) as db:
+        assert db.binary and len(db)==60
+        assert [db[st.rna.id].fold for st in sts]==[st.fold for st in sts]
+    with pytest.raises(Exception):
+        Rnalib.Structure_db(str(tmp_path/"out.rdb"),binary=False)
+
+def test_invalid_record(tmp_path):
+    path=tmp_path/"bad.db"
+    path.write_text(">a\nGGGAAAUCCC\n(((....)))\n>b\nGGGAAAUCCC\n((......))(\n")
+    with Rnalib.Structure_db(str(path)) as db:
+        assert db["a"].dotpar=="(((....)))"
+        with pytest.raises(Exception):
+            db["b"]
+
+@pytest.mark.parametrize("binary",[False,True])
+def test_pseudoknot_record(tmp_path,binary):
+    dotpar="((((..[[[[))))..]]]].."
+    st=Rnalib.Rna_structure(Rnalib.Rna_seq("pk","GGGGAAGGGGCCCCAACCCCAA"),dotpar=dotpar)
+    path=str(tmp_path/("pk.rdb" if binary else "pk.db"))
+    with Rnalib.Structure_db(path) as db:
+        db.append(st)
+    with Rnalib.Structure_db(path) as db:
+        assert db.record("pk")==("pk",st.rna.seq,dotpar)
+        assert db["pk"].fold==st.fold
+
+def test_tab_in_identifier(tmp_path):
+    path=tmp_path/"tab.db"
+    path.write_text(">a\tdesc\nGGGAAAUCCC\n(((....)))\n")
+    for _ in range(2):
+        with Rnalib.Structure_db(str(path)) as db:
+            assert db.ids==["a\tdesc"]
+            assert db["a\tdesc"].dotpar=="(((....)))"
+    #fichier binaire écrit par un autre programme: un saut de ligne casserait l'index
+    rdb=tmp_path/"nl.rdb"
+    rdb.write_bytes(Rnalib.Structure_db.MAGIC+struct.pack("<HII",3,4,0)+b"a\nb"+b"\x00")
+    with pytest.raises(Exception,match="saut de ligne"):
+        Rnalib.Structure_db(str(rdb))
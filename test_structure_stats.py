@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 21:48:12 2026
+
+@author: Mathieu Genete
+
+Vérifie les statistiques vectorisées par comparaison aux méthodes de Rna_structure.
+"""
+import random
+import pytest
+import Rnalib
+
+def depth(dotpar):
+    d=best=0
+    for c in dotpar:
+        d+=(c=="(")-(c==")")
+        best=max(best,d)
+    return best
+
+def test_matches_per_structure():
+    rng=random.Random(8)
+    sts=[]
+    for k in range(60):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(0,80)))
+        sts.append(Rnalib.Predict_structure(Rnalib.Rna_seq("s{}".format(k),seq),3,skipPredAll=True,backend="numpy").structure)
+    table=Rnalib.Structure_stats.compute(sts)
+    assert len(table)==len(sts)
+    for st,row in zip(sts,table):
+        fold=set(st.fold)
+        kinds=["".join(sorted(st.rna.seq[i]+st.rna.seq[j])) for i,j in fold]
+        helices=sum(1 for i,j in fold if (i-1,j+1) not in fold)
+        assert row["id"]==st.rna.id and row["length"]==len(st.rna.seq)
+        assert row["pairs"]==len(fold) and row["helices"]==helices
+        assert (row["gc_pairs"],row["au_pairs"],row["gu_pairs"])==(kinds.count("CG"),kinds.count("AU"),kinds.count("GU"))
+        assert row["mean_helix_length"]==pytest.approx(len(fold)/helices if helices else 0.0)
+        assert row["max_depth"]==depth(st.dotpar)
+        assert row["shape"]==st.compact_struct()
+
+def test_from_dotbrackets(tmp_path):
+    path=tmp_path/"s.db"
+    path.write_text(">a\nGGGGAAAACCCC\n((((....))))\n\n>b\nACGU\n....\n>c\nGGAAACUUAAAGCC\n((...))((...))\n")
+    table=Rnalib.Structure_stats.from_dotbrackets(str(path))
+    assert table["id"].tolist()==["a","b","c"]
+    assert table["pairs"].tolist()==[4,0,4]
+    assert table["shape"].tolist()==["(.)",".","(.)(.)"]
+    assert table["max_depth"].tolist()==[4,0,2]
+    bad=tmp_path/"bad.db"
+    bad.write_text(">a\nGGGGAAAACCCC\n((((....)))(\n")
+    with pytest.raises(Exception,match="mal parenthésée"):
+        Rnalib.Structure_stats.from_dotbrackets(str(bad))
+
+def test_pseudoknots():
+    dotpars=["((((..[[[[))))..]]]]..","((..{{..[[..))..]]..}}..<<..>>"]
+    sts=[Rnalib.Rna_structure(Rnalib.Rna_seq("pk{}".format(k),"".join("GC"[c in ")]}>"] if c!="." else "A" for c in d)),dotpar=d)
+         for k,d in enumerate(dotpars)]
+    table=Rnalib.Structure_stats.compute(sts)
+    assert table["pairs"].tolist()==[len(st.fold) for st in sts]==[8,8]
+    assert table["shape"].tolist()==[st.compact_struct() for st in sts]
+    assert table["helices"].tolist()==[2,4]
+    assert table["max_depth"].tolist()==[4,2]
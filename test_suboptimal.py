@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 16:21:07 2026
+
+@author: Mathieu Genete
+
+Vérifie l'énumération des structures suboptimales par comparaison à une énumération exhaustive.
+"""
+import random
+import pytest
+import Rnalib
+
+def all_folds(seq,scores,minloop,i,j):
+    """Toutes les structures de seq[i..j] (j non apparié, ou apparié à k>=i)."""
+    if j-i<=minloop:
+        return [(0,())]
+    out=list(all_folds(seq,scores,minloop,i,j-1))
+    for k in range(i,j-minloop):
+        p=scores.pairs.get((seq[k],seq[j]),0)
+        if p<=0:
+            continue
+        left=all_folds(seq,scores,minloop,i,k-1) if k>i else [(0,())]
+        for s1,f1 in left:
+            for s2,f2 in all_folds(seq,scores,minloop,k+1,j-1):
+                out.append((s1+s2+p,f1+f2+((k,j),)))
+    return out
+
+@pytest.mark.parametrize("backend",["python","numpy"])
+def test_matches_exhaustive(backend):
+    rng=random.Random(7)
+    for _ in range(6):
+        seq="".join(rng.choice("ACGU") for _ in range(rng.randint(1,16)))
+        rna=Rnalib.Rna_seq("a",seq)
+        pred=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend=backend)
+        delta=3
+        expected=sorted((s,tuple(sorted(f))) for s,f in all_folds(seq,Rnalib.Scores(),3,0,len(seq)-1) if s>=pred.structure.score-delta)
+        subs=list(pred.suboptimal_structures(delta))
+        scores=[st.score for st in subs]
+        assert scores==sorted(scores,reverse=True)
+        assert sorted((st.score,tuple(st.fold)) for st in subs)==expected
+        assert pred.suboptimal_complete
+
+def test_delta_zero_is_cooptimal():
+    rna=Rnalib.Rna_seq("a","GGGAAACCCAGGGAAACCCA")
+    pred=Rnalib.Predict_structure(rna,3,backend="numpy")
+    subs=list(pred.suboptimal_structures(0))
+    assert {s.dotpar for s in subs}=={s.dotpar for s in pred.all_structures}
+
+def test_caps():
+    rna=Rnalib.Rna_seq("a","GGGAAAUCCCAGUAAAACUGGCAUCGAUCGAGGCUAGCUA")
+    pred=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="numpy")
+    first=list(pred.suboptimal_structures(4,max_structures=10))
+    assert len(first)==10 and not pred.suboptimal_complete
+    assert [s.dotpar for s in first]==[s.dotpar for s in pred.suboptimal_structures(4,max_structures=50)][:10]
+    limited=list(pred.suboptimal_structures(6,max_memory=20000))
+    assert not pred.suboptimal_complete
+    assert all(s.score>=pred.structure.score-6 for s in limited)
+
+def test_disk_matrix(tmp_path):
+    rna=Rnalib.Rna_seq("a","GGGAAAUCCCAGUAAAACUGGC")
+    ref=Rnalib.Predict_structure(rna,3,skipPredAll=True,backend="numpy")
+    disk=Rnalib.Predict_structure(rna,3,skipPredAll=True,matrix_file=str(tmp_path/"m.bin"))
+    assert [s.dotpar for s in disk.suboptimal_structures(2)]==[s.dotpar for s in ref.suboptimal_structures(2)]